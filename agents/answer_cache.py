@@ -0,0 +1,270 @@
+"""
+Answer Cache
+Final answers keyed by the normalized question, intent, entities and the
+versions of the policies they were written from, with per-policy
+invalidation
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .cache import normalize_message
+
+logger = logging.getLogger(__name__)
+
+# Intents whose answers depend only on the policies, not on the employee
+CACHEABLE_INTENTS = ("POLICY_QUESTION", "BENEFITS_QUERY")
+
+# The answer generator writes from the top three policies
+POLICIES_USED = 3
+
+PolicyVersion = Tuple[str, str]
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(k).lower(): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return sorted((_normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    return value
+
+
+def normalize_entities(entities: Optional[Dict[str, Any]]) -> str:
+    """Entities as canonical JSON: lower-cased, whitespace-collapsed, key-sorted."""
+    return json.dumps(_normalize(entities or {}), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def policy_versions(knowledge_result: Dict[str, Any]) -> Tuple[PolicyVersion, ...]:
+    """(id, last_updated) of the policies an answer is written from, in order."""
+    return tuple(
+        (str(p.get("id")), str(p.get("last_updated", "")))
+        for p in knowledge_result.get("policies", [])[:POLICIES_USED]
+        if isinstance(p, dict) and p.get("id") is not None
+    )
+
+
+class SharedAnswerTier(abc.ABC):
+    """Optional second tier shared between instances."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def set(self, key: str, answer: str, policies: Tuple[PolicyVersion, ...]) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def invalidate(self, policy_id: str) -> int:
+        """Delete every answer written from any version of a policy."""
+        raise NotImplementedError
+
+
+class RedisAnswerTier(SharedAnswerTier):
+    """
+    Answers in Redis, with one set per policy listing the answers that
+    depend on it.
+
+    Requires the redis package (redis>=5), which is not a core dependency.
+    """
+
+    def __init__(self, url: str, ttl: float = 86400.0, prefix: str = "maestroai:answer"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, answer: str, policies: Tuple[PolicyVersion, ...]) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{self.prefix}:{key}", answer, ex=self.ttl)
+            for policy_id, _ in policies:
+                pipe.sadd(f"{self.prefix}:policy:{policy_id}", key)
+                pipe.expire(f"{self.prefix}:policy:{policy_id}", self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, policy_id: str) -> int:
+        index = f"{self.prefix}:policy:{policy_id}"
+        keys = await self.client.smembers(index)
+        if keys:
+            await self.client.delete(*(f"{self.prefix}:{key}" for key in keys))
+        await self.client.delete(index)
+        return len(keys)
+
+
+class AnswerCache:
+    """
+    Bounded LRU of final answers with an optional shared tier.
+
+    The key includes the id and last_updated of every policy the answer
+    was written from, so an updated policy can never serve an answer
+    written from its old text. Entries are also indexed by policy id:
+    invalidate_policy() drops exactly the answers that used a policy, and
+    a lookup that sees a newer version of a policy than the cache holds
+    drops the old answers straight away.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 5000,
+        ttl: float = 86400.0,
+        shared: Optional[SharedAnswerTier] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum answers held in memory before LRU eviction
+            ttl: Seconds an answer stays valid after it is stored
+            shared: Optional tier shared between instances
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        # key -> (expires_at, answer, policy versions)
+        self._entries: "OrderedDict[str, Tuple[float, str, Tuple[PolicyVersion, ...]]]" = OrderedDict()
+        self._by_policy: Dict[str, Set[str]] = {}
+        self._versions: Dict[str, str] = {}
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0, "invalidated": 0}
+
+    @staticmethod
+    def key(message: str, results: Dict[str, Any]) -> Optional[str]:
+        """
+        Cache key for a request's stage results, or None if its answer
+        must not be cached: a non-cacheable intent, a runbook or
+        escalation outcome, a degraded stage, or no policies to cite.
+        
+        The answer is written from the employee's own question, so the
+        normalized message is part of the key: different questions that
+        retrieve the same policies never share an answer.
+        """
+        intent_result = results["classify"]
+        intent = intent_result.get("intent")
+        if intent not in CACHEABLE_INTENTS or results.get("runbook") is not None:
+            return None
+        if results["escalate"].get("escalate"):
+            return None
+        if any(isinstance(r, dict) and r.get("degraded") for r in results.values()):
+            return None
+        versions = policy_versions(results["knowledge"])
+        if not versions:
+            return None
+        material = json.dumps(
+            [normalize_message(message), intent, normalize_entities(intent_result.get("entities")), versions],
+            separators=(",", ":")
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, results: Dict[str, Any]) -> Optional[str]:
+        """The cached answer for key, checking the shared tier on a local miss."""
+        self.observe(policy_versions(results["knowledge"]))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self._remove(key)
+        if self.shared is not None:
+            try:
+                answer = await self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared answer cache lookup failed: {str(e)}")
+                answer = None
+            if answer is not None:
+                self.stats["shared_hits"] += 1
+                self._store(key, answer, policy_versions(results["knowledge"]))
+                return answer
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, results: Dict[str, Any], answer: str) -> None:
+        """Store an answer in both tiers."""
+        versions = policy_versions(results["knowledge"])
+        self.observe(versions)
+        self._store(key, answer, versions)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, answer, versions)
+            except Exception as e:
+                logger.warning(f"Shared answer cache store failed: {str(e)}")
+
+    def _store(self, key: str, answer: str, versions: Tuple[PolicyVersion, ...]) -> None:
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, answer, versions)
+        for policy_id, _ in versions:
+            self._by_policy.setdefault(policy_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for policy_id, _ in entry[2]:
+            keys = self._by_policy.get(policy_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_policy[policy_id]
+
+    def observe(self, versions: Tuple[PolicyVersion, ...]) -> None:
+        """Note the policy versions retrieval returned, dropping answers from older ones."""
+        for policy_id, version in versions:
+            known = self._versions.get(policy_id)
+            if known is not None and known != version:
+                self._invalidate_local(policy_id, keep_version=version)
+            self._versions[policy_id] = version
+
+    def _invalidate_local(self, policy_id: str, keep_version: Optional[str] = None) -> int:
+        dropped = 0
+        for key in list(self._by_policy.get(policy_id, ())):
+            versions = dict(self._entries[key][2])
+            if keep_version is None or versions.get(policy_id) != keep_version:
+                self._remove(key)
+                dropped += 1
+        self.stats["invalidated"] += dropped
+        if dropped:
+            logger.info(f"Invalidated {dropped} cached answers that used policy {policy_id}")
+        return dropped
+
+    async def invalidate_policy(self, policy_id: str) -> int:
+        """
+        Drop every answer written from a policy, in both tiers.
+
+        Returns:
+            Number of answers dropped from the in-memory tier
+        """
+        self._versions.pop(policy_id, None)
+        dropped = self._invalidate_local(policy_id)
+        if self.shared is not None:
+            try:
+                await self.shared.invalidate(policy_id)
+            except Exception as e:
+                logger.warning(f"Shared answer cache invalidation failed: {str(e)}")
+        return dropped
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def build_answer_cache() -> AnswerCache:
+    """The cache configured by the ANSWER_CACHE_* variables."""
+    shared_url = os.getenv("ANSWER_CACHE_REDIS_URL")
+    ttl = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+    return AnswerCache(
+        maxsize=int(os.getenv("ANSWER_CACHE_MAXSIZE", "5000")),
+        ttl=ttl,
+        shared=RedisAnswerTier(shared_url, ttl) if shared_url else None
+    )
@@ -0,0 +1,182 @@
+"""
+Answer Generator
+Writes the user-facing answer from the agent results, streaming it token by
+token from Azure OpenAI
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from . import telemetry
+from .prompts import ANSWER_BUDGETS, Prompt, PromptTemplate, TokenBudget, format_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANSWER = "Your request has been processed."
+
+SYSTEM_PROMPT = """You are MaestroAI, an HR Service Desk assistant.
+Answer the employee's request using only the classified intent, the HR policies,
+the runbook result and the escalation decision provided.
+Be concise and friendly. Cite policy titles when you rely on them.
+If the request was escalated, say that an HR specialist will follow up.
+Never invent policy details that are not in the provided context."""
+
+ANSWER_PROMPT = PromptTemplate("answer", SYSTEM_PROMPT)
+
+
+@dataclass
+class AnswerOutcome:
+    """How a generated answer ended, filled in by AnswerGenerator.stream()."""
+
+    finish_reason: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the model finished the answer on its own, without an error."""
+        return self.error is None and self.finish_reason == "stop"
+
+
+class AnswerGenerator:
+    """
+    Generates answers with a streaming chat completion.
+
+    When the model call fails before producing any text, the stream falls
+    back to DEFAULT_ANSWER so callers always receive an answer.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            max_tokens: Completion token ceiling over the per-intent budgets
+                (defaults to ANSWER_MAX_TOKENS or 400)
+        """
+        self.deployment_name = os.getenv(
+            "ANSWER_DEPLOYMENT_NAME", os.getenv("OPENAI_DEPLOYMENT_NAME", "gpt-4")
+        )
+        self.max_tokens = max_tokens or int(os.getenv("ANSWER_MAX_TOKENS", "400"))
+        self._client = None
+
+    @property
+    def client(self):
+        """Azure OpenAI client, created on first use."""
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+
+            self._client = AsyncAzureOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                api_version=os.getenv("OPENAI_API_VERSION", "2024-02-15-preview"),
+                azure_endpoint=os.getenv("OPENAI_ENDPOINT")
+            )
+        return self._client
+
+    def budget(self, intent: Optional[str]) -> TokenBudget:
+        """Token budget for answering an intent, capped at max_tokens."""
+        budget = ANSWER_BUDGETS.get(intent) or ANSWER_BUDGETS["UNKNOWN"]
+        return TokenBudget(budget.prompt_tokens, min(budget.max_tokens, self.max_tokens))
+    
+    def build_prompt(
+        self,
+        message: str,
+        intent_result: Dict[str, Any],
+        knowledge_result: Dict[str, Any],
+        runbook_result: Optional[Dict[str, Any]],
+        escalation_result: Dict[str, Any]
+    ) -> Prompt:
+        """
+        Prompt for one answer within the intent's budget.
+        
+        Lower-ranked policies are dropped, and then the top one shortened,
+        until the prompt fits.
+        """
+        budget = self.budget(intent_result.get("intent"))
+        policies = [
+            {"title": p.get("title"), "content": p.get("content")}
+            for p in knowledge_result.get("policies", [])[:3]
+            if isinstance(p, dict)
+        ]
+        context = {
+            "intent": intent_result.get("intent"),
+            "entities": intent_result.get("entities", {}),
+            "policies": policies,
+            "runbook": runbook_result,
+            "escalation": escalation_result
+        }
+        while True:
+            user_content = f"Employee request: {message}\nContext: {format_context(context)}"
+            policies = context["policies"]
+            if not policies or ANSWER_PROMPT.fits(user_content, budget):
+                break
+            if len(policies) > 1:
+                context["policies"] = policies[:-1]
+            elif policies[0]["content"]:
+                content = str(policies[0]["content"])
+                context["policies"] = [dict(policies[0], content=content[:len(content) // 2])]
+            else:
+                context["policies"] = []
+        return ANSWER_PROMPT.build(user_content, budget)
+
+    async def stream(
+        self,
+        message: str,
+        intent_result: Dict[str, Any],
+        knowledge_result: Dict[str, Any],
+        runbook_result: Optional[Dict[str, Any]],
+        escalation_result: Dict[str, Any],
+        outcome: Optional[AnswerOutcome] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the answer as text deltas.
+
+        Recorded as an "answer" span with time to first token and usage.
+        When outcome is given it receives the finish reason and any error,
+        so callers can tell a complete answer from one that was cut off
+        by max_tokens or a failed stream.
+        """
+        if outcome is None:
+            outcome = AnswerOutcome()
+        prompt = self.build_prompt(
+            message, intent_result, knowledge_result, runbook_result, escalation_result
+        )
+        started = time.perf_counter()
+        attributes: Dict[str, Any] = {"estimated_prompt_tokens": prompt.prompt_tokens}
+        error = None
+        produced = False
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.deployment_name,
+                messages=prompt.messages,
+                temperature=0.3,
+                max_tokens=prompt.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in response:
+                if chunk.usage is not None:
+                    attributes["prompt_tokens"] = chunk.usage.prompt_tokens
+                    attributes["completion_tokens"] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    outcome.finish_reason = chunk.choices[0].finish_reason
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not produced:
+                        attributes["first_token_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                        produced = True
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            error = outcome.error = type(e).__name__
+            logger.error(f"Error streaming answer: {str(e)}")
+            if not produced:
+                yield DEFAULT_ANSWER
+        finally:
+            if outcome.finish_reason is not None:
+                attributes["finish_reason"] = outcome.finish_reason
+            telemetry.record("answer", time.perf_counter() - started, error, **attributes)
+
+    async def generate(self, *args: Any, outcome: Optional[AnswerOutcome] = None) -> str:
+        """The whole answer as one string; takes the same arguments as stream()."""
+        return "".join([delta async for delta in self.stream(*args, outcome=outcome)])
@@ -0,0 +1,281 @@
+"""
+Intent Cache
+Two-tier cache for intent classifications: exact match on a normalized
+message hash, plus an optional embedding-similarity tier
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EmbedFunc = Callable[[str], Awaitable[List[float]]]
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different phrasings share a key."""
+    text = _WHITESPACE.sub(" ", (message or "").strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def context_digest(context: Optional[Dict[str, Any]]) -> str:
+    """Stable digest of a conversation context ('' when there is none)."""
+    if not context:
+        return ""
+    encoded = json.dumps(context, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after a fixed TTL.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before LRU eviction
+            ttl: Seconds an entry stays valid after it is stored
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Any) -> Optional[Any]:
+        """Remove an entry and return its value if it was present."""
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache over message embeddings.
+
+    Vectors live in a preallocated NumPy matrix used as a ring buffer, so a
+    lookup is one masked matrix-vector product over the live entries that
+    share the query's context digest. A digest's group id is dropped when
+    the last slot holding it is overwritten, so the digest map stays
+    bounded by maxsize.
+    """
+
+    def __init__(self, threshold: float, maxsize: int = 5000, ttl: float = 3600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of stored embeddings
+            ttl: Seconds an entry stays valid after it is stored
+        """
+        import numpy as np
+
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._vectors = None
+        self._groups = np.full(maxsize, -1, dtype=np.int64)
+        self._expires = np.zeros(maxsize, dtype=np.float64)
+        self._values: List[Any] = [None] * maxsize
+        self._group_ids: Dict[str, int] = {}
+        self._group_digests: Dict[int, str] = {}
+        self._group_sizes: Dict[int, int] = {}
+        self._next_group = 0
+        self._next = 0
+
+    def lookup(self, vector: List[float], digest: str) -> Optional[Any]:
+        """Return the value of the most similar live entry above threshold."""
+        group = self._group_ids.get(digest)
+        if self._vectors is None or group is None:
+            return None
+        import numpy as np
+
+        slots = np.flatnonzero(
+            (self._groups == group) & (self._expires >= time.monotonic())
+        )
+        if slots.size == 0:
+            return None
+        scores = self._vectors[slots] @ self._unit(vector)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        return self._values[int(slots[best])]
+
+    def add(self, vector: List[float], digest: str, value: Any) -> None:
+        """Store an embedding, overwriting the oldest slot when full."""
+        import numpy as np
+
+        unit = self._unit(vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.maxsize, unit.shape[0]), dtype=np.float32)
+        slot = self._next
+        self._release(int(self._groups[slot]))
+        group = self._group_ids.get(digest)
+        if group is None:
+            group = self._next_group
+            self._next_group += 1
+            self._group_ids[digest] = group
+            self._group_digests[group] = digest
+        self._group_sizes[group] = self._group_sizes.get(group, 0) + 1
+        self._vectors[slot] = unit
+        self._groups[slot] = group
+        self._expires[slot] = time.monotonic() + self.ttl
+        self._values[slot] = value
+        self._next = (slot + 1) % self.maxsize
+
+    def _release(self, group: int) -> None:
+        """Give up one slot of a group, forgetting its digest with the last."""
+        if group < 0:
+            return
+        self._group_sizes[group] -= 1
+        if not self._group_sizes[group]:
+            del self._group_sizes[group]
+            del self._group_ids[self._group_digests.pop(group)]
+
+    @staticmethod
+    def _unit(vector: List[float]):
+        import numpy as np
+
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+
+class IntentCache:
+    """
+    Exact + near-duplicate cache in front of the intent classifier.
+
+    Both tiers are keyed by the context digest as well as the message, so
+    context-bearing requests never share results with context-free ones.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 3600.0,
+        semantic_threshold: Optional[float] = None,
+        embed: Optional[EmbedFunc] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum entries in the exact tier
+            ttl: Entry lifetime in seconds for both tiers
+            semantic_threshold: Cosine similarity for the embedding tier;
+                None disables the tier
+            embed: Async function returning an embedding for a message,
+                required for the embedding tier
+        """
+        self.exact = TTLCache(maxsize, ttl)
+        self.semantic = (
+            SemanticCache(semantic_threshold, maxsize, ttl)
+            if semantic_threshold is not None and embed is not None
+            else None
+        )
+        self.embed = embed
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(message: str, context: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+        """Build the exact-tier key for a message and context."""
+        normalized = normalize_message(message)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return digest, context_digest(context)
+
+    async def get(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Look a message up in both tiers.
+
+        Returns:
+            Tuple of (cached result or None, message embedding or None).
+            The embedding is handed back so a later set() does not have to
+            compute it again.
+        """
+        key = self.key(message, context)
+        result = self.exact.get(key)
+        if result is not None:
+            self.stats["exact_hits"] += 1
+            return self._hit(result, "exact"), None
+
+        vector = None
+        if self.semantic is not None:
+            try:
+                vector = await self.embed(normalize_message(message))
+            except Exception as e:
+                logger.warning(f"Embedding lookup failed, skipping semantic cache: {str(e)}")
+            if vector is not None:
+                result = self.semantic.lookup(vector, key[1])
+                if result is not None:
+                    self.stats["semantic_hits"] += 1
+                    self.exact.set(key, result)
+                    return self._hit(result, "semantic"), vector
+
+        self.stats["misses"] += 1
+        return None, vector
+
+    def set(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]],
+        result: Dict[str, Any],
+        vector: Optional[List[float]] = None
+    ) -> None:
+        """Store a classification in both tiers."""
+        key = self.key(message, context)
+        stored = copy.deepcopy(result)
+        self.exact.set(key, stored)
+        if self.semantic is not None and vector is not None:
+            self.semantic.add(vector, key[1], stored)
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from either tier."""
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    @staticmethod
+    def _hit(result: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        hit = copy.deepcopy(result)
+        hit["cached"] = tier
+        return hit
@@ -0,0 +1,369 @@
+"""
+Conversation Store
+Per-user conversation state held in an in-memory LRU with write-behind to a
+persistent backend, compacted to a token budget before it reaches the agents
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from .tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Longest user message kept in a summary line
+SUMMARY_LINE_TOKENS = 40
+
+Summarizer = Callable[[str, List[Dict[str, Any]]], str]
+
+
+@dataclass
+class ConversationState:
+    """Recent turns of one user's conversation and a summary of older ones."""
+
+    user_id: str
+    turns: List[Dict[str, Any]] = field(default_factory=list)
+    summary: str = ""
+    updated_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def extractive_summary(summary: str, turns: List[Dict[str, Any]]) -> str:
+    """
+    Fold turns into a rolling summary without a model call.
+
+    Keeps one line per user turn with its intent and the start of the
+    message; assistant answers are left out since they follow from those.
+    """
+    lines = [summary] if summary else []
+    for turn in turns:
+        if turn.get("role") != "user":
+            continue
+        text = truncate_tokens(" ".join(turn.get("content", "").split()), SUMMARY_LINE_TOKENS)
+        intent = turn.get("intent")
+        lines.append(f"- {intent}: {text}" if intent else f"- {text}")
+    return "\n".join(lines)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _newest_lines(text: str, max_tokens: int) -> str:
+    """The trailing lines of text that fit in max_tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    kept: List[str] = []
+    for line in reversed(text.split("\n")):
+        cost = count_tokens(line) + 1
+        if cost > max_tokens:
+            break
+        kept.append(line)
+        max_tokens -= cost
+    return "\n".join(reversed(kept))
+
+
+class ConversationBackend(abc.ABC):
+    """Persistent storage for conversation states."""
+
+    @abc.abstractmethod
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def save(self, states: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteConversationBackend(ConversationBackend):
+    """Conversation states in a SQLite file, one JSON row per user."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations"
+            " (user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        def locked():
+            with self._lock:
+                return func(self._conn)
+        return await asyncio.to_thread(locked)
+
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(lambda conn: conn.execute(
+            "SELECT state FROM conversations WHERE user_id = ?", (user_id,)
+        ).fetchone())
+        return json.loads(row[0]) if row is not None else None
+
+    async def save(self, states: List[Dict[str, Any]]) -> None:
+        def save_all(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO conversations (user_id, state, updated_at) VALUES (?, ?, ?)",
+                    [(s["user_id"], _dumps(s), s["updated_at"]) for s in states]
+                )
+        await self._run(save_all)
+
+    async def close(self) -> None:
+        await self._run(lambda conn: conn.close())
+
+
+class CosmosConversationBackend(ConversationBackend):
+    """
+    Conversation states in the Cosmos DB "conversations" container.
+
+    Items are partitioned by conversation_id, which is the user ID.
+    """
+
+    def __init__(self, container_name: Optional[str] = None):
+        from azure.cosmos.aio import CosmosClient
+
+        self._client = CosmosClient(os.getenv("COSMOS_ENDPOINT"), os.getenv("COSMOS_KEY"))
+        database = self._client.get_database_client(os.getenv("COSMOS_DATABASE", "maestroai-db"))
+        self._container = database.get_container_client(
+            container_name or os.getenv("CONVERSATION_COSMOS_CONTAINER", "conversations")
+        )
+
+    async def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        from azure.cosmos.exceptions import CosmosResourceNotFoundError
+
+        try:
+            item = await self._container.read_item(user_id, partition_key=user_id)
+        except CosmosResourceNotFoundError:
+            return None
+        return item["state"]
+
+    async def save(self, states: List[Dict[str, Any]]) -> None:
+        await asyncio.gather(*(
+            self._container.upsert_item({
+                "id": s["user_id"],
+                "conversation_id": s["user_id"],
+                "state": s
+            })
+            for s in states
+        ))
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def open_backend(url: Optional[str] = None) -> Optional[ConversationBackend]:
+    """
+    Open a persistent backend from a URL.
+
+    Args:
+        url: "memory" (no persistence), "sqlite:///path/to/conversations.db"
+            or "cosmos" (defaults to CONVERSATION_STORE_URL or "memory")
+    """
+    url = url or os.getenv("CONVERSATION_STORE_URL", "memory")
+    if url == "memory":
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteConversationBackend(url[len("sqlite:///"):])
+    if url == "cosmos":
+        return CosmosConversationBackend()
+    raise ValueError(f"Unsupported conversation store URL: {url}")
+
+
+class ConversationStore:
+    """
+    Conversation states keyed by user ID.
+
+    Reads are served from a bounded LRU and fall through to the backend.
+    Writes only mark a state dirty; a background task saves dirty states
+    every flush_interval seconds for as long as any are pending, including
+    writes made during a save and states whose save failed, so a turn
+    never waits on storage. States evicted before they are saved stay
+    pending until the next flush.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[ConversationBackend] = None,
+        maxsize: int = 10000,
+        max_turns: int = 6,
+        token_budget: int = 600,
+        flush_interval: float = 2.0,
+        summarize: Summarizer = extractive_summary
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            backend: Persistent backend (None keeps conversations in memory only)
+            maxsize: Conversations kept in memory before LRU eviction
+            max_turns: Turns kept verbatim; older ones are folded into the summary
+            token_budget: Maximum tokens of the context handed to agents
+            flush_interval: Seconds between write-behind flushes
+            summarize: Folds (summary, old turns) into a new summary
+        """
+        self.backend = backend
+        self.maxsize = maxsize
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.flush_interval = flush_interval
+        self.summarize = summarize
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._dirty: Dict[str, ConversationState] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: str) -> ConversationState:
+        """The user's conversation, loaded from the backend on a miss."""
+        state = self._states.get(user_id)
+        if state is not None:
+            self._states.move_to_end(user_id)
+            return state
+        state = self._dirty.get(user_id)
+        if state is None and self.backend is not None:
+            try:
+                stored = await self.backend.load(user_id)
+            except Exception as e:
+                logger.warning(f"Could not load conversation for {user_id}: {str(e)}")
+                stored = None
+            if stored is not None:
+                state = ConversationState(**stored)
+            # Another request may have created it while we were loading
+            if user_id in self._states:
+                return self._states[user_id]
+        if state is None:
+            state = ConversationState(user_id)
+        self._remember(state)
+        return state
+
+    def _remember(self, state: ConversationState) -> None:
+        self._states[state.user_id] = state
+        self._states.move_to_end(state.user_id)
+        while len(self._states) > self.maxsize:
+            self._states.popitem(last=False)
+
+    async def append(self, user_id: str, role: str, content: str, **metadata: Any) -> None:
+        """Add a turn, folding the oldest turns into the summary when over max_turns."""
+        state = await self.get(user_id)
+        state.turns.append({"role": role, "content": content, **metadata})
+        if len(state.turns) > self.max_turns:
+            overflow = len(state.turns) - self.max_turns
+            state.summary = _newest_lines(
+                self.summarize(state.summary, state.turns[:overflow]), self.token_budget
+            )
+            del state.turns[:overflow]
+        state.updated_at = time.time()
+        self._mark_dirty(state)
+
+    def _mark_dirty(self, state: ConversationState) -> None:
+        self._dirty[state.user_id] = state
+        if self.backend is None:
+            self._dirty.clear()
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Save every dirty conversation now."""
+        if not self._dirty or self.backend is None:
+            return
+        dirty, self._dirty = self._dirty, {}
+        saved = False
+        try:
+            await self.backend.save([state.to_dict() for state in dirty.values()])
+            saved = True
+        except Exception as e:
+            logger.error(f"Could not save {len(dirty)} conversations: {str(e)}")
+        finally:
+            if not saved:
+                # Keep them for the next flush unless they were written again since
+                for user_id, state in dirty.items():
+                    self._dirty.setdefault(user_id, state)
+
+    async def close(self) -> None:
+        """Flush pending writes and close the backend."""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+        await self.flush()
+        if self.backend is not None:
+            await self.backend.close()
+
+    def compact(
+        self,
+        state: ConversationState,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Context to send with the next request, within token_budget.
+
+        The caller's own context keys come first, then the most recent
+        turns that still fit, newest first, then as much of the summary
+        as is left.
+        """
+        budget = self.token_budget
+        compacted: Dict[str, Any] = {}
+        for key, value in (context or {}).items():
+            cost = count_tokens(_dumps({key: value}))
+            if cost <= budget:
+                compacted[key] = value
+                budget -= cost
+
+        recent: List[Dict[str, Any]] = []
+        for turn in reversed(state.turns):
+            cost = count_tokens(_dumps(turn))
+            if cost > budget:
+                break
+            recent.append(turn)
+            budget -= cost
+        if recent:
+            compacted["recent_turns"] = recent[::-1]
+
+        summary = _newest_lines(state.summary, budget)
+        if summary:
+            compacted["summary"] = summary
+        return compacted or None
+
+
+_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the store configured by the CONVERSATION_* variables, shared per process."""
+    global _store
+    if _store is None:
+        _store = ConversationStore(
+            open_backend(),
+            maxsize=int(os.getenv("CONVERSATION_STORE_MAXSIZE", "10000")),
+            max_turns=int(os.getenv("CONVERSATION_MAX_TURNS", "6")),
+            token_budget=int(os.getenv("CONVERSATION_TOKEN_BUDGET", "600")),
+            flush_interval=float(os.getenv("CONVERSATION_FLUSH_SECONDS", "2"))
+        )
+    return _store
+
+
+async def close_conversation_store() -> None:
+    """Flush and close the shared store if one was opened."""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
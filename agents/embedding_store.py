@@ -0,0 +1,241 @@
+"""
+Embedding Store
+Memory-mapped embedding matrix with a sidecar ID table and an optional
+IVF partitioning, for top-k similarity over historical tickets
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "ids.npy"
+CENTROIDS_FILE = "centroids.npy"
+OFFSETS_FILE = "offsets.npy"
+
+
+class EmbeddingStore:
+    """
+    Read-only top-k search over a memory-mapped embedding matrix.
+
+    Vectors and IDs are opened with mmap, so every worker process on a
+    host shares the same page-cache pages instead of loading its own copy.
+    Rows are unit-normalized at build time, so a dot product is a cosine
+    similarity. When the store was built with IVF partitions, rows are
+    stored grouped by partition and a query only scans the nprobe closest
+    partitions; otherwise the whole matrix is scanned in blocks.
+    """
+
+    def __init__(self, path: str, block_size: int = 4096):
+        """
+        Open a store directory written by build().
+
+        Args:
+            path: Store directory
+            block_size: Rows per block during scans
+        """
+        self.path = Path(path)
+        with open(self.path / META_FILE) as f:
+            self.meta = json.load(f)
+        self.embedder_name = self.meta["embedder"]
+        self.block_size = block_size
+        self.vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        self.ids = np.load(self.path / IDS_FILE, mmap_mode="r")
+        self.centroids = None
+        self.offsets = None
+        if (self.path / CENTROIDS_FILE).exists():
+            self.centroids = np.load(self.path / CENTROIDS_FILE)
+            self.offsets = np.load(self.path / OFFSETS_FILE)
+        logger.info(
+            f"Opened embedding store {self.path} with {len(self)} vectors"
+            f" ({self.vectors.dtype}, {'IVF' if self.centroids is not None else 'flat'})"
+        )
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def _scan(self, query: np.ndarray, start: int, stop: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (rows, scores) within [start, stop), scanned block by block."""
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for block_start in range(start, stop, self.block_size):
+            block_stop = min(block_start + self.block_size, stop)
+            scores = np.asarray(self.vectors[block_start:block_stop], dtype=np.float32) @ query
+            if scores.shape[0] > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(scores.shape[0])
+            best_rows = np.concatenate([best_rows, top + block_start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if best_rows.shape[0] > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+        return best_rows, best_scores
+
+    def search(self, vector: Sequence[float], k: int = 5, nprobe: int = 8) -> List[Tuple[str, float]]:
+        """
+        Find the k most similar stored vectors.
+
+        Args:
+            vector: Query embedding from the store's embedder
+            k: Number of neighbours
+            nprobe: IVF partitions to scan (ignored for flat stores)
+
+        Returns:
+            List of (id, cosine similarity), most similar first
+        """
+        query = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+
+        if self.centroids is None:
+            rows, scores = self._scan(query, 0, len(self), k)
+        else:
+            probes = np.argsort(-(self.centroids @ query))[:nprobe]
+            parts = [
+                self._scan(query, int(self.offsets[p]), int(self.offsets[p + 1]), k)
+                for p in probes
+            ]
+            rows = np.concatenate([r for r, _ in parts])
+            scores = np.concatenate([s for _, s in parts])
+
+        order = np.argsort(-scores)[:k]
+        return [(str(self.ids[rows[i]]), float(scores[i])) for i in order]
+
+    @staticmethod
+    def build(
+        path: str,
+        ids: Sequence[str],
+        batches: Iterable[np.ndarray],
+        embedder_name: str,
+        dtype: str = "float16",
+        nlist: int = 0,
+        sample_size: int = 50000,
+        seed: int = 13
+    ) -> None:
+        """
+        Write a store directory.
+
+        Vectors are streamed into a memory-mapped file batch by batch, so
+        the full matrix never has to fit in memory. Every file is written
+        under a temporary name and then renamed into place, so processes
+        that already have the old files mapped keep reading them intact.
+
+        Args:
+            path: Destination directory
+            ids: ID of every row, in the order the batches produce them
+            batches: Iterable of (rows, dim) embedding arrays
+            embedder_name: Name of the embedder used for the vectors
+            dtype: On-disk dtype, 'float16' or 'float32'
+            nlist: Number of IVF partitions (0 for a flat store)
+            sample_size: Rows sampled to train IVF centroids
+            seed: Random seed for centroid training
+        """
+        target = Path(path)
+        target.mkdir(parents=True, exist_ok=True)
+        count = len(ids)
+        raw_path = target / (VECTORS_FILE + ".tmp")
+        raw = None
+        written = 0
+        for batch in batches:
+            batch = np.asarray(batch, dtype=np.float32)
+            norms = np.linalg.norm(batch, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            if raw is None:
+                raw = np.lib.format.open_memmap(
+                    raw_path, mode="w+", dtype=dtype, shape=(count, batch.shape[1])
+                )
+            raw[written:written + len(batch)] = batch / norms
+            written += len(batch)
+        if raw is None or written != count:
+            raise ValueError(f"Got {written} vectors for {count} ids")
+        raw.flush()
+
+        id_array = np.array([str(i) for i in ids])
+        staged = {}
+        if nlist:
+            centroids = _train_centroids(raw, nlist, sample_size, seed)
+            nlist = centroids.shape[0]
+            assignments = np.concatenate([
+                np.argmax(np.asarray(raw[s:s + 65536], dtype=np.float32) @ centroids.T, axis=1)
+                for s in range(0, count, 65536)
+            ])
+            order = np.argsort(assignments, kind="stable")
+            offsets = np.searchsorted(assignments[order], np.arange(nlist + 1))
+            final_path = target / (VECTORS_FILE + ".sorted.tmp")
+            final = np.lib.format.open_memmap(final_path, mode="w+", dtype=dtype, shape=raw.shape)
+            for s in range(0, count, 65536):
+                final[s:s + 65536] = raw[order[s:s + 65536]]
+            final.flush()
+            del final
+            del raw
+            raw_path.unlink()
+            staged[VECTORS_FILE] = final_path
+            id_array = id_array[order]
+            staged[CENTROIDS_FILE] = _stage_array(target / CENTROIDS_FILE, centroids)
+            staged[OFFSETS_FILE] = _stage_array(target / OFFSETS_FILE, offsets.astype(np.int64))
+        else:
+            del raw
+            staged[VECTORS_FILE] = raw_path
+        staged[IDS_FILE] = _stage_array(target / IDS_FILE, id_array)
+        meta_path = target / (META_FILE + ".tmp")
+        with open(meta_path, "w") as f:
+            json.dump(
+                {"embedder": embedder_name, "count": count, "dtype": dtype, "nlist": nlist},
+                f,
+                indent=2
+            )
+        staged[META_FILE] = meta_path
+
+        if not nlist:
+            for stale in (CENTROIDS_FILE, OFFSETS_FILE):
+                (target / stale).unlink(missing_ok=True)
+        for name, staged_path in staged.items():
+            os.replace(staged_path, target / name)
+
+
+def _stage_array(path: Path, array: np.ndarray) -> Path:
+    """Write an array next to path under a temporary name, for a later rename."""
+    staged = path.with_name(path.name + ".tmp")
+    with open(staged, "wb") as f:
+        np.save(f, array)
+    return staged
+
+
+def _train_centroids(vectors: np.ndarray, nlist: int, sample_size: int, seed: int) -> np.ndarray:
+    """Spherical k-means on a random sample of rows."""
+    rng = np.random.default_rng(seed)
+    count = vectors.shape[0]
+    sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+    nlist = min(nlist, sample.shape[0])
+    centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(20):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+def open_store(path: Optional[str]) -> Optional[EmbeddingStore]:
+    """Open a store if its directory exists, logging instead of raising."""
+    if not path or not (Path(path) / META_FILE).exists():
+        return None
+    try:
+        return EmbeddingStore(path)
+    except Exception as e:
+        logger.error(f"Could not open embedding store {path}: {str(e)}")
+        return None
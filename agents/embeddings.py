@@ -0,0 +1,121 @@
+"""
+Embeddings
+Text embedders shared by the retrieval components
+"""
+
+import logging
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """
+    Local, dependency-free embedder.
+
+    Projects the hashed n-gram features of the local intent model into a
+    small dense space. It captures lexical overlap only, but needs no
+    network call and is a reasonable default for small corpora.
+    """
+
+    def __init__(self, dim: int = 1024):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim: Embedding dimension (number of hash buckets)
+        """
+        from .local_intent_model import HashingVectorizer
+
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._vectorizer = HashingVectorizer(dim)
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as an (n, dim) float32 matrix of unit vectors."""
+        return self.embed_sync(texts)
+
+    def embed_sync(self, texts: Sequence[str]) -> np.ndarray:
+        """Synchronous variant of embed() for scripts."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            indices, values = self._vectorizer.transform_one(text)
+            np.add.at(matrix[row], indices, values)
+        return normalize_rows(matrix)
+
+
+class AzureOpenAIEmbedder:
+    """
+    Embedder backed by an Azure OpenAI embedding deployment.
+    """
+
+    def __init__(self, deployment: Optional[str] = None, batch_size: int = 64):
+        """
+        Initialize the embedder.
+
+        Args:
+            deployment: Embedding deployment name (defaults to
+                OPENAI_EMBEDDING_DEPLOYMENT)
+            batch_size: Texts per embeddings request
+        """
+        self.deployment = deployment or os.getenv("OPENAI_EMBEDDING_DEPLOYMENT")
+        if not self.deployment:
+            raise ValueError("OPENAI_EMBEDDING_DEPLOYMENT must be set")
+        self.name = f"azure-openai-{self.deployment}"
+        self.batch_size = batch_size
+        self._client = None
+
+    @property
+    def client(self):
+        """Async Azure OpenAI client, created on first use."""
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+
+            self._client = AsyncAzureOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                api_version=os.getenv("OPENAI_API_VERSION", "2024-02-15-preview"),
+                azure_endpoint=os.getenv("OPENAI_ENDPOINT")
+            )
+        return self._client
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as an (n, dim) float32 matrix of unit vectors."""
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            response = await self.client.embeddings.create(
+                model=self.deployment,
+                input=list(texts[start:start + self.batch_size])
+            )
+            rows.extend(item.embedding for item in response.data)
+        return normalize_rows(np.asarray(rows, dtype=np.float32))
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit L2 norm (zero rows are left unchanged)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def get_embedder(name: str):
+    """
+    Build an embedder from its name as stored alongside saved vectors.
+
+    Args:
+        name: 'hashing-<dim>' or 'azure-openai-<deployment>'
+    """
+    if name.startswith("hashing-"):
+        return HashingEmbedder(int(name.split("-", 1)[1]))
+    if name.startswith("azure-openai-"):
+        return AzureOpenAIEmbedder(name[len("azure-openai-"):])
+    raise ValueError(f"Unknown embedder: {name}")
+
+
+def default_embedder():
+    """Azure OpenAI when an embedding deployment is configured, else hashing."""
+    if os.getenv("OPENAI_EMBEDDING_DEPLOYMENT"):
+        return AzureOpenAIEmbedder()
+    return HashingEmbedder()
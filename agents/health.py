@@ -0,0 +1,216 @@
+"""
+Health Checks
+Concurrent dependency probes with short timeouts, cached for a TTL so that
+frequent load-balancer polling does not turn into backend traffic
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from . import http_client
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+ERROR = "error"
+SKIPPED = "skipped"
+
+Probe = Callable[[], Awaitable[Optional[str]]]
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of the last probe of one dependency."""
+
+    status: str
+    latency_ms: float
+    checked_at: float
+    critical: bool
+    error: Optional[str] = None
+    detail: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SkipProbe(Exception):
+    """Raised by a probe whose dependency is not configured."""
+
+
+class HealthChecker:
+    """
+    Runs registered probes concurrently and caches the report.
+
+    While a report is fresh, check() returns it without probing. Callers
+    that arrive during a refresh wait for the same one, so a burst of
+    polls costs at most one probe per dependency per TTL.
+    """
+
+    def __init__(self, ttl: float = 10.0, timeout: float = 2.0):
+        """
+        Initialize the checker.
+
+        Args:
+            ttl: Seconds a report is served from cache
+            timeout: Per-probe timeout in seconds
+        """
+        self.ttl = ttl
+        self.timeout = timeout
+        self._probes: Dict[str, Any] = {}
+        self._results: Dict[str, ProbeResult] = {}
+        self._checked = float("-inf")
+        self._refresh: Optional[asyncio.Task] = None
+
+    def register(self, name: str, probe: Probe, critical: bool = True) -> "HealthChecker":
+        """
+        Add a probe.
+
+        A probe returns an optional detail string on success, raises on
+        failure, or raises SkipProbe when its dependency is not configured.
+        Only critical probes affect readiness.
+        """
+        self._probes[name] = (probe, critical)
+        return self
+
+    async def _run(self, name: str) -> ProbeResult:
+        probe, critical = self._probes[name]
+        started = time.perf_counter()
+        status, error, detail = OK, None, None
+        try:
+            detail = await asyncio.wait_for(probe(), self.timeout)
+        except SkipProbe as e:
+            status, detail = SKIPPED, str(e) or None
+        except asyncio.TimeoutError:
+            status, error = ERROR, f"timed out after {self.timeout}s"
+        except Exception as e:
+            status, error = ERROR, f"{type(e).__name__}: {str(e)}"
+        latency_ms = round((time.perf_counter() - started) * 1000, 3)
+        if status == ERROR:
+            logger.warning(f"Health probe {name} failed: {error}")
+        return ProbeResult(status, latency_ms, time.time(), critical, error, detail)
+
+    async def _probe_all(self) -> Dict[str, ProbeResult]:
+        names = list(self._probes)
+        results = await asyncio.gather(*(self._run(name) for name in names))
+        self._results = dict(zip(names, results))
+        self._checked = time.monotonic()
+        return self._results
+
+    async def check(self, force: bool = False) -> Dict[str, ProbeResult]:
+        """Probe results per dependency, refreshed when older than the TTL."""
+        if not force and time.monotonic() - self._checked < self.ttl:
+            return self._results
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._probe_all())
+        # Shielded so a disconnecting poller does not cancel the shared refresh
+        return await asyncio.shield(self._refresh)
+
+    @property
+    def age(self) -> float:
+        """Seconds since the cached report was taken."""
+        return time.monotonic() - self._checked
+
+    @staticmethod
+    def ready(results: Dict[str, ProbeResult]) -> bool:
+        """Whether every critical dependency is usable."""
+        return all(r.status != ERROR for r in results.values() if r.critical)
+
+    @staticmethod
+    def status(results: Dict[str, ProbeResult]) -> str:
+        """'healthy', 'degraded' (a non-critical probe failed) or 'unhealthy'."""
+        if not HealthChecker.ready(results):
+            return "unhealthy"
+        if any(r.status == ERROR for r in results.values()):
+            return "degraded"
+        return "healthy"
+
+
+def _configured(name: str) -> str:
+    value = os.getenv(name, "")
+    # env.example placeholders count as unset
+    if not value or "your-" in value:
+        raise SkipProbe(f"{name} is not set")
+    return value
+
+
+async def probe_openai() -> Optional[str]:
+    """List deployments' models: checks reachability and the API key."""
+    endpoint = _configured("OPENAI_ENDPOINT").rstrip("/")
+    response = await http_client.get_client("health").get(
+        f"{endpoint}/openai/models",
+        params={"api-version": os.getenv("OPENAI_API_VERSION", "2024-02-15-preview")},
+        headers={"api-key": os.getenv("OPENAI_API_KEY", "")}
+    )
+    response.raise_for_status()
+    return None
+
+
+async def probe_search() -> Optional[str]:
+    """Read the policy index statistics."""
+    endpoint = _configured("SEARCH_ENDPOINT").rstrip("/")
+    index = os.getenv("SEARCH_INDEX_POLICIES", "hr-policies-index")
+    response = await http_client.get_client("health").get(
+        f"{endpoint}/indexes/{index}/stats",
+        params={"api-version": "2023-11-01"},
+        headers={"api-key": os.getenv("SEARCH_KEY", "")}
+    )
+    response.raise_for_status()
+    return f"{response.json().get('documentCount')} documents"
+
+
+_cosmos_client = None
+
+
+async def probe_cosmos() -> Optional[str]:
+    """Read the database properties with a client kept across probes."""
+    global _cosmos_client
+    endpoint = _configured("COSMOS_ENDPOINT")
+    if _cosmos_client is None:
+        from azure.cosmos.aio import CosmosClient
+
+        _cosmos_client = CosmosClient(endpoint, os.getenv("COSMOS_KEY"))
+    database = _cosmos_client.get_database_client(os.getenv("COSMOS_DATABASE", "maestroai-db"))
+    await database.read()
+    return None
+
+
+async def probe_knowledge_index() -> Optional[str]:
+    """The in-process policy index is loaded when the local backend is used."""
+    from .orchestrator import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    if orchestrator.knowledge_backend != "local":
+        raise SkipProbe("knowledge retrieval is remote")
+    if orchestrator.knowledge_index is None:
+        if orchestrator.knowledge_retrieval_url:
+            return "index missing, using the knowledge retrieval agent"
+        raise RuntimeError("knowledge index is not loaded")
+    return f"{len(orchestrator.knowledge_index.documents)} documents"
+
+
+async def probe_job_queue() -> Optional[str]:
+    """Count jobs by status, which touches the queue's storage."""
+    from .job_queue import get_job_queue
+
+    counts = await get_job_queue().counts()
+    return f"{counts['queued']} queued, {counts['running']} running"
+
+
+def build_checker() -> HealthChecker:
+    """The API's checker, configured by HEALTH_CACHE_TTL_SECONDS and HEALTH_PROBE_TIMEOUT_SECONDS."""
+    return (
+        HealthChecker(
+            ttl=float(os.getenv("HEALTH_CACHE_TTL_SECONDS", "10")),
+            timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "2"))
+        )
+        .register("openai", probe_openai)
+        .register("knowledge_index", probe_knowledge_index)
+        .register("job_queue", probe_job_queue)
+        # Used by the knowledge scripts and conversations, not by request serving
+        .register("cosmos", probe_cosmos, critical=False)
+        .register("search", probe_search, critical=False)
+    )
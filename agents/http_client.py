@@ -0,0 +1,166 @@
+"""
+Agent HTTP Transport
+Shared, pooled keep-alive async HTTP clients for agent-to-agent calls
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AgentHttpSettings:
+    """Connection pool and timeout settings for one downstream agent."""
+
+    timeout: float = 10.0
+    connect_timeout: float = 2.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+
+
+# Defaults per agent; each value can be overridden with environment
+# variables such as INTENT_CLASSIFIER_TIMEOUT_SECONDS or
+# RUNBOOK_EXECUTOR_MAX_CONNECTIONS.
+AGENT_DEFAULTS: Dict[str, AgentHttpSettings] = {
+    "intent_classifier": AgentHttpSettings(timeout=15.0),
+    "knowledge_retrieval": AgentHttpSettings(timeout=5.0),
+    "runbook_executor": AgentHttpSettings(timeout=30.0, max_connections=50),
+    "escalation": AgentHttpSettings(timeout=5.0, max_connections=50),
+}
+
+_clients: Dict[str, "httpx.AsyncClient"] = {}
+_client_loops: Dict[str, asyncio.AbstractEventLoop] = {}
+_closing: Set["asyncio.Future[None]"] = set()
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is on by default when the optional h2 package is installed."""
+    if os.getenv("AGENT_HTTP2", "true").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_settings(agent: str) -> AgentHttpSettings:
+    """Resolve the HTTP settings for an agent, applying env overrides."""
+    base = AGENT_DEFAULTS.get(agent, AgentHttpSettings())
+    prefix = agent.upper()
+    return AgentHttpSettings(
+        timeout=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", base.timeout)),
+        connect_timeout=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT_SECONDS", base.connect_timeout)),
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", base.max_connections)),
+        max_keepalive_connections=int(
+            os.getenv(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", base.max_keepalive_connections)
+        ),
+        keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY_SECONDS", base.keepalive_expiry)),
+    )
+
+
+def _build_client(agent: str) -> "httpx.AsyncClient":
+    import httpx  # deferred to keep cold starts fast
+
+    settings = get_settings(agent)
+    return httpx.AsyncClient(
+        http2=_http2_enabled(),
+        timeout=httpx.Timeout(settings.timeout, connect=settings.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+            keepalive_expiry=settings.keepalive_expiry,
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def get_client(agent: str) -> "httpx.AsyncClient":
+    """
+    Return the process-wide client for an agent, creating it on first use.
+
+    Pooled connections are bound to the event loop that opened them, so a
+    client is rebuilt if it is requested from a different loop, and the
+    client it replaces is closed.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(agent)
+    if client is None or client.is_closed or _client_loops.get(agent) is not loop:
+        if client is not None and not client.is_closed:
+            _retire(agent, client, _client_loops.get(agent))
+        client = _build_client(agent)
+        _clients[agent] = client
+        _client_loops[agent] = loop
+        logger.debug(f"Created HTTP client for agent {agent}")
+    return client
+
+
+def _retire(agent: str, client: "httpx.AsyncClient", loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a replaced client, on its own loop while that loop still runs."""
+    if loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close_quietly(agent, client), loop)
+        return
+    task = asyncio.ensure_future(_close_quietly(agent, client))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+async def _close_quietly(agent: str, client: "httpx.AsyncClient") -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        # Connections opened on a loop that has since closed cannot be shut
+        # down cleanly; the client is still marked closed and dropped
+        logger.debug(f"Error closing replaced HTTP client for agent {agent}: {str(e)}")
+
+
+async def post_json(
+    agent: str,
+    url: str,
+    payload: Dict[str, Any],
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    POST a JSON payload to an agent and return its decoded JSON response.
+
+    Args:
+        agent: Agent name used to select the pooled client
+        url: Agent endpoint URL
+        payload: JSON-serializable request body
+        timeout: Optional total per-call timeout overriding the agent
+            default; the agent's connect timeout still applies when shorter
+
+    Returns:
+        Decoded JSON response body
+
+    Raises:
+        httpx.HTTPError: On transport failures or non-2xx responses
+    """
+    client = get_client(agent)
+    kwargs: Dict[str, Any] = {"json": payload}
+    if timeout is not None:
+        import httpx
+
+        connect_timeout = get_settings(agent).connect_timeout
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=min(connect_timeout, timeout))
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def aclose_all() -> None:
+    """Close every pooled client, e.g. on application shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    _client_loops.clear()
+    for client in clients:
+        if not client.is_closed:
+            await client.aclose()
@@ -3,38 +3,150 @@ Intent Classifier Agent
 Classifies user intent and extracts entities from messages
 """
 
+import asyncio
 import logging
 import os
-from typing import Dict, Any, Optional
-from openai import AzureOpenAI
+from typing import Dict, Any, List, Optional, Tuple
 from azure.functions import HttpRequest, HttpResponse
 import json
 
+from . import telemetry
+from .batching import MicroBatcher
+from .cache import IntentCache
+from .prompts import Prompt, PromptTemplate, TokenBudget, format_context
+from .tokens import count_tokens
+
 logger = logging.getLogger(__name__)
 
+INTENT_CATEGORIES = [
+    "LEAVE_REQUEST",
+    "POLICY_QUESTION",
+    "EMPLOYEE_DATA",
+    "BENEFITS_QUERY",
+    "ESCALATION",
+    "UNKNOWN"
+]
+
+CLASSIFY_PROMPT = PromptTemplate("classify", f"""You are an HR Service Desk intent classifier.
+Your job is to classify user requests into one of these categories:
+{', '.join(INTENT_CATEGORIES)}
+
+Return a JSON object with:
+- intent: One of the categories above
+- confidence: A score between 0 and 1
+- entities: Extracted entities (dates, employee IDs, policy names, etc.)
+- requires_clarification: Boolean indicating if more info is needed
+
+Be precise and confident in your classification.""")
+
+CLASSIFY_BATCH_PROMPT = PromptTemplate("classify_batch", f"""You are an HR Service Desk intent classifier.
+Your job is to classify each of several numbered user requests into one of these categories:
+{', '.join(INTENT_CATEGORIES)}
+
+Return a JSON object with a "results" array containing one object per request, each with:
+- index: The number of the request
+- intent: One of the categories above
+- confidence: A score between 0 and 1
+- entities: Extracted entities (dates, employee IDs, policy names, etc.)
+- requires_clarification: Boolean indicating if more info is needed
+
+Classify every request independently. Be precise and confident in your classification.""")
+
 
 class IntentClassifierAgent:
     """
     Classifies user intent using Azure OpenAI GPT-4.
     """
     
-    INTENT_CATEGORIES = [
-        "LEAVE_REQUEST",
-        "POLICY_QUESTION",
-        "EMPLOYEE_DATA",
-        "BENEFITS_QUERY",
-        "ESCALATION",
-        "UNKNOWN"
-    ]
+    INTENT_CATEGORIES = INTENT_CATEGORIES
     
-    def __init__(self):
-        """Initialize the intent classifier with Azure OpenAI."""
-        self.client = AzureOpenAI(
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[IntentCache] = None
+    ):
+        """
+        Initialize the intent classifier with Azure OpenAI.
+        
+        Args:
+            max_concurrency: Maximum classifications in flight at once
+                (defaults to INTENT_CLASSIFIER_MAX_CONCURRENCY or 32)
+            cache: Optional classification cache; by default one is built
+                from the INTENT_CACHE_* environment variables
+        """
+        # The OpenAI SDK is the bulk of this module's import time, so it is
+        # only loaded once an agent is actually constructed.
+        from openai import AsyncAzureOpenAI
+        
+        self.client = AsyncAzureOpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
             api_version=os.getenv("OPENAI_API_VERSION", "2024-02-15-preview"),
             azure_endpoint=os.getenv("OPENAI_ENDPOINT")
         )
         self.deployment_name = os.getenv("OPENAI_DEPLOYMENT_NAME", "gpt-4")
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("INTENT_CLASSIFIER_MAX_CONCURRENCY", "32")
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Per message: the JSON result is small, and an over-long context
+        # is cut rather than sent whole
+        self.budget = TokenBudget(
+            prompt_tokens=int(os.getenv("INTENT_PROMPT_MAX_TOKENS", "1000")),
+            max_tokens=int(os.getenv("INTENT_MAX_TOKENS", "150"))
+        )
+        self.embedding_deployment = os.getenv("OPENAI_EMBEDDING_DEPLOYMENT")
+        self.cache = cache if cache is not None else self._build_cache()
+        self.local_threshold = float(os.getenv("LOCAL_INTENT_THRESHOLD", "0.85"))
+        self.local_model = self._load_local_model()
+        self.batcher = None
+        if os.getenv("INTENT_BATCH_ENABLED", "false").lower() in ("1", "true", "yes"):
+            self.batcher = MicroBatcher(
+                self._classify_batch,
+                max_batch_size=int(os.getenv("INTENT_BATCH_MAX_SIZE", "16")),
+                max_wait=float(os.getenv("INTENT_BATCH_MAX_WAIT_MS", "10")) / 1000
+            )
+    
+    def _load_local_model(self):
+        """Load the local intent model artifact if one has been trained."""
+        path = os.getenv("LOCAL_INTENT_MODEL_PATH", "models/intent_model.npz")
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            from .local_intent_model import LocalIntentModel
+            
+            model = LocalIntentModel.load(path)
+            logger.info(f"Loaded local intent model from {path}")
+            return model
+        except Exception as e:
+            logger.warning(f"Could not load local intent model from {path}: {str(e)}")
+            return None
+    
+    def _build_cache(self) -> Optional[IntentCache]:
+        """Create the classification cache configured by the environment."""
+        if os.getenv("INTENT_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            return None
+        threshold = os.getenv("INTENT_CACHE_SEMANTIC_THRESHOLD")
+        return IntentCache(
+            maxsize=int(os.getenv("INTENT_CACHE_MAXSIZE", "10000")),
+            ttl=float(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600")),
+            semantic_threshold=float(threshold) if threshold else None,
+            embed=self._embed if self.embedding_deployment else None
+        )
+    
+    async def _embed(self, text: str):
+        """Embed a message with the configured Azure OpenAI deployment."""
+        response = await self.client.embeddings.create(
+            model=self.embedding_deployment,
+            input=text
+        )
+        return response.data[0].embedding
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limiter, created lazily inside the running event loop."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
     
     async def classify(
         self,
@@ -51,34 +163,40 @@ class IntentClassifierAgent:
         Returns:
             Dictionary with intent, confidence, and entities
         """
-        system_prompt = f"""You are an HR Service Desk intent classifier.
-Your job is to classify user requests into one of these categories:
-{', '.join(self.INTENT_CATEGORIES)}
-
-Return a JSON object with:
-- intent: One of the categories above
-- confidence: A score between 0 and 1
-- entities: Extracted entities (dates, employee IDs, policy names, etc.)
-- requires_clarification: Boolean indicating if more info is needed
-
-Be precise and confident in your classification."""
-
-        user_prompt = f"User message: {message}"
-        if context:
-            user_prompt += f"\nContext: {json.dumps(context)}"
+        with telemetry.span("intent_classifier"):
+            return await self._classify(message, context)
+    
+    async def _classify(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Cache, then local model, then Azure OpenAI."""
+        vector = None
+        if self.cache is not None:
+            cached, vector = await self.cache.get(message, context)
+            telemetry.annotate(cache=cached["cached"] if cached is not None else "miss")
+            if cached is not None:
+                return cached
+        
+        if self.local_model is not None:
+            intent, confidence = self.local_model.predict(message)
+            if confidence >= self.local_threshold:
+                telemetry.annotate(source="local_model")
+                logger.info(f"Intent classified locally: {intent} (confidence: {confidence:.2f})")
+                return {
+                    "intent": intent,
+                    "confidence": confidence,
+                    "entities": {},
+                    "requires_clarification": False,
+                    "source": "local_model"
+                }
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
+            if self.batcher is not None:
+                result = await self.batcher.submit((message, context))
+            else:
+                result = await self._classify_one(message, context)
             
             # Validate result
             if result.get("intent") not in self.INTENT_CATEGORIES:
@@ -86,6 +204,9 @@ Be precise and confident in your classification."""
             
             logger.info(f"Intent classified: {result.get('intent')} (confidence: {result.get('confidence')})")
             
+            if self.cache is not None:
+                self.cache.set(message, context, result, vector)
+            
             return result
             
         except Exception as e:
@@ -98,6 +219,95 @@ Be precise and confident in your classification."""
                 "error": str(e)
             }
 
+    async def _classify_one(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Classify a single message with one chat completion."""
+        prompt = CLASSIFY_PROMPT.build(self._user_prompt(message, context), self.budget)
+        response = await self._chat(prompt)
+        return json.loads(response.choices[0].message.content)
+    
+    def _user_prompt(self, message: str, context: Optional[Dict[str, Any]], prefix: str = "") -> str:
+        """Message and context lines, with the context cut so the message always fits."""
+        user_prompt = f"{prefix}User message: {message}"
+        if context:
+            room = self.budget.prompt_tokens - CLASSIFY_PROMPT.system_tokens - count_tokens(user_prompt) - 16
+            user_prompt += f"\n{prefix}Context: {format_context(context, max(room, 0))}"
+        return user_prompt
+    
+    async def _chat(self, prompt: Prompt):
+        """One JSON-mode chat completion, traced with its token usage."""
+        async with self.semaphore:
+            with telemetry.span("openai_chat") as span:
+                span.set("estimated_prompt_tokens", prompt.prompt_tokens)
+                response = await self.client.chat.completions.create(
+                    model=self.deployment_name,
+                    messages=prompt.messages,
+                    temperature=0.3,
+                    max_tokens=prompt.max_tokens,
+                    response_format={"type": "json_object"}
+                )
+                if response.usage is not None:
+                    span.set("prompt_tokens", response.usage.prompt_tokens)
+                    span.set("completion_tokens", response.usage.completion_tokens)
+        return response
+    
+    async def _classify_batch(self, items: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Any]:
+        """
+        Classify several messages with a single chat completion.
+        
+        Entries the model leaves out or returns malformed are classified
+        individually, so a bad batch response never fails its callers.
+        """
+        if len(items) == 1:
+            return [await self._classify_one(*items[0])]
+        
+        lines = [
+            self._user_prompt(message, context, prefix=f"[{index}] ")
+            for index, (message, context) in enumerate(items)
+        ]
+        budget = TokenBudget(
+            prompt_tokens=self.budget.prompt_tokens * len(items),
+            max_tokens=self.budget.max_tokens * len(items)
+        )
+        
+        results: List[Any] = [None] * len(items)
+        try:
+            response = await self._chat(CLASSIFY_BATCH_PROMPT.build("\n\n".join(lines), budget))
+            entries = json.loads(response.choices[0].message.content).get("results", [])
+            for entry in entries:
+                index = entry.get("index") if isinstance(entry, dict) else None
+                if isinstance(index, int) and 0 <= index < len(items) and "intent" in entry:
+                    entry = dict(entry)
+                    entry.pop("index")
+                    results[index] = entry
+        except Exception as e:
+            logger.warning(f"Batch classification of {len(items)} messages failed: {str(e)}")
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            logger.warning(f"Falling back to single classification for {len(missing)}/{len(items)} messages")
+            retried = await asyncio.gather(
+                *(self._classify_one(*items[i]) for i in missing),
+                return_exceptions=True
+            )
+            for i, result in zip(missing, retried):
+                results[i] = result
+        return results
+
+
+_classifier: Optional[IntentClassifierAgent] = None
+
+
+def get_classifier() -> IntentClassifierAgent:
+    """Return the classifier cached for the lifetime of a warm instance."""
+    global _classifier
+    if _classifier is None:
+        _classifier = IntentClassifierAgent()
+    return _classifier
+
 
 # Azure Function entry point
 async def main(req: HttpRequest) -> HttpResponse:
@@ -109,8 +319,7 @@ async def main(req: HttpRequest) -> HttpResponse:
         message = body.get("message")
         context = body.get("context")
         
-        classifier = IntentClassifierAgent()
-        result = await classifier.classify(message, context)
+        result = await get_classifier().classify(message, context)
         
         return HttpResponse(
             json.dumps(result),
@@ -0,0 +1,560 @@
+"""
+Job Queue
+Prioritized ticket jobs with visibility timeouts and retries, an in-memory
+and a SQLite backend, and an asyncio worker pool
+"""
+
+import abc
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITIES = {
+    "interactive": 0,
+    "normal": 5,
+    "bulk": 10
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class Job:
+    """One unit of queued work and its outcome."""
+
+    id: str
+    payload: Dict[str, Any]
+    priority: int = PRIORITIES["normal"]
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    # Queued: not claimable before this time (retry backoff).
+    # Running: lease expiry; past it the job is handed to another worker.
+    visible_at: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class JobQueue(abc.ABC):
+    """
+    Queue backend interface.
+
+    A claimed job stays invisible to other workers until its visibility
+    timeout passes. A worker that dies mid-job therefore only delays the
+    job, and a live worker renews the lease with extend().
+
+    The job's attempts count after a claim is that claim's lease token:
+    extend(), complete() and fail() name the attempt they belong to and
+    are ignored once the job has been claimed again, so a worker whose
+    lease expired cannot overwrite the outcome of the one that took over.
+    """
+
+    @abc.abstractmethod
+    async def enqueue(
+        self,
+        payload: Dict[str, Any],
+        priority: int = PRIORITIES["normal"],
+        max_attempts: int = 3
+    ) -> Job:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def claim(self, visibility_timeout: float) -> Optional[Job]:
+        """Lease the most urgent visible job, or return None if there is none."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def extend(self, job_id: str, attempt: int, visibility_timeout: float) -> bool:
+        """Push a running job's lease expiry out again; False if the lease was lost."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def complete(self, job_id: str, attempt: int, result: Any) -> bool:
+        """
+        Record a job's result; False if a newer attempt has started.
+
+        A result is accepted even after the lease expired, as long as no
+        other worker has claimed the job since.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def fail(self, job_id: str, attempt: int, error: str, retry_delay: float = 0.0) -> Optional[Job]:
+        """
+        Requeue after retry_delay, or mark failed once attempts are used up.
+
+        Returns the updated job, or None if the attempt no longer holds
+        the lease.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        raise NotImplementedError
+
+    async def wait(self, timeout: float) -> None:
+        """Sleep until new work may be available."""
+        await asyncio.sleep(timeout)
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryJobQueue(JobQueue):
+    """
+    Process-local queue for development and single-instance deployments.
+
+    Finished jobs are kept for GET lookups up to max_finished, oldest first
+    out.
+    """
+
+    def __init__(self, max_finished: int = 10000):
+        self._jobs: Dict[str, Job] = {}
+        self._ready: List[Any] = []  # (priority, seq, id)
+        self._delayed: List[Any] = []  # (visible_at, seq, id)
+        self._leases: List[Any] = []  # (visible_at, seq, id)
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._seq = itertools.count()
+        self._event: Optional[asyncio.Event] = None
+        self.max_finished = max_finished
+
+    def _notify(self) -> None:
+        if self._event is not None:
+            self._event.set()
+
+    def _make_ready(self, job: Job) -> None:
+        heapq.heappush(self._ready, (job.priority, next(self._seq), job.id))
+
+    def _finish(self, job: Job) -> None:
+        self._finished[job.id] = None
+        while len(self._finished) > self.max_finished:
+            evicted, _ = self._finished.popitem(last=False)
+            self._jobs.pop(evicted, None)
+
+    async def enqueue(
+        self,
+        payload: Dict[str, Any],
+        priority: int = PRIORITIES["normal"],
+        max_attempts: int = 3
+    ) -> Job:
+        now = time.time()
+        job = Job(uuid.uuid4().hex, payload, priority, max_attempts=max_attempts,
+                  created_at=now, updated_at=now, visible_at=now)
+        self._jobs[job.id] = job
+        self._make_ready(job)
+        self._notify()
+        return job
+
+    def _reap(self, now: float) -> None:
+        """Release due retries and expired leases."""
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job_id = heapq.heappop(self._delayed)
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == QUEUED:
+                self._make_ready(job)
+        while self._leases and self._leases[0][0] <= now:
+            visible_at, _, job_id = heapq.heappop(self._leases)
+            job = self._jobs.get(job_id)
+            # Skip stale entries left behind by extend() or completion
+            if job is None or job.status != RUNNING or job.visible_at != visible_at:
+                continue
+            job.updated_at = now
+            if job.attempts >= job.max_attempts:
+                job.status, job.error = FAILED, "visibility timeout exceeded"
+                self._finish(job)
+            else:
+                job.status = QUEUED
+                self._make_ready(job)
+
+    async def claim(self, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        self._reap(now)
+        while self._ready:
+            _, _, job_id = heapq.heappop(self._ready)
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.attempts += 1
+            job.updated_at = now
+            job.visible_at = now + visibility_timeout
+            heapq.heappush(self._leases, (job.visible_at, next(self._seq), job.id))
+            return Job(**job.to_dict())
+        return None
+
+    def _leased(self, job_id: str, attempt: int) -> Optional[Job]:
+        """The job if attempt still holds its lease."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status != RUNNING or job.attempts != attempt:
+            return None
+        return job
+
+    async def extend(self, job_id: str, attempt: int, visibility_timeout: float) -> bool:
+        job = self._leased(job_id, attempt)
+        if job is None:
+            return False
+        job.visible_at = time.time() + visibility_timeout
+        heapq.heappush(self._leases, (job.visible_at, next(self._seq), job.id))
+        return True
+
+    async def complete(self, job_id: str, attempt: int, result: Any) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None or job.attempts != attempt or job.status == SUCCEEDED:
+            return False
+        job.status, job.result, job.error = SUCCEEDED, result, None
+        job.updated_at = time.time()
+        self._finish(job)
+        return True
+
+    async def fail(self, job_id: str, attempt: int, error: str, retry_delay: float = 0.0) -> Optional[Job]:
+        job = self._leased(job_id, attempt)
+        if job is None:
+            return None
+        now = time.time()
+        job.error, job.updated_at = error, now
+        if job.attempts >= job.max_attempts:
+            job.status = FAILED
+            self._finish(job)
+        else:
+            job.status = QUEUED
+            job.visible_at = now + retry_delay
+            if retry_delay > 0:
+                heapq.heappush(self._delayed, (job.visible_at, next(self._seq), job.id))
+            else:
+                self._make_ready(job)
+                self._notify()
+        return Job(**job.to_dict())
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return Job(**job.to_dict()) if job is not None else None
+
+    async def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def wait(self, timeout: float) -> None:
+        if self._event is None:
+            self._event = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Durable queue in a SQLite file.
+
+    Claims run in an IMMEDIATE transaction, so several worker processes
+    can share one database file without double-claiming. Statements run in
+    a thread to keep the event loop free.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            priority INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            visible_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, visible_at, created_at);
+    """
+
+    COLUMNS = ("id", "payload", "priority", "status", "attempts", "max_attempts",
+               "result", "error", "created_at", "updated_at", "visible_at")
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _row_to_job(self, row) -> Job:
+        values = dict(zip(self.COLUMNS, row))
+        values["payload"] = json.loads(values["payload"])
+        values["result"] = json.loads(values["result"]) if values["result"] is not None else None
+        return Job(**values)
+
+    async def _run(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        def locked():
+            with self._lock:
+                return func(self._conn)
+        return await asyncio.to_thread(locked)
+
+    async def enqueue(
+        self,
+        payload: Dict[str, Any],
+        priority: int = PRIORITIES["normal"],
+        max_attempts: int = 3
+    ) -> Job:
+        now = time.time()
+        job = Job(uuid.uuid4().hex, payload, priority, max_attempts=max_attempts,
+                  created_at=now, updated_at=now, visible_at=now)
+        await self._run(lambda conn: conn.execute(
+            "INSERT INTO jobs (id, payload, priority, status, attempts, max_attempts,"
+            " created_at, updated_at, visible_at) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)",
+            (job.id, json.dumps(payload), priority, QUEUED, max_attempts, now, now, now)
+        ))
+        return job
+
+    async def claim(self, visibility_timeout: float) -> Optional[Job]:
+        def claim_one(conn: sqlite3.Connection) -> Optional[Job]:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = 'visibility timeout exceeded', updated_at = ?"
+                    " WHERE status = ? AND visible_at <= ? AND attempts >= max_attempts",
+                    (FAILED, now, RUNNING, now)
+                )
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status IN (?, ?) AND visible_at <= ?"
+                    " ORDER BY priority, created_at LIMIT 1",
+                    (QUEUED, RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, visible_at = ?"
+                    " WHERE id = ?",
+                    (RUNNING, now, now + visibility_timeout, row[0])
+                )
+                job = conn.execute(
+                    f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (row[0],)
+                ).fetchone()
+                conn.execute("COMMIT")
+                return self._row_to_job(job)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return await self._run(claim_one)
+
+    async def extend(self, job_id: str, attempt: int, visibility_timeout: float) -> bool:
+        cursor = await self._run(lambda conn: conn.execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+            (time.time() + visibility_timeout, job_id, RUNNING, attempt)
+        ))
+        return cursor.rowcount > 0
+
+    async def complete(self, job_id: str, attempt: int, result: Any) -> bool:
+        cursor = await self._run(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ?"
+            " WHERE id = ? AND attempts = ? AND status != ?",
+            (SUCCEEDED, json.dumps(result, default=str), time.time(), job_id, attempt, SUCCEEDED)
+        ))
+        return cursor.rowcount > 0
+
+    async def fail(self, job_id: str, attempt: int, error: str, retry_delay: float = 0.0) -> Optional[Job]:
+        def fail_one(conn: sqlite3.Connection) -> Optional[Job]:
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE jobs SET error = ?, updated_at = ?,"
+                " status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END,"
+                " visible_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (error, now, FAILED, QUEUED, now + retry_delay, job_id, RUNNING, attempt)
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            return self._row_to_job(row)
+        return await self._run(fail_one)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        row = await self._run(lambda conn: conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone())
+        return self._row_to_job(row) if row is not None else None
+
+    async def counts(self) -> Dict[str, int]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ).fetchall())
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update(dict(rows))
+        return counts
+
+    async def close(self) -> None:
+        await self._run(lambda conn: conn.close())
+
+
+def open_queue(url: Optional[str] = None) -> JobQueue:
+    """
+    Open a queue backend from a URL.
+
+    Args:
+        url: "memory" or "sqlite:///path/to/jobs.db" (defaults to
+            JOB_QUEUE_URL or "memory")
+    """
+    url = url or os.getenv("JOB_QUEUE_URL", "memory")
+    if url == "memory":
+        return InMemoryJobQueue()
+    if url.startswith("sqlite:///"):
+        return SQLiteJobQueue(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported job queue URL: {url}")
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the queue configured by JOB_QUEUE_URL, shared per process."""
+    global _queue
+    if _queue is None:
+        _queue = open_queue()
+    return _queue
+
+
+class JobWorkerPool:
+    """
+    Asyncio consumers that run queued jobs through a handler.
+
+    Leases are renewed at half the visibility timeout while a handler runs,
+    and failures are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: int = 4,
+        visibility_timeout: float = 120.0,
+        retry_delay: float = 1.0,
+        poll_interval: float = 0.5
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            queue: Queue backend to consume
+            handler: Coroutine function called with each job payload
+            concurrency: Number of jobs processed at once
+            visibility_timeout: Lease length in seconds
+            retry_delay: Backoff before the first retry, doubled per attempt
+            poll_interval: Longest sleep while the queue is empty
+        """
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start the consumers on the running event loop."""
+        self._tasks = [asyncio.ensure_future(self._consume()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """
+        Stop all consumers.
+
+        Jobs interrupted mid-run keep their lease and are picked up again
+        once it expires.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _consume(self) -> None:
+        while True:
+            try:
+                job = await self.queue.claim(self.visibility_timeout)
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                job = None
+            if job is None:
+                await self.queue.wait(self.poll_interval)
+                continue
+            await self.run_job(job)
+
+    async def _renew(self, job: Job) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 2)
+            try:
+                extended = await self.queue.extend(job.id, job.attempts, self.visibility_timeout)
+            except Exception as e:
+                logger.error(f"Error renewing lease of job {job.id}: {str(e)}")
+                continue
+            if not extended:
+                logger.warning(f"Job {job.id} attempt {job.attempts} lost its lease")
+                return
+
+    async def run_job(self, job: Job) -> None:
+        """
+        Run one claimed job and record its outcome.
+
+        If the outcome cannot be recorded (e.g. the database is locked), the
+        error is logged and the job runs again once its lease expires.
+        """
+        renew = asyncio.ensure_future(self._renew(job))
+        try:
+            result = await self.handler(job.payload)
+        except Exception as e:
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            try:
+                updated = await self.queue.fail(job.id, job.attempts, f"{type(e).__name__}: {str(e)}", delay)
+            except Exception as record_error:
+                logger.error(f"Error recording failure of job {job.id}: {str(record_error)}")
+                return
+            if updated is None:
+                logger.warning(f"Job {job.id} attempt {job.attempts} failed after losing its lease: {str(e)}")
+            else:
+                logger.warning(f"Job {job.id} attempt {job.attempts} failed ({updated.status}): {str(e)}")
+        else:
+            try:
+                completed = await self.queue.complete(job.id, job.attempts, result)
+            except Exception as e:
+                logger.error(f"Error recording completion of job {job.id}: {str(e)}")
+                return
+            if not completed:
+                logger.warning(f"Job {job.id} attempt {job.attempts} finished after a newer attempt started")
+        finally:
+            renew.cancel()
@@ -0,0 +1,275 @@
+"""
+Knowledge Index
+In-process hybrid retrieval over HR policy documents: BM25 over an
+inverted index fused with cosine search over precomputed embeddings
+"""
+
+import json
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from have how i in is it my "
+    "of on or per should that the their this to was what when where which "
+    "who will with you your".split()
+)
+
+# Reciprocal rank fusion constant; 60 is the value from the original paper.
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def document_text(document: Dict[str, Any]) -> str:
+    """Searchable text of a document: title, content and tags."""
+    tags = " ".join(document.get("tags", []))
+    return f"{document.get('title', '')} {document.get('content', '')} {tags}"
+
+
+def load_documents(source: str) -> List[Dict[str, Any]]:
+    """
+    Load documents from a JSON array file, a JSONL file, or a directory.
+
+    In a directory, .json/.jsonl files hold document records and .md/.txt
+    files become one document each, titled after the file name.
+    """
+    path = Path(source)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    documents = []
+    for file in files:
+        if file.suffix == ".json":
+            with open(file) as f:
+                records = json.load(f)
+            documents.extend(records if isinstance(records, list) else [records])
+        elif file.suffix == ".jsonl":
+            with open(file) as f:
+                documents.extend(json.loads(line) for line in f if line.strip())
+        elif file.suffix in (".md", ".txt"):
+            documents.append({
+                "id": file.stem,
+                "title": file.stem.replace("_", " ").replace("-", " ").title(),
+                "content": file.read_text(),
+                "category": file.parent.name if file.parent != path else "general"
+            })
+    return documents
+
+
+class HybridIndex:
+    """
+    Memory-resident hybrid search index.
+
+    BM25 term weights are precomputed per posting, so a keyword query is a
+    handful of NumPy scatter-adds. When document embeddings are supplied,
+    a cosine search over the embedding matrix runs alongside and both
+    rankings are merged with reciprocal rank fusion.
+
+    Rank fusion only orders results: the top hit always scores 1.0 however
+    poorly it matches. How well a result actually matches is reported
+    separately as its relevance.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Dict[str, Any]],
+        vectors: Optional[np.ndarray] = None,
+        embedder_name: Optional[str] = None,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Build the index.
+
+        Args:
+            documents: Documents with id, title, content, category and tags
+            vectors: Optional (n_documents, dim) embedding matrix, row-aligned
+                with documents
+            embedder_name: Name of the embedder that produced the vectors
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.documents = list(documents)
+        n = len(self.documents)
+        if vectors is not None and vectors.shape[0] != n:
+            raise ValueError(f"Got {vectors.shape[0]} vectors for {n} documents")
+        self.vectors = None
+        if vectors is not None:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.vectors = (vectors / norms).astype(np.float32)
+        self.embedder_name = embedder_name
+
+        self.categories = np.array([str(d.get("category", "")) for d in self.documents])
+        self._tag_sets = [frozenset(d.get("tags", [])) for d in self.documents]
+
+        term_docs: Dict[str, List[int]] = defaultdict(list)
+        term_freqs: Dict[str, List[int]] = defaultdict(list)
+        lengths = np.zeros(n, dtype=np.float32)
+        for doc_id, document in enumerate(self.documents):
+            tokens = tokenize(document_text(document))
+            lengths[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_docs[term].append(doc_id)
+                term_freqs[term].append(tf)
+
+        avg_length = float(lengths.mean()) if n else 0.0
+        # IDF of a term that occurs in no document
+        self.unseen_idf = math.log(1 + (n + 0.5) / 0.5)
+        self.idf: Dict[str, float] = {}
+        self.postings: Dict[str, tuple] = {}
+        for term, doc_ids in term_docs.items():
+            ids = np.array(doc_ids, dtype=np.int64)
+            tf = np.array(term_freqs[term], dtype=np.float32)
+            idf = self.idf[term] = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = k1 * (1 - b + b * lengths[ids] / (avg_length or 1.0))
+            self.postings[term] = (ids, (idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def bm25(self, query: str) -> np.ndarray:
+        """BM25 score of every document for a query."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        return scores
+
+    def bm25_ceiling(self, query: str) -> float:
+        """
+        BM25 score of a document of average length containing every query
+        term once. Terms missing from the index count too, so a query that
+        is mostly unknown words cannot reach a high relevance.
+        """
+        return sum(self.idf.get(term, self.unseen_idf) for term in set(tokenize(query)))
+
+    def _mask(self, category: Optional[str], tags: Optional[Iterable[str]]) -> np.ndarray:
+        mask = np.ones(len(self.documents), dtype=bool)
+        if category:
+            mask &= self.categories == category
+        if tags:
+            wanted = frozenset(tags)
+            mask &= np.fromiter(
+                (bool(wanted & doc_tags) for doc_tags in self._tag_sets),
+                dtype=bool,
+                count=len(self.documents)
+            )
+        return mask
+
+    @staticmethod
+    def _ranks(scores: np.ndarray, candidates: np.ndarray) -> Dict[int, int]:
+        """1-based rank of each candidate with a positive score."""
+        positive = candidates[scores[candidates] > 0]
+        ordered = positive[np.argsort(-scores[positive], kind="stable")]
+        return {int(doc_id): rank for rank, doc_id in enumerate(ordered, start=1)}
+
+    def search(
+        self,
+        query: str,
+        query_vector: Optional[np.ndarray] = None,
+        top_k: int = 5,
+        category: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the index.
+
+        Args:
+            query: Free-text query
+            query_vector: Optional query embedding from the same embedder
+                as the document vectors
+            top_k: Maximum number of results
+            category: Only return documents in this category
+            tags: Only return documents carrying at least one of these tags
+
+        Returns:
+            Documents ordered by fused score, each with added 'score'
+            (rank-fusion score, 1.0 for a result ranked first by every
+            retriever), 'relevance' (0..1: the cosine similarity when
+            vectors are used, otherwise the BM25 score as a share of the
+            query's bm25_ceiling, capped at 1), 'bm25_score' and
+            'vector_score' keys
+        """
+        candidates = np.flatnonzero(self._mask(category, tags))
+        if candidates.size == 0:
+            return []
+
+        bm25 = self.bm25(query)
+        rankings = [self._ranks(bm25, candidates)]
+        cosine = None
+        if self.vectors is not None and query_vector is not None:
+            unit = np.asarray(query_vector, dtype=np.float32).ravel()
+            norm = float(np.linalg.norm(unit))
+            cosine = self.vectors @ (unit / norm if norm else unit)
+            rankings.append(self._ranks(cosine, candidates))
+
+        fused: Dict[int, float] = defaultdict(float)
+        for ranking in rankings:
+            for doc_id, rank in ranking.items():
+                fused[doc_id] += 1.0 / (RRF_K + rank)
+        best_possible = len(rankings) / (RRF_K + 1)
+
+        hits = sorted(fused.items(), key=lambda item: -item[1])[:top_k]
+        ceiling = self.bm25_ceiling(query)
+        results = []
+        for doc_id, score in hits:
+            result = dict(self.documents[doc_id])
+            result["score"] = round(score / best_possible, 4)
+            if cosine is not None:
+                relevance = max(0.0, float(cosine[doc_id]))
+            else:
+                relevance = float(bm25[doc_id]) / ceiling if ceiling else 0.0
+            result["relevance"] = round(min(relevance, 1.0), 4)
+            result["bm25_score"] = round(float(bm25[doc_id]), 4)
+            result["vector_score"] = round(float(cosine[doc_id]), 4) if cosine is not None else None
+            results.append(result)
+        return results
+
+    @classmethod
+    def load(cls, documents_path: str, vectors_path: Optional[str] = None) -> "HybridIndex":
+        """
+        Load documents from a JSON array or JSONL file, plus optional vectors.
+
+        Args:
+            documents_path: Path to the documents file
+            vectors_path: Optional .npz written by scripts/embed_documents.py
+                (defaults to '<documents stem>.embeddings.npz' if present)
+        """
+        path = Path(documents_path)
+        with open(path) as f:
+            if path.suffix == ".jsonl":
+                documents = [json.loads(line) for line in f if line.strip()]
+            else:
+                documents = json.load(f)
+
+        if vectors_path is None:
+            candidate = path.with_name(f"{path.stem}.embeddings.npz")
+            vectors_path = str(candidate) if candidate.exists() else None
+
+        vectors, embedder_name = None, None
+        if vectors_path:
+            with np.load(vectors_path) as data:
+                ids = [str(i) for i in data["ids"]]
+                if ids != [str(d.get("id")) for d in documents]:
+                    raise ValueError(f"{vectors_path} is out of date with {documents_path}")
+                vectors = data["vectors"].astype(np.float32)
+                embedder_name = str(data["embedder"])
+
+        logger.info(
+            f"Loaded knowledge index with {len(documents)} documents"
+            f" ({'hybrid' if vectors is not None else 'BM25 only'})"
+        )
+        return cls(documents, vectors, embedder_name)
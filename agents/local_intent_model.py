@@ -0,0 +1,272 @@
+"""
+Local Intent Model
+Fast in-process intent classifier: hashed n-gram features with a
+multinomial logistic regression, implemented in NumPy
+"""
+
+import logging
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class HashingVectorizer:
+    """
+    Stateless feature extractor using the hashing trick.
+
+    Features are word unigrams, word bigrams and character trigrams of
+    each word, hashed with CRC32 (stable across processes) into a fixed
+    number of buckets with a sign bit to reduce collision bias. Vectors
+    are log-scaled and L2-normalized.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16):
+        """
+        Initialize the vectorizer.
+
+        Args:
+            n_features: Number of hash buckets
+        """
+        self.n_features = n_features
+
+    @staticmethod
+    def tokens(text: str) -> List[str]:
+        """Return the hashed feature strings for a text."""
+        words = _TOKEN.findall((text or "").lower())
+        features = [f"w:{w}" for w in words]
+        features.extend(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+        for word in words:
+            padded = f"<{word}>"
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorize one text as a sparse (indices, values) pair.
+        """
+        counts: Dict[int, float] = {}
+        for feature in self.tokens(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            index = h % self.n_features
+            sign = 1.0 if h & 0x80000000 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        values = np.sign(values) * np.log1p(np.abs(values))
+        norm = float(np.linalg.norm(values))
+        if norm:
+            values /= norm
+        return indices, values
+
+    def transform(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorize a batch of texts in coordinate form.
+
+        Returns:
+            Tuple of (row ids, column indices, values) arrays
+        """
+        rows, cols, vals = [], [], []
+        for row, text in enumerate(texts):
+            indices, values = self.transform_one(text)
+            rows.append(np.full(indices.shape[0], row, dtype=np.int64))
+            cols.append(indices)
+            vals.append(values)
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+class LocalIntentModel:
+    """
+    Multinomial logistic regression over hashed features.
+
+    Prediction for a single message touches only the weight rows of its
+    active features, so it runs in well under a millisecond.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        n_features: int = 2 ** 16,
+        weights: Optional[np.ndarray] = None,
+        bias: Optional[np.ndarray] = None
+    ):
+        """
+        Initialize the model.
+
+        Args:
+            labels: Intent labels, one per output class
+            n_features: Number of hash buckets
+            weights: Optional (n_features, n_labels) weight matrix
+            bias: Optional (n_labels,) bias vector
+        """
+        self.labels = list(labels)
+        self.vectorizer = HashingVectorizer(n_features)
+        self.weights = (
+            weights.astype(np.float32) if weights is not None
+            else np.zeros((n_features, len(self.labels)), dtype=np.float32)
+        )
+        self.bias = (
+            bias.astype(np.float32) if bias is not None
+            else np.zeros(len(self.labels), dtype=np.float32)
+        )
+
+    def _logits(self, rows: np.ndarray, cols: np.ndarray, vals: np.ndarray, n_rows: int) -> np.ndarray:
+        logits = np.zeros((n_rows, len(self.labels)), dtype=np.float32)
+        np.add.at(logits, rows, vals[:, None] * self.weights[cols])
+        return logits + self.bias
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Return class probabilities with shape (len(texts), n_labels)."""
+        rows, cols, vals = self.vectorizer.transform(texts)
+        return self._softmax(self._logits(rows, cols, vals, len(texts)))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the intent of a single message.
+
+        Returns:
+            Tuple of (intent label, probability)
+        """
+        indices, values = self.vectorizer.transform_one(text)
+        logits = values @ self.weights[indices] + self.bias
+        probs = self._softmax(logits[None, :])[0]
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 8,
+        batch_size: int = 256,
+        learning_rate: float = 0.05,
+        l2: float = 1e-6,
+        seed: int = 13
+    ) -> "LocalIntentModel":
+        """
+        Train with mini-batch Adam on the softmax cross-entropy loss.
+
+        Args:
+            texts: Training messages
+            labels: Intent label for each message
+            epochs: Passes over the data
+            batch_size: Examples per gradient step
+            learning_rate: Adam step size
+            l2: L2 regularization strength
+            seed: Shuffle seed
+
+        Returns:
+            The trained model
+        """
+        label_ids = {label: i for i, label in enumerate(self.labels)}
+        y = np.array([label_ids[label] for label in labels], dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        moments = [
+            (np.zeros_like(self.weights), np.zeros_like(self.weights)),
+            (np.zeros_like(self.bias), np.zeros_like(self.bias)),
+        ]
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        step = 0
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(texts))
+            loss = 0.0
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                rows, cols, vals = self.vectorizer.transform([texts[i] for i in batch])
+                probs = self._softmax(self._logits(rows, cols, vals, len(batch)))
+                loss -= float(np.log(probs[np.arange(len(batch)), y[batch]] + 1e-12).sum())
+
+                delta = probs
+                delta[np.arange(len(batch)), y[batch]] -= 1.0
+                delta /= len(batch)
+                grad_w = np.zeros_like(self.weights)
+                np.add.at(grad_w, cols, vals[:, None] * delta[rows])
+                grad_w += l2 * self.weights
+                grad_b = delta.sum(axis=0)
+
+                step += 1
+                for param, grad, (m, v) in (
+                    (self.weights, grad_w, moments[0]),
+                    (self.bias, grad_b, moments[1]),
+                ):
+                    m *= beta1
+                    m += (1 - beta1) * grad
+                    v *= beta2
+                    v += (1 - beta2) * grad * grad
+                    m_hat = m / (1 - beta1 ** step)
+                    v_hat = v / (1 - beta2 ** step)
+                    param -= learning_rate * m_hat / (np.sqrt(v_hat) + eps)
+            logger.info(f"Epoch {epoch + 1}/{epochs}: loss {loss / max(len(texts), 1):.4f}")
+        return self
+
+    def evaluate(self, texts: Sequence[str], labels: Sequence[str]) -> float:
+        """Return accuracy on a labelled set."""
+        if not texts:
+            return 0.0
+        predicted = self.predict_proba(texts).argmax(axis=1)
+        expected = np.array([self.labels.index(label) for label in labels])
+        return float((predicted == expected).mean())
+
+    def save(self, path: str) -> None:
+        """Persist the model as a compressed float16 .npz artifact."""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as f:
+            np.savez_compressed(
+                f,
+                version=np.array(MODEL_VERSION),
+                labels=np.array(self.labels),
+                n_features=np.array(self.vectorizer.n_features),
+                weights=self.weights.astype(np.float16),
+                bias=self.bias.astype(np.float32),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalIntentModel":
+        """Load a model saved with save()."""
+        with np.load(path) as data:
+            if int(data["version"]) != MODEL_VERSION:
+                raise ValueError(f"Unsupported model version {int(data['version'])} in {path}")
+            return cls(
+                labels=[str(label) for label in data["labels"]],
+                n_features=int(data["n_features"]),
+                weights=data["weights"],
+                bias=data["bias"],
+            )
+
+
+def iter_labelled(
+    tickets: Iterable[Dict[str, str]],
+    category_to_intent: Dict[str, str]
+) -> Iterable[Tuple[str, str]]:
+    """
+    Yield (text, intent) pairs from ticket records.
+
+    Tickets whose category has no intent mapping are skipped.
+    """
+    for ticket in tickets:
+        intent = category_to_intent.get(ticket.get("category", ""))
+        if intent is None:
+            continue
+        text = f"{ticket.get('subject', '')} {ticket.get('description', '')}".strip()
+        if text:
+            yield text, intent
@@ -3,11 +3,20 @@ Orchestrator Agent
 Coordinates multi-agent workflows and routes requests
 """
 
+import asyncio
+import copy
 import logging
-from typing import Dict, Any, Optional
+import os
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
 from azure.functions import HttpRequest, HttpResponse
 import json
 
+from . import http_client, resilience, telemetry
+from .answer_generator import DEFAULT_ANSWER, AnswerOutcome
+from .cache import context_digest, normalize_message
+from .pipeline import StageGraph
+from .singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,6 +25,42 @@ class OrchestratorAgent:
     Central orchestrator that coordinates all agents in the system.
     """
     
+    # Policy categories that stay relevant for each intent once it is known.
+    # An empty tuple keeps every category; intents missing here drop the
+    # speculatively retrieved knowledge altogether.
+    INTENT_KNOWLEDGE_CATEGORIES = {
+        "LEAVE_REQUEST": ("leave",),
+        "BENEFITS_QUERY": ("benefits",),
+        "POLICY_QUESTION": (),
+        "UNKNOWN": ()
+    }
+    
+    RUNBOOK_INTENTS = ("LEAVE_REQUEST", "EMPLOYEE_DATA")
+    
+    # Agents whose calls have no side effects and may be hedged
+    IDEMPOTENT_AGENTS = ("intent_classifier", "knowledge_retrieval")
+    
+    # Stand-in results when an agent is unavailable or out of time
+    DEGRADED_INTENT = {
+        "intent": "UNKNOWN",
+        "confidence": 0.0,
+        "entities": {},
+        "requires_clarification": True
+    }
+    DEGRADED_KNOWLEDGE = {
+        "policies": [],
+        "faqs": [],
+        "relevance_score": 0.0
+    }
+    
+    # Stages whose results are streamed to clients, and their event names
+    STREAM_EVENTS = {
+        "classify": "intent",
+        "knowledge": "knowledge",
+        "runbook": "runbook",
+        "escalate": "escalation"
+    }
+    
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the orchestrator agent.
@@ -28,6 +73,55 @@ class OrchestratorAgent:
         self.knowledge_retrieval_url = config.get("knowledge_retrieval_url")
         self.runbook_executor_url = config.get("runbook_executor_url")
         self.escalation_url = config.get("escalation_url")
+        self.request_deadline = config.get("request_deadline")
+        self.resilience = resilience.ResilienceRegistry(hedged_agents=self.IDEMPOTENT_AGENTS)
+        # Concurrent identical classify and retrieval calls share one
+        # in-flight call; runbook and escalation stay per user
+        self.singleflight: Dict[str, SingleFlight] = {}
+        if config.get("singleflight", True):
+            self.singleflight = {
+                name: SingleFlight(name) for name in ("classify", "retrieve", "similar_tickets")
+            }
+        self.knowledge_backend = config.get("knowledge_backend") or "local"
+        self.knowledge_index = None
+        if self.knowledge_backend == "local":
+            self.knowledge_index = self._load_knowledge_index(config.get("knowledge_index_path"))
+        self.ticket_store = None
+        if config.get("ticket_embeddings_path"):
+            from .embedding_store import open_store
+            
+            self.ticket_store = open_store(config["ticket_embeddings_path"])
+        self._embedders: Dict[str, Any] = {}
+        self.answer_generator = None
+        if config.get("answer_generation"):
+            from .answer_generator import AnswerGenerator
+            
+            self.answer_generator = AnswerGenerator()
+        self.answer_cache = None
+        if self.answer_generator is not None and config.get("answer_cache"):
+            from .answer_cache import build_answer_cache
+            
+            self.answer_cache = build_answer_cache()
+        self.conversations = None
+        if config.get("conversation_store"):
+            from .conversation import get_conversation_store
+            
+            self.conversations = get_conversation_store()
+        # Classifications below this confidence are retried with the history
+        self.history_threshold = config.get("conversation_context_threshold", 0.7)
+    
+    @staticmethod
+    def _load_knowledge_index(path: Optional[str]):
+        """Load the in-process policy index, if its documents file exists."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            from .knowledge_index import HybridIndex
+            
+            return HybridIndex.load(path)
+        except Exception as e:
+            logger.error(f"Could not load knowledge index from {path}: {str(e)}")
+            return None
     
     async def process_request(
         self,
@@ -44,44 +138,397 @@ class OrchestratorAgent:
             context: Optional conversation context
             
         Returns:
-            Response dictionary with agent results and final answer
+            Response dictionary with agent results and final answer, plus
+            per-stage wall times under stage_timings_ms
         """
         logger.info(f"Processing request from user {user_id}: {user_message}")
         
-        # Step 1: Classify intent
-        intent_result = await self._classify_intent(user_message, context)
-        logger.info(f"Intent classified: {intent_result.get('intent')}")
+        with telemetry.span("request"):
+            history = await self._conversation_context(user_id, context)
+            pipeline = self._build_pipeline(user_message, context, history)
+            results = await self._run_pipeline(pipeline)
+            logger.info(f"Intent classified: {results['classify'].get('intent')}")
+            
+            answer = DEFAULT_ANSWER
+            if self.answer_generator is not None:
+                cache_key, answer = await self._cached_answer(user_message, results)
+                if answer is None:
+                    outcome = AnswerOutcome()
+                    answer = await self.answer_generator.generate(
+                        *self._answer_inputs(user_message, results), outcome=outcome
+                    )
+                    await self._store_answer(cache_key, results, answer, outcome)
+            
+            with telemetry.span("aggregate"):
+                response = self._aggregate_response(
+                    results["classify"],
+                    results["knowledge"],
+                    results["runbook"],
+                    results["escalate"],
+                    answer
+                )
+            await self._remember_turn(user_id, user_message, results["classify"], answer)
+        response["stage_timings_ms"] = {
+            name: round(ms, 3) for name, ms in pipeline.timings.items()
+        }
         
-        # Step 2: Retrieve relevant knowledge
-        knowledge_result = await self._retrieve_knowledge(
-            user_message,
-            intent_result
+        return response
+    
+    async def stream_request(
+        self,
+        user_message: str,
+        user_id: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Process a request, yielding (event, data) pairs as results arrive.
+        
+        Events are "intent", "knowledge", "runbook" and "escalation" as
+        their stages finish, then "answer" with text deltas, then "done"
+        with the same response process_request would return.
+        """
+        logger.info(f"Streaming request from user {user_id}: {user_message}")
+        
+        events: asyncio.Queue = asyncio.Queue()
+        
+        def on_stage(name: str, result: Any) -> None:
+            if name in self.STREAM_EVENTS:
+                events.put_nowait((self.STREAM_EVENTS[name], result))
+        
+        history = await self._conversation_context(user_id, context)
+        pipeline = self._build_pipeline(user_message, context, history)
+        task = asyncio.ensure_future(self._run_pipeline(pipeline, on_stage))
+        task.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            results = task.result()
+        finally:
+            # The client may disconnect mid-stream
+            if not task.done():
+                task.cancel()
+        
+        answer = DEFAULT_ANSWER
+        if self.answer_generator is not None:
+            cache_key, answer = await self._cached_answer(user_message, results)
+            if answer is not None:
+                yield "answer", {"delta": answer}
+            else:
+                parts = []
+                outcome = AnswerOutcome()
+                async for delta in self.answer_generator.stream(
+                    *self._answer_inputs(user_message, results), outcome=outcome
+                ):
+                    parts.append(delta)
+                    yield "answer", {"delta": delta}
+                answer = "".join(parts)
+                await self._store_answer(cache_key, results, answer, outcome)
+        else:
+            yield "answer", {"delta": answer}
+        
+        response = self._aggregate_response(
+            results["classify"],
+            results["knowledge"],
+            results["runbook"],
+            results["escalate"],
+            answer
         )
+        await self._remember_turn(user_id, user_message, results["classify"], answer)
+        response["stage_timings_ms"] = {
+            name: round(ms, 3) for name, ms in pipeline.timings.items()
+        }
+        yield "done", response
+    
+    async def process_batch(
+        self,
+        requests: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+        concurrency: int = 16
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process many requests, yielding each outcome as soon as it is ready.
         
-        # Step 3: Execute runbook if applicable
-        runbook_result = None
-        if intent_result.get("intent") in ["LEAVE_REQUEST", "EMPLOYEE_DATA"]:
-            runbook_result = await self._execute_runbook(
-                intent_result,
-                knowledge_result
-            )
+        Requests with the same normalized message and context are processed
+        once and the result is fanned out to every copy. Copies are shared
+        across users only while the outcome cannot depend on who asked:
+        with a runbook executor configured a request may run a runbook on
+        the user's behalf, and with the conversation store enabled it reads
+        and extends the user's history, so then only a user's own repeats
+        are coalesced.
         
-        # Step 4: Check if escalation is needed
-        escalation_result = await self._check_escalation(
-            intent_result,
-            knowledge_result,
-            runbook_result
+        Args:
+            requests: (message, user_id, context) tuples
+            concurrency: Maximum distinct requests in flight
+            
+        Yields:
+            {"index", "user_id", "result"} on success or
+            {"index", "user_id", "error", "error_type"} on failure, in
+            completion order; "coalesced" marks results shared by copies
+        """
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for index, (message, user_id, context) in enumerate(requests):
+            key = (normalize_message(message), context_digest(context))
+            if self.runbook_executor_url or self.conversations is not None:
+                key += (user_id,)
+            groups.setdefault(key, []).append(index)
+        
+        pending: asyncio.Queue = asyncio.Queue()
+        for indices in groups.values():
+            pending.put_nowait(indices)
+        finished: asyncio.Queue = asyncio.Queue()
+        
+        async def worker() -> None:
+            while True:
+                try:
+                    indices = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                message, user_id, context = requests[indices[0]]
+                try:
+                    outcome = {"result": await self.process_request(message, user_id, context)}
+                except Exception as e:
+                    logger.error(f"Batch item {indices[0]} failed: {str(e)}")
+                    outcome = {"error": str(e), "error_type": type(e).__name__}
+                finished.put_nowait((indices, outcome))
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, min(concurrency, len(groups))))]
+        try:
+            for _ in range(len(groups)):
+                indices, outcome = await finished.get()
+                for index in indices:
+                    item = {"index": index, "user_id": requests[index][1], **outcome}
+                    if len(indices) > 1:
+                        item["coalesced"] = True
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _coalesce(
+        self,
+        stage: str,
+        key: Any,
+        func: Callable[[], Any],
+        on_deadline: Callable[[Exception], Any]
+    ) -> Any:
+        """
+        Share an identical in-flight stage call, if coalescing is on.
+        
+        The shared call runs outside this request's deadline, so when the
+        deadline passes first the stage gets on_deadline(error) instead.
+        """
+        group = self.singleflight.get(stage)
+        if group is None:
+            return await func()
+        try:
+            return await group.do(key, func)
+        except resilience.DeadlineExceeded as e:
+            return on_deadline(e)
+    
+    async def _run_pipeline(
+        self,
+        pipeline: StageGraph,
+        on_stage: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """Run the stages under the request deadline, which agent calls inherit."""
+        with resilience.deadline(self.request_deadline):
+            return await pipeline.run(on_stage=on_stage)
+    
+    async def _call_agent(self, agent: str, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        POST to an agent through its circuit breaker, within the deadline.
+        
+        Idempotent agents are hedged when AGENT_HEDGING_ENABLED is set.
+        """
+        return await self.resilience.guard(agent).call(
+            lambda timeout: http_client.post_json(agent, url, payload, timeout=timeout)
         )
+    
+    @staticmethod
+    def _degraded(agent: str, error: Exception, fallback: Dict[str, Any]) -> Dict[str, Any]:
+        """Stand-in result for a failed agent call, marked as degraded."""
+        logger.warning(f"{agent} unavailable, using degraded result: {type(error).__name__}: {str(error)}")
+        telemetry.annotate(degraded=agent)
+        return dict(copy.deepcopy(fallback), degraded=True, degraded_reason=f"{agent}: {type(error).__name__}")
+    
+    async def _conversation_context(
+        self,
+        user_id: str,
+        context: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The caller's context plus the user's history, within the token
+        budget, or None when there is no history to add.
+        """
+        if self.conversations is None:
+            return None
+        with telemetry.span("conversation") as span:
+            state = await self.conversations.get(user_id)
+            span.set("turns", len(state.turns))
+            if not state.turns and not state.summary:
+                return None
+            return self.conversations.compact(state, context)
+    
+    async def _remember_turn(
+        self,
+        user_id: str,
+        user_message: str,
+        intent_result: Dict[str, Any],
+        answer: str
+    ) -> None:
+        """Record the exchange in the user's conversation."""
+        if self.conversations is None:
+            return
+        await self.conversations.append(user_id, "user", user_message, intent=intent_result.get("intent"))
+        if self.answer_generator is not None:
+            await self.conversations.append(user_id, "assistant", answer)
+    
+    async def _cached_answer(
+        self,
+        user_message: str,
+        results: Dict[str, Any]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look the request's answer up in the answer cache.
         
-        # Step 5: Aggregate results
-        response = self._aggregate_response(
-            intent_result,
-            knowledge_result,
-            runbook_result,
-            escalation_result
+        Returns:
+            Tuple of (cache key, cached answer); the key is None when the
+            answer may not be cached, the answer None on a miss
+        """
+        if self.answer_cache is None:
+            return None, None
+        key = self.answer_cache.key(user_message, results)
+        if key is None:
+            return None, None
+        with telemetry.span("answer_cache") as span:
+            answer = await self.answer_cache.get(key, results)
+            span.set("cache", "hit" if answer is not None else "miss")
+        return key, answer
+    
+    async def _store_answer(
+        self,
+        key: Optional[str],
+        results: Dict[str, Any],
+        answer: str,
+        outcome: AnswerOutcome
+    ) -> None:
+        """Cache a generated answer, unless it failed or was cut off."""
+        if key is not None and outcome.complete:
+            await self.answer_cache.set(key, results, answer)
+    
+    @staticmethod
+    def _answer_inputs(user_message: str, results: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (
+            user_message,
+            results["classify"],
+            results["knowledge"],
+            results["runbook"],
+            results["escalate"]
         )
+    
+    def _build_pipeline(
+        self,
+        user_message: str,
+        context: Optional[Dict[str, Any]],
+        history: Optional[Dict[str, Any]] = None
+    ) -> StageGraph:
+        """
+        Describe the request workflow as a stage graph.
         
-        return response
+        Retrieval only needs the raw message, so it starts speculatively
+        alongside intent classification and is re-ranked (or dropped) once
+        the intent is known. Neither depends on the user, so both are
+        coalesced with identical requests already in flight.
+        
+        The message is classified with the caller's context alone, so
+        returning users still share classifications (and the classifier's
+        cache) with everyone else. Only when that result is unclear is it
+        classified again with the user's history: follow-ups like "and
+        next week?" pay for a second call, self-contained messages do not.
+        """
+        normalized = normalize_message(user_message)
+        
+        def intent_deadline(error):
+            return self._degraded("intent_classifier", error, self.DEGRADED_INTENT)
+        
+        async def classify(results):
+            intent_result = await self._coalesce(
+                "classify",
+                (normalized, context_digest(context)),
+                lambda: self._classify_intent(user_message, context),
+                intent_deadline
+            )
+            if history is not None and self._needs_history(intent_result):
+                intent_result = await self._coalesce(
+                    "classify",
+                    (normalized, context_digest(history)),
+                    lambda: self._classify_intent(user_message, history),
+                    intent_deadline
+                )
+                telemetry.annotate(history=True)
+            telemetry.annotate(
+                intent=intent_result.get("intent"),
+                cache=intent_result.get("cached") or "miss",
+                source=intent_result.get("source", "model")
+            )
+            return intent_result
+        
+        async def retrieve(results):
+            return await self._coalesce(
+                "retrieve",
+                normalized,
+                lambda: self._retrieve_knowledge(user_message),
+                lambda e: self._degraded("knowledge_retrieval", e, self.DEGRADED_KNOWLEDGE)
+            )
+        
+        async def similar_tickets(results):
+            return await self._coalesce(
+                "similar_tickets",
+                normalized,
+                lambda: self._find_similar_tickets(user_message),
+                lambda e: []
+            )
+        
+        async def knowledge(results):
+            ranked = self._rank_knowledge(results["retrieve"], results["classify"])
+            if results["similar_tickets"]:
+                ranked = dict(ranked, similar_tickets=results["similar_tickets"])
+            return ranked
+        
+        async def runbook(results):
+            if results["classify"].get("intent") not in self.RUNBOOK_INTENTS:
+                return None
+            return await self._execute_runbook(results["classify"], results["knowledge"])
+        
+        async def escalate(results):
+            return await self._check_escalation(
+                results["classify"],
+                results["knowledge"],
+                results["runbook"]
+            )
+        
+        return (
+            StageGraph()
+            .add("classify", classify)
+            .add("retrieve", retrieve)
+            .add("similar_tickets", similar_tickets)
+            .add("knowledge", knowledge, depends_on=("classify", "retrieve", "similar_tickets"))
+            .add("runbook", runbook, depends_on=("classify", "knowledge"))
+            .add("escalate", escalate, depends_on=("classify", "knowledge", "runbook"))
+        )
+    
+    def _needs_history(self, intent_result: Dict[str, Any]) -> bool:
+        """Whether a classification is unclear enough to retry with the history."""
+        if intent_result.get("degraded"):
+            return False
+        return (
+            intent_result.get("intent") == "UNKNOWN"
+            or bool(intent_result.get("requires_clarification"))
+            or intent_result.get("confidence", 0.0) < self.history_threshold
+        )
     
     async def _classify_intent(
         self,
@@ -89,7 +536,15 @@ class OrchestratorAgent:
         context: Optional[Dict[str, Any]]
     ) -> Dict[str, Any]:
         """Classify user intent using Intent Classifier Agent."""
-        # TODO: Implement HTTP call to intent classifier agent
+        if self.intent_classifier_url:
+            try:
+                return await self._call_agent(
+                    "intent_classifier",
+                    self.intent_classifier_url,
+                    {"message": message, "context": context}
+                )
+            except Exception as e:
+                return self._degraded("intent_classifier", e, self.DEGRADED_INTENT)
         return {
             "intent": "LEAVE_REQUEST",
             "confidence": 0.95,
@@ -99,23 +554,100 @@ class OrchestratorAgent:
     async def _retrieve_knowledge(
         self,
         message: str,
-        intent_result: Dict[str, Any]
+        intent_result: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        """Retrieve relevant knowledge using Knowledge Retrieval Agent."""
-        # TODO: Implement HTTP call to knowledge retrieval agent
+        """
+        Retrieve relevant knowledge using Knowledge Retrieval Agent.
+        
+        The intent is optional so retrieval can start before classification
+        finishes; see _rank_knowledge for the follow-up step.
+        """
+        if self.knowledge_index is not None:
+            return await self._search_local_knowledge(message)
+        if self.knowledge_retrieval_url:
+            try:
+                return await self._call_agent(
+                    "knowledge_retrieval",
+                    self.knowledge_retrieval_url,
+                    {"message": message, "intent": intent_result}
+                )
+            except Exception as e:
+                return self._degraded("knowledge_retrieval", e, self.DEGRADED_KNOWLEDGE)
         return {
             "policies": [],
             "faqs": [],
             "relevance_score": 0.85
         }
     
+    async def _search_local_knowledge(self, message: str) -> Dict[str, Any]:
+        """Serve retrieval from the in-process hybrid index."""
+        query_vector = None
+        if self.knowledge_index.vectors is not None:
+            query_vector = await self._embed_query(self.knowledge_index.embedder_name, message)
+        
+        policies = self.knowledge_index.search(message, query_vector, top_k=5)
+        return {
+            "policies": policies,
+            "faqs": [],
+            "relevance_score": max((p["relevance"] for p in policies), default=0.0)
+        }
+    
+    async def _embed_query(self, embedder_name: str, message: str):
+        """Embed a query with the embedder a stored corpus was built with."""
+        embedder = self._embedders.get(embedder_name)
+        if embedder is None:
+            from .embeddings import get_embedder
+            
+            embedder = self._embedders[embedder_name] = get_embedder(embedder_name)
+        return (await embedder.embed([message]))[0]
+    
+    async def _find_similar_tickets(self, message: str) -> list:
+        """Look up resolved historical tickets similar to the message."""
+        if self.ticket_store is None:
+            return []
+        vector = await self._embed_query(self.ticket_store.embedder_name, message)
+        # The scan is CPU-bound over a memory-mapped matrix; keep it off the loop
+        matches = await asyncio.to_thread(self.ticket_store.search, vector, 5)
+        return [{"id": ticket_id, "similarity": round(score, 4)} for ticket_id, score in matches]
+    
+    def _rank_knowledge(
+        self,
+        knowledge_result: Dict[str, Any],
+        intent_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Re-rank or drop speculatively retrieved knowledge for the intent."""
+        intent = intent_result.get("intent")
+        if intent not in self.INTENT_KNOWLEDGE_CATEGORIES:
+            return {"policies": [], "faqs": [], "relevance_score": 0.0}
+        
+        preferred = self.INTENT_KNOWLEDGE_CATEGORIES[intent]
+        if not preferred:
+            return knowledge_result
+        
+        def rank(item: Any) -> int:
+            category = item.get("category") if isinstance(item, dict) else None
+            return 0 if category in preferred else 1
+        
+        ranked = dict(knowledge_result)
+        for key in ("policies", "faqs"):
+            ranked[key] = sorted(knowledge_result.get(key, []), key=rank)
+        return ranked
+    
     async def _execute_runbook(
         self,
         intent_result: Dict[str, Any],
         knowledge_result: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """Execute runbook using Runbook Executor Agent."""
-        # TODO: Implement HTTP call to runbook executor agent
+        if self.runbook_executor_url:
+            try:
+                return await self._call_agent(
+                    "runbook_executor",
+                    self.runbook_executor_url,
+                    {"intent": intent_result, "knowledge": knowledge_result}
+                )
+            except Exception as e:
+                return self._degraded("runbook_executor", e, {"status": "failed"})
         return None
     
     async def _check_escalation(
@@ -124,8 +656,37 @@ class OrchestratorAgent:
         knowledge_result: Dict[str, Any],
         runbook_result: Optional[Dict[str, Any]]
     ) -> Dict[str, Any]:
-        """Check if escalation is needed using Escalation Agent."""
-        # TODO: Implement HTTP call to escalation agent
+        """
+        Check if escalation is needed using Escalation Agent.
+        
+        A request that went through any degraded stage is handed to a
+        human without asking the agent.
+        """
+        degraded = [
+            r["degraded_reason"] for r in (intent_result, knowledge_result, runbook_result)
+            if isinstance(r, dict) and r.get("degraded")
+        ]
+        if degraded:
+            return {
+                "escalate": True,
+                "reason": f"Automated handling degraded ({', '.join(degraded)}); routed to an HR specialist"
+            }
+        if self.escalation_url:
+            try:
+                return await self._call_agent(
+                    "escalation",
+                    self.escalation_url,
+                    {
+                        "intent": intent_result,
+                        "knowledge": knowledge_result,
+                        "runbook": runbook_result
+                    }
+                )
+            except Exception as e:
+                return self._degraded("escalation", e, {
+                    "escalate": True,
+                    "reason": "Escalation agent unavailable; routed to an HR specialist"
+                })
         return {
             "escalate": False,
             "reason": None
@@ -136,20 +697,67 @@ class OrchestratorAgent:
         intent_result: Dict[str, Any],
         knowledge_result: Dict[str, Any],
         runbook_result: Optional[Dict[str, Any]],
-        escalation_result: Dict[str, Any]
+        escalation_result: Dict[str, Any],
+        answer: str = DEFAULT_ANSWER
     ) -> Dict[str, Any]:
         """Aggregate all agent results into final response."""
+        stages = (
+            ("classify", intent_result),
+            ("knowledge", knowledge_result),
+            ("runbook", runbook_result),
+            ("escalate", escalation_result)
+        )
         return {
             "intent": intent_result.get("intent"),
             "confidence": intent_result.get("confidence"),
-            "answer": "Your request has been processed.",
+            "answer": answer,
             "knowledge_used": knowledge_result,
             "runbook_executed": runbook_result is not None,
             "escalated": escalation_result.get("escalate", False),
-            "explanation": "This is how the system processed your request..."
+            "explanation": "This is how the system processed your request...",
+            "degraded": [name for name, result in stages if isinstance(result, dict) and result.get("degraded")]
         }
 
 
+def load_config() -> Dict[str, Any]:
+    """Build the orchestrator configuration from environment variables."""
+    return {
+        "intent_classifier_url": os.getenv("INTENT_CLASSIFIER_URL"),
+        "knowledge_retrieval_url": os.getenv("KNOWLEDGE_RETRIEVAL_URL"),
+        "runbook_executor_url": os.getenv("RUNBOOK_EXECUTOR_URL"),
+        "escalation_url": os.getenv("ESCALATION_URL"),
+        "knowledge_backend": os.getenv("KNOWLEDGE_BACKEND", "local"),
+        "knowledge_index_path": os.getenv("KNOWLEDGE_INDEX_PATH", "knowledge_base/hr_policies.json"),
+        "ticket_embeddings_path": os.getenv("TICKET_EMBEDDINGS_PATH"),
+        "answer_generation": os.getenv("ANSWER_GENERATION_ENABLED", "false").lower() in ("1", "true", "yes"),
+        "singleflight": os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "request_deadline": float(os.getenv("REQUEST_DEADLINE_SECONDS", "20")) or None,
+        "answer_cache": os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "conversation_store": os.getenv("CONVERSATION_STORE_ENABLED", "false").lower() in ("1", "true", "yes"),
+        "conversation_context_threshold": float(os.getenv("CONVERSATION_CONTEXT_THRESHOLD", "0.7"))
+    }
+
+
+_orchestrator: Optional[OrchestratorAgent] = None
+
+
+def get_orchestrator() -> OrchestratorAgent:
+    """Return the orchestrator cached for the lifetime of a warm instance."""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = OrchestratorAgent(load_config())
+    return _orchestrator
+
+
+async def run_ticket_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job queue handler: process a queued ticket through the orchestrator."""
+    return await get_orchestrator().process_request(
+        payload["message"],
+        payload["user_id"],
+        payload.get("context")
+    )
+
+
 # Azure Function entry point
 async def main(req: HttpRequest) -> HttpResponse:
     """
@@ -161,8 +769,7 @@ async def main(req: HttpRequest) -> HttpResponse:
         user_id = body.get("user_id")
         context = body.get("context")
         
-        orchestrator = OrchestratorAgent({})
-        result = await orchestrator.process_request(
+        result = await get_orchestrator().process_request(
             user_message,
             user_id,
             context
@@ -0,0 +1,147 @@
+"""
+Stage Pipeline
+Runs orchestrator stages as a dependency graph under asyncio
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from . import telemetry
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A single unit of work in the pipeline."""
+
+    name: str
+    func: StageFunc
+    depends_on: Tuple[str, ...] = ()
+
+
+class StageGraph:
+    """
+    Small DAG of async stages.
+
+    Every stage starts as soon as all of the stages it depends on have
+    finished, so stages without a path between them overlap. Each stage
+    function receives a dict with the results of the stages completed so far
+    and runs inside a telemetry span named after the stage.
+    """
+
+    def __init__(self):
+        """Initialize an empty graph."""
+        self._stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        func: StageFunc,
+        depends_on: Sequence[str] = ()
+    ) -> "StageGraph":
+        """
+        Register a stage.
+
+        Args:
+            name: Unique stage name, also the key of its result
+            func: Coroutine function called with the results so far
+            depends_on: Names of stages that must finish first
+
+        Returns:
+            The graph itself, so calls can be chained
+        """
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self._stages[name] = Stage(name, func, tuple(depends_on))
+        return self
+
+    def order(self) -> List[str]:
+        """Return the stage names in a valid topological order."""
+        for stage in self._stages.values():
+            for dep in stage.depends_on:
+                if dep not in self._stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        ordered: List[str] = []
+        done = set()
+        pending = list(self._stages)
+        while pending:
+            ready = [
+                name for name in pending
+                if all(dep in done for dep in self._stages[name].depends_on)
+            ]
+            if not ready:
+                raise ValueError(f"Cycle detected between stages: {', '.join(pending)}")
+            for name in ready:
+                ordered.append(name)
+                done.add(name)
+                pending.remove(name)
+        return ordered
+
+    async def run(
+        self,
+        initial: Optional[Dict[str, Any]] = None,
+        on_stage: Optional[Callable[[str, Any], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Execute all stages, overlapping independent ones.
+
+        Args:
+            initial: Optional seed values visible to every stage
+            on_stage: Optional callback invoked with (name, result) as soon
+                as each stage finishes, e.g. to stream partial results
+
+        Returns:
+            Dictionary mapping stage names to their results
+
+        Raises:
+            The first exception raised by any stage; the remaining
+            in-flight stages are cancelled.
+        """
+        self.order()  # validate before starting anything
+        results: Dict[str, Any] = dict(initial or {})
+        self.timings = {}
+        remaining = dict(self._stages)
+        running: Dict[asyncio.Task, str] = {}
+        started_at: Dict[str, float] = {}
+
+        def launch_ready() -> None:
+            for name, stage in list(remaining.items()):
+                if all(dep in results for dep in stage.depends_on):
+                    del remaining[name]
+                    started_at[name] = time.perf_counter()
+                    running[asyncio.ensure_future(self._run_stage(stage, results))] = name
+
+        try:
+            launch_ready()
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = running.pop(task)
+                    self.timings[name] = (time.perf_counter() - started_at[name]) * 1000
+                    results[name] = task.result()
+                    if on_stage is not None:
+                        on_stage(name, results[name])
+                launch_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        logger.debug(f"Pipeline timings (ms): {self.timings}")
+        return results
+
+    @staticmethod
+    async def _run_stage(stage: Stage, results: Dict[str, Any]) -> Any:
+        with telemetry.span(stage.name):
+            return await stage.func(results)
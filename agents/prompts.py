@@ -0,0 +1,122 @@
+"""
+Prompts
+Static system prefixes built once, local token accounting and per-intent
+token budgets for chat completions
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .tokens import TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TokenBudget:
+    """Most prompt tokens sent and completion tokens requested for one call."""
+
+    prompt_tokens: int
+    max_tokens: int
+
+
+# Answers to policy and benefits questions quote policies; the rest are
+# short confirmations or hand-offs
+ANSWER_BUDGETS = {
+    "POLICY_QUESTION": TokenBudget(1500, 400),
+    "BENEFITS_QUERY": TokenBudget(1500, 400),
+    "LEAVE_REQUEST": TokenBudget(1000, 250),
+    "EMPLOYEE_DATA": TokenBudget(800, 200),
+    "ESCALATION": TokenBudget(600, 150),
+    "UNKNOWN": TokenBudget(600, 200),
+}
+
+
+@dataclass
+class Prompt:
+    """Messages ready to send, with their locally counted size."""
+
+    messages: List[Dict[str, str]]
+    prompt_tokens: int
+    max_tokens: int
+    truncated: bool = False
+
+
+class PromptTemplate:
+    """
+    A fixed system message followed by a per-call user message.
+
+    The system message is built once and reused as the same string object,
+    so every request starts with a byte-identical prefix that the
+    provider's prompt cache can match; its token count is computed on
+    first use and kept, so defining a template at import time does not
+    load the tokenizer.
+    """
+
+    def __init__(self, name: str, system: str, model: Optional[str] = None):
+        """
+        Initialize the template.
+
+        Args:
+            name: Label used in logs
+            system: System prompt text
+            model: Model whose tokenizer counts tokens (defaults to cl100k_base)
+        """
+        self.name = name
+        self.system = system
+        self.model = model
+        self._system_tokens: Optional[int] = None
+
+    @property
+    def system_tokens(self) -> int:
+        """Tokens in the system message, counted once."""
+        if self._system_tokens is None:
+            self._system_tokens = count_tokens(self.system, self.model)
+        return self._system_tokens
+
+    def build(self, user_content: str, budget: TokenBudget) -> Prompt:
+        """
+        Messages for one call, with the user part cut to fit the budget.
+
+        Callers that can drop whole items (policies, batch entries) should
+        do so first; cutting text is the last resort.
+        """
+        overhead = 2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY + self.system_tokens
+        user_tokens = count_tokens(user_content, self.model)
+        truncated = False
+        if overhead + user_tokens > budget.prompt_tokens:
+            user_content = truncate_tokens(user_content, budget.prompt_tokens - overhead, self.model)
+            user_tokens = count_tokens(user_content, self.model)
+            truncated = True
+            logger.warning(f"{self.name} prompt cut to its {budget.prompt_tokens}-token budget")
+        return Prompt(
+            messages=[
+                {"role": "system", "content": self.system},
+                {"role": "user", "content": user_content}
+            ],
+            prompt_tokens=overhead + user_tokens,
+            max_tokens=budget.max_tokens,
+            truncated=truncated
+        )
+
+    def fits(self, user_content: str, budget: TokenBudget) -> bool:
+        """Whether user_content fits the budget without cutting."""
+        overhead = 2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY + self.system_tokens
+        return overhead + count_tokens(user_content, self.model) <= budget.prompt_tokens
+
+
+def format_context(context: Optional[Dict[str, Any]], max_tokens: Optional[int] = None) -> str:
+    """
+    Compact, key-sorted JSON for a context dict.
+
+    Sorting keeps identical contexts byte-identical between calls; the
+    result is cut to max_tokens when given.
+    """
+    if not context:
+        return ""
+    text = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    if max_tokens is not None:
+        text = truncate_tokens(text, max_tokens)
+    return text
@@ -0,0 +1,87 @@
+"""
+Rate Limiting
+Async token buckets for request-per-minute and token-per-minute quotas
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Waiters are served in arrival order. The level may go negative after
+    consume() records more usage than was reserved; later callers then
+    wait until that debt has been refilled.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            per_minute: Refill rate in units per minute
+            capacity: Maximum burst size (defaults to one minute's worth)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until amount units are available, then take them."""
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                await asyncio.sleep((amount - self.level) / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """Take (or, if negative, return) units without waiting."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    """
+    Combined requests-per-minute and tokens-per-minute limiter.
+
+    Callers reserve an estimated token count before a request and report
+    the actual usage afterwards so the token bucket stays accurate.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rpm: Requests per minute, None for unlimited
+            tpm: Tokens per minute, None for unlimited
+        """
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    async def acquire(self, estimated_tokens: float = 0.0) -> None:
+        """Wait for one request slot and the estimated tokens."""
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens:
+            await self.tokens.acquire(estimated_tokens)
+
+    def record_usage(self, estimated_tokens: float, actual_tokens: float) -> None:
+        """Correct the token bucket once the real usage is known."""
+        if self.tokens is not None:
+            self.tokens.consume(actual_tokens - estimated_tokens)
@@ -0,0 +1,369 @@
+"""
+Resilience
+Request deadlines, per-agent circuit breakers and hedged requests for
+agent calls
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from . import http_client, telemetry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_REJECTIONS = telemetry.registry.counter(
+    "maestroai_circuit_rejections_total",
+    "Agent calls failed fast by an open circuit breaker",
+    ("agent",)
+)
+CIRCUIT_TRANSITIONS = telemetry.registry.counter(
+    "maestroai_circuit_transitions_total",
+    "Circuit breaker state changes",
+    ("agent", "state")
+)
+HEDGED_CALLS = telemetry.registry.counter(
+    "maestroai_hedged_requests_total",
+    "Hedged agent calls by which attempt answered first",
+    ("agent", "winner")
+)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The request deadline passed before a call could finish."""
+
+
+class CircuitOpenError(Exception):
+    """A call was rejected because the agent's circuit breaker is open."""
+
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("maestroai_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Bound everything awaited inside the block, including tasks it starts.
+
+    Nested deadlines can only shorten the one already in effect.
+    """
+    if seconds is None:
+        yield
+        return
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextlib.contextmanager
+def no_deadline() -> Iterator[None]:
+    """
+    Lift the current deadline inside the block.
+
+    For work shared by requests with different deadlines: a task started
+    here does not inherit the deadline of the request that started it.
+    """
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def call_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    The smaller of a call's own timeout and the time left on the deadline.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failures in a row the circuit opens and calls
+    fail fast for reset_timeout seconds. Then one trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Agent name, used in errors and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit for {self.name} is now {state}")
+            CIRCUIT_TRANSITIONS.inc((self.name, state))
+            self.state = state
+
+    def allow(self) -> None:
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: While the circuit is open, or a trial call
+                is already in flight
+        """
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        CIRCUIT_REJECTIONS.inc((self.name,))
+        raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._trial_in_flight = False
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """Forget an admitted call that was cancelled without an outcome."""
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Recent call latencies of one agent, for picking the hedge delay."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._cached: Optional[float] = None
+        self._since_update = 0
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_update += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile, or None until min_samples calls were seen."""
+        if len(self._samples) < self.min_samples:
+            return None
+        # Re-sorting the window on every call would cost more than it saves
+        if self._cached is None or self._since_update >= 10:
+            ordered = sorted(self._samples)
+            self._cached = ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+            self._since_update = 0
+        return self._cached
+
+
+class AgentGuard:
+    """
+    Deadline, circuit breaker and optional hedging around one agent's calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        breaker: CircuitBreaker,
+        timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_percentile: float = 95.0,
+        min_hedge_delay: float = 0.05
+    ):
+        """
+        Initialize the guard.
+
+        Args:
+            name: Agent name
+            breaker: The agent's circuit breaker
+            timeout: The agent's own per-call timeout in seconds, further
+                capped by the request deadline
+            hedge: Send a second, duplicate call when the first is slower
+                than the hedge percentile; only for idempotent calls
+            hedge_percentile: Latency percentile after which to hedge
+            min_hedge_delay: Lower bound on the hedge delay in seconds
+        """
+        self.name = name
+        self.breaker = breaker
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.latencies = LatencyTracker()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None to not hedge."""
+        if not self.hedge:
+            return None
+        p = self.latencies.percentile(self.hedge_percentile)
+        return None if p is None else max(p, self.min_hedge_delay)
+
+    async def call(self, func: Callable[[Optional[float]], Awaitable[T]]) -> T:
+        """
+        Run func(timeout) under the breaker and the current deadline.
+
+        Running out of the request's deadline says nothing about the agent,
+        so it never counts as a failure: a deadline that has already passed
+        is raised before the breaker is consulted, and a call cut short by
+        the deadline rather than the agent's own timeout gives its
+        admission back.
+
+        Args:
+            func: Coroutine function taking the per-attempt timeout in
+                seconds (None when unbounded)
+
+        Raises:
+            CircuitOpenError: Without calling func, while the circuit is open
+            DeadlineExceeded: If the request deadline passes
+            asyncio.TimeoutError: If the agent's own timeout passes
+        """
+        timeout = call_timeout(self.timeout)
+        # Whether the deadline, not the agent's timeout, bounds this call
+        deadline_bound = timeout is not None and (self.timeout is None or timeout < self.timeout)
+        self.breaker.allow()
+        started = time.perf_counter()
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and (timeout is None or delay < timeout):
+                result = await self._hedged(func, delay, timeout)
+            elif timeout is not None:
+                result = await asyncio.wait_for(func(timeout), timeout)
+            else:
+                result = await func(None)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            left = remaining()
+            if deadline_bound and (isinstance(e, asyncio.TimeoutError) or (left is not None and left <= 0)):
+                self.breaker.release()
+                if isinstance(e, DeadlineExceeded):
+                    raise
+                raise DeadlineExceeded(f"{self.name} call exceeded the request deadline") from e
+            self.breaker.record_failure()
+            if isinstance(e, asyncio.TimeoutError):
+                raise asyncio.TimeoutError(f"{self.name} call timed out after {timeout}s") from e
+            raise
+        self.breaker.record_success()
+        self.latencies.observe(time.perf_counter() - started)
+        return result
+
+    async def _hedged(
+        self,
+        func: Callable[[Optional[float]], Awaitable[T]],
+        delay: float,
+        timeout: Optional[float]
+    ) -> T:
+        """First successful result of the call and, after delay, a duplicate."""
+        primary = asyncio.ensure_future(func(timeout))
+        attempts = {primary: "primary"}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done:
+                telemetry.annotate(hedged=True)
+                hedge_timeout = None if timeout is None else timeout - delay
+                attempts[asyncio.ensure_future(func(hedge_timeout))] = "hedge"
+            pending = set(attempts)
+            error: Optional[BaseException] = None
+            expires_at = None if timeout is None else time.monotonic() + timeout - delay
+            while pending:
+                wait_for = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError(f"{self.name} call timed out")
+                for task in done:
+                    if task.exception() is None:
+                        if len(attempts) > 1:
+                            HEDGED_CALLS.inc((self.name, attempts[task]))
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+
+class ResilienceRegistry:
+    """The guards for every agent, configured by environment variables."""
+
+    def __init__(self, hedged_agents: tuple = ()):
+        """
+        Initialize the registry.
+
+        Args:
+            hedged_agents: Agents whose calls are idempotent and may be
+                hedged when AGENT_HEDGING_ENABLED is set
+        """
+        self.hedged_agents = hedged_agents
+        self._guards: Dict[str, AgentGuard] = {}
+
+    def guard(self, agent: str) -> AgentGuard:
+        guard = self._guards.get(agent)
+        if guard is None:
+            hedging = os.getenv("AGENT_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+            guard = self._guards[agent] = AgentGuard(
+                agent,
+                CircuitBreaker(
+                    agent,
+                    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+                    reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+                ),
+                timeout=http_client.get_settings(agent).timeout,
+                hedge=hedging and agent in self.hedged_agents,
+                hedge_percentile=float(os.getenv("AGENT_HEDGE_PERCENTILE", "95")),
+                min_hedge_delay=float(os.getenv("AGENT_HEDGE_MIN_DELAY_MS", "50")) / 1000
+            )
+        return guard
+
+    def states(self) -> Dict[str, str]:
+        """Circuit state per agent that has been called."""
+        return {name: guard.breaker.state for name, guard in self._guards.items()}
@@ -0,0 +1,107 @@
+"""
+Single Flight
+Coalesces concurrent identical calls onto one in-flight task
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+from . import resilience, telemetry
+
+logger = logging.getLogger(__name__)
+
+COALESCED_CALLS = telemetry.registry.counter(
+    "maestroai_singleflight_calls_total",
+    "Stage calls that started work (leader) or joined an identical in-flight one (shared)",
+    ("stage", "role")
+)
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call among all concurrent callers with the same key.
+
+    Nothing is cached: the key is forgotten as soon as the call finishes,
+    so the next caller starts fresh work. The call runs in its own task,
+    outside any caller's request deadline; each caller waits for it only
+    until its own deadline, and the call is cancelled once every caller
+    waiting on it has gone away. It therefore runs for as long as the
+    caller with the most time left is still waiting.
+
+    When a call was shared, every caller receives its own deep copy of the
+    result, so one request cannot mutate another's; an unshared result is
+    returned as is.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the group.
+
+        Args:
+            name: Stage name used in metrics
+        """
+        self.name = name
+        self._calls: Dict[Hashable, List[Any]] = {}  # key -> [task, waiting, joined]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func(), or wait for the identical call already in flight.
+
+        Raises:
+            resilience.DeadlineExceeded: If the caller's own request
+                deadline passes first
+        """
+        timeout = resilience.call_timeout(None)
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            with resilience.no_deadline():
+                task = asyncio.ensure_future(func())
+            call = self._calls[key] = [task, 0, 0]
+            task.add_done_callback(lambda _: self._forget(key, task))
+        COALESCED_CALLS.inc((self.name, "leader" if leader else "shared"))
+        if not leader:
+            telemetry.annotate(coalesced=True)
+
+        task = call[0]
+        call[1] += 1
+        call[2] += 1
+        try:
+            if timeout is None:
+                result = await asyncio.shield(task)
+            else:
+                result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.CancelledError:
+            if task.done():
+                raise
+            self._leave(key, call)
+            raise
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            self._leave(key, call)
+            raise resilience.DeadlineExceeded(f"request deadline exceeded waiting for {self.name}")
+        call[1] -= 1
+        # Nobody can join once the key is forgotten, so an unshared result
+        # is safe to hand over without copying
+        self._forget(key, task)
+        if leader and call[2] == 1:
+            return result
+        return copy.deepcopy(result)
+
+    def _leave(self, key: Hashable, call: List[Any]) -> None:
+        """Stop waiting on a call, cancelling it if nobody else is."""
+        call[1] -= 1
+        if call[1] == 0 and not call[0].done():
+            call[0].cancel()
+            self._forget(key, call[0])
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
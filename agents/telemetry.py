@@ -0,0 +1,371 @@
+"""
+Telemetry
+Lightweight spans, Prometheus-format metrics and optional OpenTelemetry export
+"""
+
+import bisect
+import contextvars
+import logging
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a sub-5ms cache hit up to a slow model call
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with a fixed set of label names.
+
+    observe() is a binary search and two additions; buckets are only made
+    cumulative when the metrics are rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, labels: Labels = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> Iterator[str]:
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                yield f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation, labelnames)
+        return self._metrics[name]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+SPAN_SECONDS = registry.histogram(
+    "maestroai_stage_duration_seconds",
+    "Wall time of request stages",
+    ("stage", "outcome")
+)
+SPAN_ERRORS = registry.counter(
+    "maestroai_stage_errors_total",
+    "Stage failures by exception class",
+    ("stage", "error")
+)
+CACHE_LOOKUPS = registry.counter(
+    "maestroai_cache_lookups_total",
+    "Cache lookups by stage and result",
+    ("stage", "result")
+)
+TOKENS = registry.counter(
+    "maestroai_tokens_total",
+    "Model tokens used by stage",
+    ("stage", "kind")
+)
+
+
+class Span:
+    """
+    One timed unit of work.
+
+    Attributes are free-form, but a few are also folded into metrics when
+    the span ends: "cache" (hit result), "prompt_tokens" and
+    "completion_tokens".
+    """
+
+    __slots__ = ("name", "attributes", "parent", "start", "end", "error", "exported")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.start = 0.0
+        self.end = 0.0
+        self.error: Optional[str] = None
+        self.exported: Any = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+    @property
+    def outcome(self) -> str:
+        if self.error is None:
+            return "ok"
+        return "cancelled" if self.error == "CancelledError" else "error"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add(self, key: str, amount: float) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current: contextvars.ContextVar = contextvars.ContextVar("maestroai_span", default=None)
+_exporters: List[Any] = []
+_enabled = os.getenv("TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class _SpanScope:
+    __slots__ = ("_span", "_token")
+
+    def __init__(self, span_: Span):
+        self._span = span_
+
+    def __enter__(self) -> Span:
+        current = self._span
+        self._token = _current.set(current)
+        for exporter in _exporters:
+            exporter.on_start(current)
+        current.start = time.perf_counter()
+        return current
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        current = self._span
+        current.end = time.perf_counter()
+        _current.reset(self._token)
+        if exc_type is not None:
+            current.error = exc_type.__name__
+        _record(current)
+        for exporter in _exporters:
+            try:
+                exporter.on_end(current)
+            except Exception as e:
+                logger.debug(f"Span export failed: {str(e)}")
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return _NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SCOPE = _NoopScope()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Time a block as a span nested under the current one.
+
+    Usage:
+        with telemetry.span("classify") as s:
+            s.set("cache", "hit")
+    """
+    if not _enabled:
+        return _NOOP_SCOPE
+    return _SpanScope(Span(name, _current.get(), attributes))
+
+
+def current_span():
+    """The innermost active span, or a no-op stand-in outside any span."""
+    return _current.get() or _NOOP_SPAN
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span."""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def record(name: str, seconds: float, error: Optional[str] = None, **attributes: Any) -> None:
+    """
+    Record an already finished span.
+
+    For work that cannot sit inside a with-block, such as an async
+    generator that may be resumed from different tasks. Such spans go to
+    the metrics but not to exporters.
+    """
+    if not _enabled:
+        return
+    finished = Span(name, None, attributes)
+    finished.end = finished.start + seconds
+    finished.error = error
+    _record(finished)
+
+
+def _record(finished: Span) -> None:
+    name = finished.name
+    SPAN_SECONDS.observe(finished.end - finished.start, (name, finished.outcome))
+    if finished.outcome == "error":
+        SPAN_ERRORS.inc((name, finished.error))
+    attributes = finished.attributes
+    if "cache" in attributes:
+        CACHE_LOOKUPS.inc((name, str(attributes["cache"])))
+    for kind in ("prompt", "completion"):
+        tokens = attributes.get(f"{kind}_tokens")
+        if tokens:
+            TOKENS.inc((name, kind), tokens)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return registry.render()
+
+
+def add_exporter(exporter: Any) -> None:
+    """
+    Attach a span exporter.
+
+    Exporters provide on_start(span) and on_end(span). With none attached,
+    a span costs two clock reads and one histogram update.
+    """
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter: Any) -> None:
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+class OpenTelemetryExporter:
+    """
+    Mirror spans into OpenTelemetry.
+
+    Uses the globally configured tracer provider, so the OTLP (or other)
+    exporter is set up the usual OpenTelemetry way; without an SDK
+    installed the API falls back to no-op spans.
+    """
+
+    def __init__(self, tracer_name: str = "maestroai"):
+        from opentelemetry import trace
+        from opentelemetry.trace import Status, StatusCode
+
+        self._trace = trace
+        self._status = Status
+        self._error = StatusCode.ERROR
+        self.tracer = trace.get_tracer(tracer_name)
+
+    def on_start(self, started: Span) -> None:
+        context = None
+        if started.parent is not None and started.parent.exported is not None:
+            context = self._trace.set_span_in_context(started.parent.exported)
+        started.exported = self.tracer.start_span(started.name, context=context)
+
+    def on_end(self, finished: Span) -> None:
+        exported = finished.exported
+        if exported is None:
+            return
+        for key, value in finished.attributes.items():
+            if value is not None:
+                exported.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+        if finished.outcome == "error":
+            exported.set_attribute("error.type", finished.error)
+            exported.set_status(self._status(self._error, finished.error))
+        exported.end()
+
+
+if _enabled and os.getenv("TELEMETRY_OTEL_ENABLED", "false").lower() in ("1", "true", "yes"):
+    try:
+        add_exporter(OpenTelemetryExporter())
+    except ImportError:
+        logger.warning("TELEMETRY_OTEL_ENABLED is set but opentelemetry-api is not installed")
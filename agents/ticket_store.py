@@ -0,0 +1,248 @@
+"""
+Ticket Store
+Columnar, category-partitioned Parquet storage for ticket corpora
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    "id",
+    "subject",
+    "description",
+    "priority",
+    "category",
+    "created_at",
+    "requester_email",
+]
+
+PARTITION_COLUMN = "category"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+    except ImportError as e:
+        raise ImportError("The ticket store requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def schema():
+    """The stable Arrow schema of stored tickets."""
+    pa = _pyarrow()
+    return pa.schema([
+        ("id", pa.string()),
+        ("subject", pa.string()),
+        ("description", pa.string()),
+        ("priority", pa.string()),
+        ("category", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("requester_email", pa.string()),
+    ])
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp; naive values are taken as UTC."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif not value:
+        return None
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _normalize(ticket: Dict[str, Any]) -> Dict[str, Any]:
+    row = {column: ticket.get(column) for column in COLUMNS}
+    for column in COLUMNS:
+        if column != "created_at" and row[column] is not None:
+            row[column] = str(row[column])
+    row["category"] = row["category"] or "General"
+    row["created_at"] = parse_timestamp(row["created_at"])
+    return row
+
+
+class TicketWriter:
+    """
+    Buffered writer for a partitioned Parquet ticket dataset.
+
+    Tickets are buffered and flushed in row groups of batch_size, so the
+    writer's memory use does not grow with the corpus. Each flush adds new
+    files under category=<value>/ directories.
+    """
+
+    def __init__(self, root: str, batch_size: int = 50000, overwrite: bool = False):
+        """
+        Open a dataset directory for writing.
+
+        Args:
+            root: Dataset directory
+            batch_size: Tickets buffered per flush
+            overwrite: Delete existing Parquet files under root first
+        """
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._prefix = uuid.uuid4().hex[:12]
+        self._flushes = 0
+        if overwrite and self.root.exists():
+            for file in self.root.rglob("*.parquet"):
+                file.unlink()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def write(self, tickets: Iterable[Dict[str, Any]]) -> None:
+        """Add tickets, flushing whenever the buffer is full."""
+        for ticket in tickets:
+            self._buffer.append(_normalize(ticket))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered tickets out."""
+        if not self._buffer:
+            return
+        pa = _pyarrow()
+        table = pa.Table.from_pylist(self._buffer, schema=schema())
+        pa.dataset.write_dataset(
+            table,
+            self.root,
+            format="parquet",
+            partitioning=pa.dataset.partitioning(
+                pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"
+            ),
+            basename_template=f"part-{self._prefix}-{self._flushes:05d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        self.count += len(self._buffer)
+        self._flushes += 1
+        self._buffer = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "TicketWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_tickets(root: str, tickets: Iterable[Dict[str, Any]], overwrite: bool = True) -> int:
+    """Write tickets to a dataset directory and return how many were written."""
+    with TicketWriter(root, overwrite=overwrite) as writer:
+        writer.write(tickets)
+    return writer.count
+
+
+def _filter(
+    categories: Optional[Sequence[str]],
+    start: Optional[Any],
+    end: Optional[Any]
+):
+    pa = _pyarrow()
+    field = pa.dataset.field
+    expression = None
+
+    def both(left, right):
+        return right if left is None else left & right
+
+    if categories:
+        expression = both(expression, field(PARTITION_COLUMN).isin(list(categories)))
+    if start is not None:
+        expression = both(expression, field("created_at") >= pa.scalar(parse_timestamp(start), schema().field("created_at").type))
+    if end is not None:
+        expression = both(expression, field("created_at") < pa.scalar(parse_timestamp(end), schema().field("created_at").type))
+    return expression
+
+
+def dataset(root: str):
+    """Open a dataset directory as a pyarrow Dataset."""
+    pa = _pyarrow()
+    return pa.dataset.dataset(
+        root,
+        format="parquet",
+        schema=schema(),
+        partitioning=pa.dataset.partitioning(
+            pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"
+        ),
+    )
+
+
+def read_tickets(
+    root: str,
+    columns: Optional[Sequence[str]] = None,
+    categories: Optional[Sequence[str]] = None,
+    start: Optional[Any] = None,
+    end: Optional[Any] = None
+):
+    """
+    Read tickets as an Arrow table.
+
+    Only the requested columns are decoded. The category filter prunes
+    whole partition directories and the date range is pushed down to
+    Parquet row-group statistics. Use table.to_pandas() or
+    table.column(name).to_numpy() to hand the result on; numeric and
+    timestamp columns convert without copying.
+
+    Args:
+        root: Dataset directory
+        columns: Columns to load (default: all)
+        categories: Only tickets in these categories
+        start: Inclusive lower bound on created_at (datetime or ISO string)
+        end: Exclusive upper bound on created_at (datetime or ISO string)
+    """
+    return dataset(root).to_table(
+        columns=list(columns) if columns else None,
+        filter=_filter(categories, start, end),
+    )
+
+
+def iter_tickets(
+    root: str,
+    columns: Optional[Sequence[str]] = None,
+    categories: Optional[Sequence[str]] = None,
+    start: Optional[Any] = None,
+    end: Optional[Any] = None,
+    batch_size: int = 65536
+) -> Iterator[Dict[str, Any]]:
+    """Stream tickets as dicts, one record batch at a time."""
+    scanner = dataset(root).scanner(
+        columns=list(columns) if columns else None,
+        filter=_filter(categories, start, end),
+        batch_size=batch_size,
+    )
+    for batch in scanner.to_batches():
+        yield from batch.to_pylist()
+
+
+def load_ticket_records(paths: Iterable[str], columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream tickets from any mix of Parquet dataset directories, JSONL and
+    JSON array files, skipping paths that do not exist.
+    """
+    for path in paths:
+        source = Path(path)
+        if not source.exists():
+            logger.warning(f"Skipping missing ticket source: {path}")
+            continue
+        if source.is_dir():
+            yield from iter_tickets(path, columns=columns)
+        elif source.suffix == ".jsonl":
+            with open(source) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(source) as f:
+                yield from json.load(f)
@@ -0,0 +1,75 @@
+"""
+Token Counting
+Local prompt token counts with tiktoken, or a character estimate when it is
+not installed or its encoding cannot be loaded
+"""
+
+import functools
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# Chat formatting overhead per message and per reply priming, as documented
+# for the GPT-4 / GPT-3.5 chat formats
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# English prose averages about four characters per token
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: Optional[str]):
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed; estimating token counts from text length")
+        return None
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except Exception:
+            pass
+    try:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # The encoding is downloaded on first use, which fails offline
+        logger.warning(f"Could not load the {DEFAULT_ENCODING} encoding ({str(e)}); estimating token counts from text length")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Number of tokens in text for the given model's encoding."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+    """Prompt tokens a list of chat messages will be billed for."""
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE
+        for value in message.values():
+            if isinstance(value, str):
+                total += count_tokens(value, model)
+    return total
+
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
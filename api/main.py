@@ -3,18 +3,58 @@ MaestroAI REST API
 FastAPI application for HR Service Desk
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List
+import json
+import logging
 import os
+import sys
 from dotenv import load_dotenv
 
+# Allow running as `python api/main.py` from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import http_client, telemetry  # noqa: E402
+from agents.conversation import close_conversation_store  # noqa: E402
+from agents.health import HealthChecker, build_checker  # noqa: E402
+from agents.job_queue import PRIORITIES, JobWorkerPool, get_job_queue  # noqa: E402
+from agents.orchestrator import get_orchestrator, run_ticket_job  # noqa: E402
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+health_checker = build_checker()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the ticket job workers for the lifetime of the app, then flush conversations and close clients."""
+    pool = None
+    workers = int(os.getenv("JOB_WORKERS", "4"))
+    if workers > 0:
+        pool = JobWorkerPool(
+            get_job_queue(),
+            run_ticket_job,
+            concurrency=workers,
+            visibility_timeout=float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120"))
+        )
+        pool.start()
+    yield
+    if pool is not None:
+        await pool.stop()
+    await close_conversation_store()
+    await http_client.aclose_all()
+
+
 app = FastAPI(
     title="MaestroAI HR Service Desk API",
     description="Multi-agent HR Service Desk automation API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
@@ -25,6 +65,22 @@ class ServiceRequest(BaseModel):
     context: Optional[Dict[str, Any]] = None
 
 
+class BatchRequest(BaseModel):
+    """Batch of service requests."""
+    items: List[ServiceRequest]
+    concurrency: Optional[int] = None
+
+
+class InvalidationRequest(BaseModel):
+    """Policies whose cached answers should be dropped."""
+    policy_ids: List[str]
+
+
+class TicketRequest(ServiceRequest):
+    """Service request queued for background processing."""
+    priority: str = "interactive"
+
+
 class ServiceResponse(BaseModel):
     """Service response model."""
     intent: str
@@ -34,6 +90,7 @@ class ServiceResponse(BaseModel):
     runbook_executed: bool = False
     escalated: bool = False
     explanation: str
+    degraded: List[str] = []
 
 
 @app.get("/")
@@ -48,22 +105,60 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """
+    Health check endpoint.
+    
+    Reports every dependency with its status and last probe latency.
+    Probes run concurrently and the report is cached for
+    HEALTH_CACHE_TTL_SECONDS.
+    """
+    results = await health_checker.check()
     return {
-        "status": "healthy",
-        "services": {
-            "openai": "connected",
-            "cosmos": "connected",
-            "search": "connected"
-        }
+        "status": HealthChecker.status(results),
+        "checked_seconds_ago": round(health_checker.age, 3),
+        "services": {name: result.to_dict() for name, result in results.items()}
     }
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process is up and serving; never touches dependencies."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: 503 while a critical dependency is failing its probe."""
+    results = await health_checker.check()
+    ready = HealthChecker.ready(results)
+    return JSONResponse(
+        {
+            "status": "ready" if ready else "not_ready",
+            "failing": [
+                name for name, result in results.items()
+                if result.critical and result.status == "error"
+            ]
+        },
+        status_code=200 if ready else 503
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage latency histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(
+        telemetry.render_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.post("/api/process", response_model=ServiceResponse)
-async def process_request(request: ServiceRequest):
+async def process_request(request: ServiceRequest, response: Response):
     """
     Process a service desk request through the multi-agent system.
     
+    Per-stage timings are reported in the Server-Timing header.
+    
     Args:
         request: Service request with user message and context
         
@@ -71,21 +166,154 @@ async def process_request(request: ServiceRequest):
         ServiceResponse with processed result
     """
     try:
-        # TODO: Call orchestrator agent
-        # For now, return a mock response
-        return ServiceResponse(
-            intent="LEAVE_REQUEST",
-            confidence=0.95,
-            answer="Your leave request has been processed. I've checked your leave balance and policy compliance.",
-            knowledge_used={"policies": ["Sick Leave Policy"]},
-            runbook_executed=True,
-            escalated=False,
-            explanation="The system classified your request as a leave request, retrieved relevant policies, and executed the leave request runbook."
+        result = await get_orchestrator().process_request(
+            request.message,
+            request.user_id,
+            request.context
+        )
+        timings = result.pop("stage_timings_ms", {})
+        response.headers["Server-Timing"] = ", ".join(
+            f"{stage};dur={ms}" for stage, ms in timings.items()
         )
+        return ServiceResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/process/stream")
+async def process_request_stream(request: ServiceRequest):
+    """
+    Process a service desk request, streaming progress as server-sent events.
+    
+    Emits intent, knowledge, runbook and escalation events as each stage
+    finishes, answer events carrying text deltas, and a final done event
+    with the complete ServiceResponse. Failures end the stream with an
+    error event.
+    """
+    async def events() -> AsyncIterator[str]:
+        # Flush headers straight away so clients see the first byte now
+        yield ": stream opened\n\n"
+        try:
+            async for event, data in get_orchestrator().stream_request(
+                request.message,
+                request.user_id,
+                request.context
+            ):
+                if event == "done":
+                    timings = data.pop("stage_timings_ms", {})
+                    data = dict(ServiceResponse(**data).model_dump(), stage_timings_ms=timings)
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f"Error streaming request: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/process/batch")
+async def process_batch(request: BatchRequest):
+    """
+    Process many service requests, streaming NDJSON results as they finish.
+    
+    Each line carries the item's index and either a ServiceResponse under
+    "result" or an "error". Concurrency defaults to, and is capped at,
+    BATCH_MAX_CONCURRENCY; at most BATCH_MAX_ITEMS items are accepted.
+    """
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "10000"))
+    if len(request.items) > max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.items)} items exceeds the limit of {max_items}"
+        )
+    max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+    concurrency = min(request.concurrency or max_concurrency, max_concurrency)
+    
+    async def lines() -> AsyncIterator[str]:
+        async for item in get_orchestrator().process_batch(
+            [(i.message, i.user_id, i.context) for i in request.items],
+            concurrency=max(1, concurrency)
+        ):
+            if "result" in item:
+                result = dict(item["result"])
+                result.pop("stage_timings_ms", None)
+                try:
+                    item = dict(item, result=ServiceResponse(**result).model_dump())
+                except Exception as e:
+                    item = {k: v for k, v in item.items() if k != "result"}
+                    item.update(error=str(e), error_type=type(e).__name__)
+            yield json.dumps(item, default=str) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/tickets", status_code=202)
+async def submit_ticket(request: TicketRequest):
+    """
+    Queue a service request and return its job ID immediately.
+    
+    Poll GET /api/tickets/{job_id} for the result. Interactive tickets are
+    processed before normal and bulk ones.
+    """
+    if request.priority not in PRIORITIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown priority '{request.priority}' (expected one of {', '.join(PRIORITIES)})"
+        )
+    job = await get_job_queue().enqueue(
+        {"message": request.message, "user_id": request.user_id, "context": request.context},
+        priority=PRIORITIES[request.priority],
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    )
+    return JSONResponse(
+        {"job_id": job.id, "status": job.status},
+        status_code=202,
+        headers={"Location": f"/api/tickets/{job.id}"}
+    )
+
+
+@app.get("/api/tickets/{job_id}")
+async def get_ticket(job_id: str):
+    """Status of a queued ticket, with its result once processed."""
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
+
+
+@app.post("/api/cache/invalidate")
+async def invalidate_answers(request: InvalidationRequest):
+    """
+    Drop cached answers written from the given policies.
+    
+    Call after editing a policy whose last_updated was not changed; a new
+    last_updated already keeps old answers from being served.
+    """
+    cache = get_orchestrator().answer_cache
+    if cache is None:
+        return {"invalidated": 0}
+    dropped = 0
+    for policy_id in request.policy_ids:
+        dropped += await cache.invalidate_policy(policy_id)
+    return {"invalidated": dropped}
+
+
 @app.get("/api/intents")
 async def list_intents():
     """List all supported intent categories."""
@@ -0,0 +1,4 @@
+"""
+MaestroAI Benchmarks
+End-to-end load tests against local stand-ins for the downstream agents
+"""
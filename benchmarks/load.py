@@ -0,0 +1,186 @@
+"""
+Load Generation
+Closed- and open-loop request drivers and latency reporting
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+# A sender performs one request and returns (status code, stage timings in
+# ms, time to the first streamed event in ms or None)
+Sender = Callable[[str], Awaitable[Tuple[int, Dict[str, float], Optional[float]]]]
+
+
+@dataclass
+class Sample:
+    """Outcome of one request."""
+
+    latency_ms: float
+    status: int
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    first_event_ms: Optional[float] = None
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values (q in 0..100)."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def distribution(values: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max of a list of latencies."""
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "p50": round(percentile(ordered, 50), 3),
+        "p95": round(percentile(ordered, 95), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Parse a Server-Timing header into {metric: duration_ms}."""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if name and key == "dur":
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+async def _measure(send: Sender, message: str, started: float) -> Sample:
+    sent = time.perf_counter()
+    try:
+        status, stages, first_event_ms = await send(message)
+        error = None
+    except Exception as e:
+        status, stages, error, first_event_ms = 0, {}, f"{type(e).__name__}: {e}", None
+    if first_event_ms is not None:
+        # Count any wait before sending, as for the total latency
+        first_event_ms += (sent - started) * 1000
+    return Sample((time.perf_counter() - started) * 1000, status, stages, error, first_event_ms)
+
+
+async def run_closed_loop(
+    send: Sender,
+    messages: Sequence[str],
+    concurrency: int,
+    duration: Optional[float] = None,
+    total: Optional[int] = None
+) -> Tuple[List[Sample], float]:
+    """
+    Keep a fixed number of requests in flight.
+
+    Stops after duration seconds or total requests, whichever comes first.
+
+    Returns:
+        Tuple of (samples, elapsed seconds)
+    """
+    samples: List[Sample] = []
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while (total is None or issued < total) and (deadline is None or time.perf_counter() < deadline):
+            issued += 1
+            samples.append(await _measure(send, random.choice(messages), time.perf_counter()))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples, time.perf_counter() - started
+
+
+async def run_open_loop(
+    send: Sender,
+    messages: Sequence[str],
+    rps: float,
+    duration: float,
+    max_in_flight: int = 1000
+) -> Tuple[List[Sample], float]:
+    """
+    Issue requests on a fixed arrival schedule regardless of responses.
+
+    Latency is measured from each request's scheduled start, so queueing
+    behind a slow server shows up in the numbers instead of silently
+    lowering the offered load (coordinated omission).
+
+    Returns:
+        Tuple of (samples, elapsed seconds)
+    """
+    samples: List[Sample] = []
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = []
+    interval = 1.0 / rps
+    started = time.perf_counter()
+
+    async def one(scheduled: float):
+        async with slots:
+            samples.append(await _measure(send, random.choice(messages), scheduled))
+
+    for i in range(int(rps * duration)):
+        scheduled = started + i * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(scheduled)))
+
+    await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Aggregate samples into the JSON report body."""
+    ok = [s for s in samples if 200 <= s.status < 300]
+    failed = [s for s in samples if not 200 <= s.status < 300]
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for sample in ok:
+        for name, ms in sample.stages.items():
+            stages[name].append(ms)
+    errors = Counter(s.error or f"HTTP {s.status}" for s in failed)
+    first_events = [s.first_event_ms for s in ok if s.first_event_ms is not None]
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": distribution([s.latency_ms for s in ok]),
+        "first_event_ms": distribution(first_events) if first_events else None,
+        "stages_ms": {name: distribution(values) for name, values in sorted(stages.items())},
+        "status_codes": dict(Counter(str(s.status) for s in samples)),
+        "errors": dict(errors.most_common(10)),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Percentage change of the headline metrics against a baseline report.
+
+    Positive values are regressions: higher latency or lower throughput.
+    """
+    deltas = {}
+    for key in ("p50", "p95", "p99"):
+        before = baseline.get("latency_ms", {}).get(key)
+        if before:
+            deltas[f"latency_{key}"] = round((report["latency_ms"][key] - before) / before * 100, 2)
+    before = baseline.get("throughput_rps")
+    if before:
+        deltas["throughput"] = round((before - report["throughput_rps"]) / before * 100, 2)
+    return deltas
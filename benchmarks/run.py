@@ -0,0 +1,314 @@
+"""
+End-to-end Benchmark
+Drives /api/process (or OrchestratorAgent.process_request in-process)
+against local stand-in agents and writes a JSON latency report
+
+Examples:
+
+    # 32 requests in flight for 30 seconds
+    python -m benchmarks.run --concurrency 32 --duration 30 --output bench.json
+
+    # Fixed 200 RPS arrival rate with a slow, flaky OpenAI fake behind the
+    # real intent classifier, compared against an earlier report
+    python -m benchmarks.run --rps 200 --intent-backend openai \\
+        --latency openai=600:2500 --error-rate openai=0.02 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import httpx
+
+from .load import Sender, compare, parse_server_timing, run_closed_loop, run_open_loop, summarize
+from .standins import AGENTS
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MESSAGES = [
+    "How many sick days do I have left this year?",
+    "I'd like to request vacation from March 3rd to March 7th",
+    "What is the remote work policy?",
+    "Does our dental insurance cover orthodontics?",
+    "I need to update my bank account for payroll",
+    "How do I apply for maternity leave?",
+    "Am I allowed to work from another country for two weeks?",
+    "When does open enrollment for benefits start?",
+    "I want to file a complaint about my manager",
+    "Can you change my home address in the HR system?",
+    "What is the dress code policy for client meetings?",
+    "How much pension contribution does the company match?",
+]
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    """Poll a health URL until it answers 200 or the process dies."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def launch(command: List[str], env: Dict[str, str], health_url: str) -> Iterator[subprocess.Popen]:
+    """Start a server subprocess, wait for it to be healthy, stop it afterwards."""
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env)
+    try:
+        wait_until_healthy(health_url, process)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def parse_profiles(latency: List[str], error_rate: List[str]) -> Dict[str, Dict[str, float]]:
+    """Turn --latency AGENT=P50[:P99] and --error-rate AGENT=RATE into profile overrides."""
+    profiles: Dict[str, Dict[str, float]] = {}
+    for spec in latency or []:
+        name, _, value = spec.partition("=")
+        p50, _, p99 = value.partition(":")
+        profiles.setdefault(name, {})["p50_ms"] = float(p50)
+        profiles[name]["p99_ms"] = float(p99 or p50)
+    for spec in error_rate or []:
+        name, _, value = spec.partition("=")
+        profiles.setdefault(name, {})["error_rate"] = float(value)
+    for name in profiles:
+        if name not in AGENTS:
+            raise ValueError(f"Unknown stand-in: {name} (expected one of {', '.join(AGENTS)})")
+    return profiles
+
+
+def agent_env(args, standin_url: str) -> Dict[str, str]:
+    """Environment that points the orchestrator at the stand-ins."""
+    env = dict(os.environ)
+    env.update({
+        "INTENT_CLASSIFIER_URL": f"{standin_url}/intent",
+        "KNOWLEDGE_RETRIEVAL_URL": f"{standin_url}/knowledge",
+        "RUNBOOK_EXECUTOR_URL": f"{standin_url}/runbook",
+        "ESCALATION_URL": f"{standin_url}/escalation",
+        "KNOWLEDGE_BACKEND": args.knowledge,
+        "TICKET_EMBEDDINGS_PATH": "",
+        # The real classifier (with --intent-backend openai) should reach the
+        # fake model on every request unless told otherwise
+        "OPENAI_ENDPOINT": standin_url,
+        "OPENAI_API_KEY": "standin",
+        "INTENT_CACHE_ENABLED": "false",
+        "LOCAL_INTENT_MODEL_PATH": "",
+    })
+    for spec in args.env or []:
+        key, _, value = spec.partition("=")
+        env[key] = value
+    return env
+
+
+def http_sender(client: httpx.AsyncClient, url: str) -> Sender:
+    """Send requests to a running API and read stage timings from Server-Timing."""
+    async def send(message: str):
+        response = await client.post(url, json={"message": message, "user_id": "bench"})
+        return response.status_code, parse_server_timing(response.headers.get("server-timing")), None
+    return send
+
+
+def sse_sender(client: httpx.AsyncClient, url: str) -> Sender:
+    """Consume /api/process/stream, timing the first event and reading stages from done."""
+    async def send(message: str):
+        started = time.perf_counter()
+        first_event_ms = None
+        stages: Dict[str, float] = {}
+        async with client.stream("POST", url, json={"message": message, "user_id": "bench"}) as response:
+            event = None
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                    if first_event_ms is None:
+                        first_event_ms = (time.perf_counter() - started) * 1000
+                elif line.startswith("data:") and event == "done":
+                    stages = json.loads(line[5:]).get("stage_timings_ms", {})
+                elif line.startswith("data:") and event == "error":
+                    return 500, stages, first_event_ms
+        return response.status_code, stages, first_event_ms
+    return send
+
+
+def in_process_sender(env: Dict[str, str]) -> Sender:
+    """Call OrchestratorAgent.process_request directly, bypassing HTTP."""
+    os.environ.update(env)
+    sys.path.insert(0, str(REPO_ROOT))
+    from agents.orchestrator import get_orchestrator
+
+    orchestrator = get_orchestrator()
+
+    async def send(message: str):
+        result = await orchestrator.process_request(message, "bench")
+        return 200, result.get("stage_timings_ms", {}), None
+    return send
+
+
+async def drive(args, send: Sender) -> Dict[str, Any]:
+    """Warm up, then run the measured load phase."""
+    if args.warmup:
+        await run_closed_loop(send, MESSAGES, args.concurrency, duration=args.warmup)
+    if args.rps:
+        samples, elapsed = await run_open_loop(
+            send, MESSAGES, args.rps, args.duration, max_in_flight=args.max_in_flight
+        )
+    else:
+        samples, elapsed = await run_closed_loop(
+            send, MESSAGES, args.concurrency, duration=args.duration, total=args.requests
+        )
+    return summarize(samples, elapsed)
+
+
+async def run_benchmark(args, standin_url: str, target: str, env: Dict[str, str]) -> Dict[str, Any]:
+    if args.in_process:
+        return await drive(args, in_process_sender(env))
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.max_in_flight if args.rps else 0))
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        if args.stream:
+            return await drive(args, sse_sender(client, f"{target}/api/process/stream"))
+        return await drive(args, http_sender(client, f"{target}/api/process"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end orchestration benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (closed loop, default: 16)")
+    parser.add_argument("--rps", type=float, help="Fixed arrival rate instead of a closed loop")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds (default: 20)")
+    parser.add_argument("--requests", type=int, help="Stop a closed-loop run after this many requests")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured warm-up seconds (default: 2)")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop in-flight cap (default: 1000)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        metavar="AGENT=P50[:P99]",
+        help=f"Stand-in latency in ms, repeatable; agents: {', '.join(AGENTS)}"
+    )
+    parser.add_argument("--error-rate", action="append", metavar="AGENT=RATE", help="Stand-in failure rate, repeatable")
+    parser.add_argument(
+        "--intent-backend",
+        choices=["stub", "openai"],
+        default="stub",
+        help="Intent stand-in answers from keywords or runs the real classifier against the OpenAI fake"
+    )
+    parser.add_argument(
+        "--knowledge",
+        choices=["remote", "local"],
+        default="remote",
+        help="Use the knowledge stand-in or the in-process index (default: remote)"
+    )
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE", help="Extra environment for the servers")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn workers for api/main.py (default: 1)")
+    parser.add_argument("--target", type=str, help="Benchmark an already running API at this base URL")
+    parser.add_argument("--in-process", action="store_true", help="Call process_request directly instead of over HTTP")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Drive /api/process/stream and report time to first event"
+    )
+    parser.add_argument("--output", type=str, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=str, help="Earlier report to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="Exit non-zero if any compared metric regresses by more than this percentage"
+    )
+
+    args = parser.parse_args()
+
+    profiles = parse_profiles(args.latency, args.error_rate)
+    standin_port = free_port()
+    standin_url = f"http://127.0.0.1:{standin_port}"
+    env = agent_env(args, standin_url)
+
+    with ExitStack() as stack:
+        stack.enter_context(launch(
+            [
+                sys.executable, "-m", "benchmarks.standins",
+                "--port", str(standin_port),
+                "--profiles", json.dumps(profiles),
+                "--intent-backend", args.intent_backend,
+            ],
+            env,
+            f"{standin_url}/health"
+        ))
+
+        target = args.target
+        if not target and not args.in_process:
+            api_port = free_port()
+            target = f"http://127.0.0.1:{api_port}"
+            stack.enter_context(launch(
+                [
+                    sys.executable, "-m", "uvicorn", "api.main:app",
+                    "--port", str(api_port),
+                    "--workers", str(args.api_workers),
+                    "--log-level", "warning",
+                ],
+                env,
+                f"{target}/health"
+            ))
+
+        print(f"🚀 Benchmarking {'process_request' if args.in_process else target} "
+              f"({f'{args.rps} rps' if args.rps else f'concurrency {args.concurrency}'}, {args.duration}s)...")
+        report = {
+            "benchmark": {
+                "mode": "in-process" if args.in_process else ("sse" if args.stream else "http"),
+                "target": None if args.in_process else target,
+                "concurrency": None if args.rps else args.concurrency,
+                "rps": args.rps,
+                "duration_s": args.duration,
+                "intent_backend": args.intent_backend,
+                "knowledge": args.knowledge,
+                "profiles": profiles,
+            },
+            # Only compare reports taken on comparable hosts
+            "host": {"cpus": os.cpu_count(), "python": platform.python_version()},
+            **asyncio.run(run_benchmark(args, standin_url, target, env)),
+            "standins": httpx.get(f"{standin_url}/stats").json(),
+        }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved report to: {args.output}")
+
+    if args.max_regression is not None and any(
+        delta > args.max_regression for delta in report.get("comparison", {}).values()
+    ):
+        print(f"❌ Regression above {args.max_regression}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Stand-in Servers
+Local fakes of the intent, knowledge, runbook and escalation agents and of
+the Azure OpenAI endpoint, with configurable latency and error rates
+
+Run as a module to serve all of them from one process:
+
+    python -m benchmarks.standins --port 9100 --profiles '{"openai": {"p50_ms": 400}}'
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from agents.embeddings import HashingEmbedder  # noqa: E402
+
+AGENTS = ("intent", "knowledge", "runbook", "escalation", "openai")
+
+# 99th percentile of the standard normal distribution
+Z_99 = 2.326
+
+INTENT_KEYWORDS = [
+    ("LEAVE_REQUEST", ("leave", "sick", "vacation", "day off", "pto", "maternity")),
+    ("BENEFITS_QUERY", ("benefit", "insurance", "dental", "pension", "401k")),
+    ("EMPLOYEE_DATA", ("address", "payslip", "bank", "my record", "personal")),
+    ("POLICY_QUESTION", ("policy", "remote", "allowed", "rule", "dress code")),
+    ("ESCALATION", ("complaint", "harass", "urgent", "manager")),
+]
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Latency and failure behaviour of one stand-in.
+
+    Latencies follow a log-normal distribution fitted to the given median
+    and 99th percentile, which matches the long right tail of real service
+    calls far better than a fixed delay.
+    """
+
+    p50_ms: float = 20.0
+    p99_ms: float = 80.0
+    error_rate: float = 0.0
+    # Delay between streamed tokens, after the sampled time to first token
+    token_ms: float = 0.0
+
+    def sample_ms(self) -> float:
+        if self.p50_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99_ms, self.p50_ms) / self.p50_ms) / Z_99
+        return random.lognormvariate(math.log(self.p50_ms), sigma)
+
+
+DEFAULT_PROFILES = {
+    "intent": LatencyProfile(30, 120),
+    "knowledge": LatencyProfile(40, 150),
+    "runbook": LatencyProfile(60, 250),
+    "escalation": LatencyProfile(15, 60),
+    "openai": LatencyProfile(350, 1500, token_ms=20),
+}
+
+STREAMED_ANSWER = (
+    "Thanks for reaching out. Based on the relevant HR policy, your request "
+    "has been recorded and you will receive a confirmation by email shortly."
+)
+
+
+def build_profiles(overrides: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, LatencyProfile]:
+    """Merge per-agent overrides into the default profiles."""
+    profiles = {name: LatencyProfile(**asdict(p)) for name, p in DEFAULT_PROFILES.items()}
+    for name, values in (overrides or {}).items():
+        if name not in profiles:
+            raise ValueError(f"Unknown stand-in: {name} (expected one of {', '.join(AGENTS)})")
+        for key, value in values.items():
+            setattr(profiles[name], key, float(value))
+    return profiles
+
+
+def keyword_intent(message: str) -> str:
+    """Cheap deterministic intent guess used by the fakes."""
+    lowered = message.lower()
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return intent
+    return "UNKNOWN"
+
+
+def _load_policies() -> List[Dict[str, Any]]:
+    path = REPO_ROOT / "knowledge_base" / "hr_policies.json"
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+class StandIn:
+    """Applies a latency profile and counts what was served."""
+
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+        self.requests = 0
+        self.errors = 0
+
+    async def delay_or_fail(self) -> Optional[JSONResponse]:
+        """Sleep for a sampled latency; return an error response if one is injected."""
+        self.requests += 1
+        await asyncio.sleep(self.profile.sample_ms() / 1000)
+        if random.random() < self.profile.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return None
+
+
+def create_app(
+    profiles: Optional[Dict[str, LatencyProfile]] = None,
+    intent_backend: str = "stub"
+) -> FastAPI:
+    """
+    Build the stand-in application.
+
+    Routes:
+        POST /intent, /knowledge, /runbook, /escalation: agent fakes
+        POST /openai/deployments/{name}/chat/completions and /embeddings:
+            Azure OpenAI fake
+        GET /health, /stats
+
+    Args:
+        profiles: Latency profile per stand-in (defaults to DEFAULT_PROFILES)
+        intent_backend: "stub" answers /intent from keywords; "openai" runs
+            the real IntentClassifierAgent, configured through OPENAI_* to
+            call the /openai fake
+    """
+    profiles = profiles or build_profiles()
+    standins = {name: StandIn(profiles[name]) for name in AGENTS}
+    policies = _load_policies()
+    embedder = HashingEmbedder(dim=256)
+    app = FastAPI(title="MaestroAI stand-ins")
+    classifier = None
+
+    if intent_backend == "openai":
+        from agents.intent_classifier import IntentClassifierAgent
+
+        classifier = IntentClassifierAgent()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            name: {"requests": s.requests, "errors": s.errors, **asdict(s.profile)}
+            for name, s in standins.items()
+        }
+
+    @app.post("/intent")
+    async def intent(request: Request):
+        body = await request.json()
+        if classifier is not None:
+            return await classifier.classify(body.get("message", ""), body.get("context"))
+        failure = await standins["intent"].delay_or_fail()
+        if failure is not None:
+            return failure
+        return {
+            "intent": keyword_intent(body.get("message", "")),
+            "confidence": 0.92,
+            "entities": {},
+            "requires_clarification": False
+        }
+
+    @app.post("/knowledge")
+    async def knowledge(request: Request):
+        body = await request.json()
+        failure = await standins["knowledge"].delay_or_fail()
+        if failure is not None:
+            return failure
+        words = set(body.get("message", "").lower().split())
+        ranked = sorted(
+            policies,
+            key=lambda p: -len(words & set(f"{p.get('title', '')} {p.get('content', '')}".lower().split()))
+        )
+        return {"policies": ranked[:3], "faqs": [], "relevance_score": 0.8}
+
+    @app.post("/runbook")
+    async def runbook(request: Request):
+        body = await request.json()
+        failure = await standins["runbook"].delay_or_fail()
+        if failure is not None:
+            return failure
+        intent_name = (body.get("intent") or {}).get("intent")
+        return {"status": "completed", "runbook": f"{str(intent_name).lower()}_runbook", "steps": 3}
+
+    @app.post("/escalation")
+    async def escalation(request: Request):
+        body = await request.json()
+        failure = await standins["escalation"].delay_or_fail()
+        if failure is not None:
+            return failure
+        intent_name = (body.get("intent") or {}).get("intent")
+        return {
+            "escalate": intent_name == "ESCALATION",
+            "reason": "Sensitive request" if intent_name == "ESCALATION" else None
+        }
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        failure = await standins["openai"].delay_or_fail()
+        if failure is not None:
+            return failure
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chat(deployment, body), media_type="text/event-stream"
+            )
+        message = body["messages"][-1]["content"]
+        content = json.dumps({
+            "intent": keyword_intent(message),
+            "confidence": 0.9,
+            "entities": {},
+            "requires_clarification": False
+        })
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": deployment,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    async def stream_chat(deployment: str, body: Dict[str, Any]):
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, usage=None) -> str:
+            payload = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [] if usage else [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                "usage": usage
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        words = STREAMED_ANSWER.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(standins["openai"].profile.token_ms / 1000)
+            yield chunk({"content": word if i == 0 else f" {word}"})
+        yield chunk({}, "stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+            yield chunk({}, usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(words),
+                "total_tokens": prompt_tokens + len(words)
+            })
+        yield "data: [DONE]\n\n"
+
+    @app.post("/openai/deployments/{deployment}/embeddings")
+    async def embeddings(deployment: str, request: Request):
+        body = await request.json()
+        failure = await standins["openai"].delay_or_fail()
+        if failure is not None:
+            return failure
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        vectors = embedder.embed_sync(texts)
+        tokens = sum(len(str(t)) for t in texts) // 4
+        return {
+            "object": "list",
+            "model": deployment,
+            "data": [
+                {"object": "embedding", "index": i, "embedding": vector.tolist()}
+                for i, vector in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the benchmark stand-ins")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument(
+        "--profiles",
+        type=str,
+        default="{}",
+        help='JSON overrides, e.g. {"openai": {"p50_ms": 400, "error_rate": 0.01}}'
+    )
+    parser.add_argument(
+        "--intent-backend",
+        choices=["stub", "openai"],
+        default="stub",
+        help="Answer /intent from keywords or via the real classifier (default: stub)"
+    )
+
+    args = parser.parse_args()
+
+    import uvicorn
+
+    if args.intent_backend == "openai":
+        # Point the real classifier at this process's OpenAI fake
+        os.environ.setdefault("OPENAI_ENDPOINT", f"http://{args.host}:{args.port}")
+        os.environ.setdefault("OPENAI_API_KEY", "standin")
+    app = create_app(build_profiles(json.loads(args.profiles)), args.intent_backend)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
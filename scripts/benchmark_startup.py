@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures cold-import time and first vs. warm request latency of the
+Azure Function entry points
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter so every measurement is a true cold start.
+PROBE = r"""
+import asyncio, json, sys, time
+
+t0 = time.perf_counter()
+import {module} as target
+import_ms = (time.perf_counter() - t0) * 1000
+
+from azure.functions import HttpRequest
+
+def make_request():
+    return HttpRequest(
+        method="POST",
+        url="/api/{name}",
+        body=json.dumps({payload}).encode(),
+        headers={{"Content-Type": "application/json"}},
+    )
+
+async def invoke():
+    t = time.perf_counter()
+    await target.main(make_request())
+    return (time.perf_counter() - t) * 1000
+
+async def run():
+    first = await invoke()
+    warm = [await invoke() for _ in range({warm_requests})]
+    return first, warm
+
+first_ms, warm_ms = asyncio.run(run())
+print(json.dumps({{"import_ms": import_ms, "first_request_ms": first_ms, "warm_request_ms": warm_ms}}))
+"""
+
+TARGETS = {
+    "orchestrator": {
+        "module": "agents.orchestrator",
+        "payload": {"message": "How many sick days do I have left?", "user_id": "bench"},
+    },
+    "intent_classifier": {
+        "module": "agents.intent_classifier",
+        "payload": {"message": "How many sick days do I have left?"},
+    },
+}
+
+
+def run_probe(name: str, warm_requests: int) -> dict:
+    """Run one cold-start probe for a target in a fresh subprocess."""
+    target = TARGETS[name]
+    code = PROBE.format(
+        module=target["module"],
+        name=name,
+        payload=repr(target["payload"]),
+        warm_requests=warm_requests,
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    """Reduce a list of millisecond samples to median/min/max."""
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def benchmark(targets: list, runs: int, warm_requests: int) -> dict:
+    """Benchmark each target over several cold starts."""
+    report = {}
+    for name in targets:
+        print(f"⏱️  Benchmarking {name} ({runs} cold starts)...", file=sys.stderr)
+        probes = [run_probe(name, warm_requests) for _ in range(runs)]
+        warm = [ms for probe in probes for ms in probe["warm_request_ms"]]
+        report[name] = {
+            "cold_import": summarize([p["import_ms"] for p in probes]),
+            "first_request": summarize([p["first_request_ms"] for p in probes]),
+            "warm_request": summarize(warm) if warm else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent cold starts")
+    parser.add_argument(
+        "--target",
+        choices=sorted(TARGETS),
+        action="append",
+        help="Entry point to benchmark (default: orchestrator). Benchmarking "
+             "intent_classifier sends real requests to Azure OpenAI."
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Number of cold starts per target (default: 5)"
+    )
+    parser.add_argument(
+        "--warm-requests",
+        type=int,
+        default=10,
+        help="Requests per cold start after the first one (default: 10)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Optional path to write the JSON report to"
+    )
+
+    args = parser.parse_args()
+
+    report = benchmark(args.target or ["orchestrator"], args.runs, args.warm_requests)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
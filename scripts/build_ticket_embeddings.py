@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Build Ticket Embeddings
+Embeds historical tickets into a memory-mapped store for similar-ticket
+lookups
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.embedding_store import EmbeddingStore  # noqa: E402
+from agents.embeddings import AzureOpenAIEmbedder, HashingEmbedder  # noqa: E402
+from agents.ticket_store import load_ticket_records  # noqa: E402
+
+load_dotenv()
+
+DEFAULT_INPUTS = [
+    "data/tickets/helpdesk",
+    "data/tickets/synthetic",
+]
+
+
+def load_tickets(paths):
+    """Load the needed ticket columns from Parquet datasets or JSON/JSONL files."""
+    tickets = list(load_ticket_records(paths, columns=["id", "subject", "description"]))
+    print(f"📂 Loaded {len(tickets)} tickets from {len(paths)} source(s)")
+    return tickets
+
+
+def ticket_text(ticket) -> str:
+    """Text embedded for a ticket."""
+    return f"{ticket.get('subject', '')} {ticket.get('description', '')}".strip()
+
+
+def build(inputs, output, embedder_name, dtype, nlist, batch_size):
+    """Embed tickets in batches and write the store."""
+    tickets = [t for t in load_tickets(inputs) if ticket_text(t)]
+    if not tickets:
+        print("❌ Error: no tickets to embed")
+        sys.exit(1)
+
+    embedder = AzureOpenAIEmbedder() if embedder_name == "azure" else HashingEmbedder()
+    print(f"🧮 Embedding {len(tickets)} tickets with {embedder.name}...")
+
+    def batches():
+        loop = asyncio.new_event_loop()
+        try:
+            for start in range(0, len(tickets), batch_size):
+                chunk = tickets[start:start + batch_size]
+                yield loop.run_until_complete(embedder.embed([ticket_text(t) for t in chunk]))
+                print(f"  ✅ {min(start + batch_size, len(tickets))}/{len(tickets)}")
+        finally:
+            loop.close()
+
+    ids = [str(t.get("id") or f"ticket_{i}") for i, t in enumerate(tickets)]
+    EmbeddingStore.build(output, ids, batches(), embedder.name, dtype=dtype, nlist=nlist)
+    print(f"💾 Saved embedding store to: {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the similar-ticket embedding store")
+    parser.add_argument(
+        "--input",
+        action="append",
+        help="Parquet ticket dataset or JSON/JSONL file (repeatable, default: both generated corpora)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="data/ticket_embeddings",
+        help="Store directory (default: data/ticket_embeddings)"
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=["azure", "hashing"],
+        default="azure",
+        help="Embedding backend (default: azure, needs OPENAI_EMBEDDING_DEPLOYMENT)"
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float16", "float32"],
+        default="float16",
+        help="On-disk vector precision (default: float16)"
+    )
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=0,
+        help="IVF partitions, recommended above ~100k tickets; 0 builds a flat store (default: 0)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=256,
+        help="Tickets per embedding batch (default: 256)"
+    )
+
+    args = parser.parse_args()
+
+    build(args.input or DEFAULT_INPUTS, args.output, args.embedder, args.dtype, args.nlist, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
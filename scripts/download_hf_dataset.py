@@ -2,118 +2,240 @@
 """
 Download Hugging Face IT Help Desk Synthetic Tickets Dataset
 Converts IT tickets to HR context for MaestroAI
+
+Tickets are streamed through the conversion and written incrementally to
+a category-partitioned Parquet dataset (plus a CSV for viewing), so memory
+use stays flat regardless of dataset size.
 """
 
 import os
+import re
 import sys
+import csv
 import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datasets import load_dataset
+from typing import Any, Dict, Iterable, Iterator, List
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.ticket_store import TicketWriter  # noqa: E402
+
 load_dotenv()
 
+CATEGORY_MAPPING = {
+    "Network": "IT_Support",
+    "Software": "Software_Access",
+    "Account": "Account_Management",
+    "Communication": "Communication_Tools",
+    "RemoteWork": "Remote_Work",
+    "Hardware": "Hardware_Request"
+}
+
+# Simple conversion - replace IT terms with HR terms
+SUBJECT_REPLACEMENTS = {
+    "IT": "HR",
+    "network": "employee",
+    "printer": "benefits",
+    "email": "leave",
+    "software": "policy",
+    "access": "request"
+}
+
+# Convert common IT issues to HR scenarios
+DESCRIPTION_CONVERSIONS = {
+    "printer": "leave request",
+    "network": "employee data",
+    "email": "benefits inquiry",
+    "software": "policy question",
+    "access": "information request"
+}
+
+CSV_FIELDS = [
+    "id", "subject", "description", "priority", "category",
+    "created_at", "requester_email", "original_category"
+]
+
+
+def _compile(table: Dict[str, str]) -> "re.Pattern":
+    # Longest terms first so overlapping terms resolve the same way every time
+    terms = sorted(table, key=len, reverse=True)
+    return re.compile("|".join(re.escape(term) for term in terms))
+
+
+_SUBJECT_PATTERN = _compile(SUBJECT_REPLACEMENTS)
+_DESCRIPTION_PATTERN = _compile(DESCRIPTION_CONVERSIONS)
+
+
+def convert_subject_to_hr(subject: str) -> str:
+    """Convert IT ticket subject to HR context."""
+    return _SUBJECT_PATTERN.sub(lambda m: SUBJECT_REPLACEMENTS[m.group(0)], subject)
+
+
+def convert_description_to_hr(description: str) -> str:
+    """Convert IT ticket description to HR context."""
+    return _DESCRIPTION_PATTERN.sub(lambda m: DESCRIPTION_CONVERSIONS[m.group(0)], description)
+
+
+def convert_ticket(ticket: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert IT ticket to HR ticket format."""
+    return {
+        "id": ticket.get("id", ""),
+        "subject": convert_subject_to_hr(ticket.get("subject", "") or ""),
+        "description": convert_description_to_hr(ticket.get("description", "") or ""),
+        "priority": ticket.get("priority", "Medium"),
+        "category": CATEGORY_MAPPING.get(ticket.get("category", ""), "General"),
+        "created_at": ticket.get("createdAt", ""),
+        "requester_email": ticket.get("requesterEmail", ""),
+        "original_category": ticket.get("category", "")
+    }
+
+
+def convert_shard(tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert one shard of tickets (runs in a worker process)."""
+    return [convert_ticket(ticket) for ticket in tickets]
+
+
+def iter_source(local_path: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield raw IT tickets one at a time.
 
-def download_and_process_dataset():
+    Args:
+        local_path: Optional local JSONL or JSON file; otherwise the
+            Hugging Face dataset is streamed without downloading it whole
+    """
+    if local_path:
+        with open(local_path) as f:
+            if local_path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from json.load(f)
+        return
+
+    from datasets import load_dataset
+
+    yield from load_dataset(
+        "Console-AI/IT-helpdesk-synthetic-tickets",
+        split="train",
+        streaming=True
+    )
+
+
+def iter_shards(tickets: Iterable[Dict[str, Any]], shard_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group a ticket stream into lists of shard_size."""
+    iterator = iter(tickets)
+    while True:
+        shard = list(itertools.islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def iter_converted(shards: Iterator[List[Dict[str, Any]]], workers: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Convert shards in order, optionally on a process pool.
+
+    At most two shards per worker are in flight, which bounds memory even
+    when the source is far larger than RAM.
+    """
+    if workers <= 1:
+        for shard in shards:
+            yield convert_shard(shard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for shard in shards:
+            pending.append(pool.submit(convert_shard, shard))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def download_and_process_dataset(
+    local_path: str = None,
+    output_dir: str = "data",
+    dataset_dir: str = "data/tickets/helpdesk",
+    shard_size: int = 10000,
+    workers: int = 1
+):
     """Download and process the Hugging Face IT help desk dataset."""
-    
-    print("📥 Downloading IT Help Desk Synthetic Tickets Dataset...")
-    
+
+    print("📥 Streaming IT Help Desk Synthetic Tickets Dataset...")
+
     try:
-        # Load dataset from Hugging Face
-        dataset = load_dataset("Console-AI/IT-helpdesk-synthetic-tickets")
-        
-        print(f"✅ Dataset loaded: {len(dataset['train'])} tickets")
-        
         # Create data directory
-        data_dir = Path("data")
-        data_dir.mkdir(exist_ok=True)
-        
-        # Convert to HR context
-        hr_tickets = []
-        category_mapping = {
-            "Network": "IT_Support",
-            "Software": "Software_Access",
-            "Account": "Account_Management",
-            "Communication": "Communication_Tools",
-            "RemoteWork": "Remote_Work",
-            "Hardware": "Hardware_Request"
-        }
-        
-        for ticket in dataset['train']:
-            # Convert IT ticket to HR ticket format
-            hr_ticket = {
-                "id": ticket.get("id", ""),
-                "subject": convert_subject_to_hr(ticket.get("subject", "")),
-                "description": convert_description_to_hr(ticket.get("description", "")),
-                "priority": ticket.get("priority", "Medium"),
-                "category": category_mapping.get(ticket.get("category", ""), "General"),
-                "created_at": ticket.get("createdAt", ""),
-                "requester_email": ticket.get("requesterEmail", ""),
-                "original_category": ticket.get("category", "")
-            }
-            hr_tickets.append(hr_ticket)
-        
-        # Save processed tickets
-        output_file = data_dir / "hr_tickets_synthetic.json"
-        with open(output_file, 'w') as f:
-            json.dump(hr_tickets, f, indent=2)
-        
-        print(f"✅ Processed {len(hr_tickets)} tickets")
-        print(f"💾 Saved to: {output_file}")
-        
-        # Also save as CSV for easy viewing
-        import pandas as pd
-        df = pd.DataFrame(hr_tickets)
+        data_dir = Path(output_dir)
+        data_dir.mkdir(parents=True, exist_ok=True)
+
         csv_file = data_dir / "hr_tickets_synthetic.csv"
-        df.to_csv(csv_file, index=False)
+
+        count = 0
+        with TicketWriter(dataset_dir, overwrite=True) as store, \
+                open(csv_file, "w", newline="") as csv_out:
+            writer = csv.DictWriter(csv_out, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            shards = iter_shards(iter_source(local_path), shard_size)
+            for converted in iter_converted(shards, workers):
+                store.write(converted)
+                writer.writerows(converted)
+                count += len(converted)
+                print(f"  ✅ Converted {count} tickets", end="\r")
+
+        print(f"\n✅ Processed {count} tickets")
+        print(f"💾 Saved to: {dataset_dir}")
         print(f"💾 Also saved as CSV: {csv_file}")
-        
-        return hr_tickets
-        
+
+        return count
+
     except Exception as e:
         print(f"❌ Error downloading dataset: {str(e)}")
         print("💡 Make sure you have 'datasets' library installed: pip install datasets")
         sys.exit(1)
 
 
-def convert_subject_to_hr(subject: str) -> str:
-    """Convert IT ticket subject to HR context."""
-    # Simple conversion - replace IT terms with HR terms
-    replacements = {
-        "IT": "HR",
-        "network": "employee",
-        "printer": "benefits",
-        "email": "leave",
-        "software": "policy",
-        "access": "request"
-    }
-    
-    converted = subject
-    for old, new in replacements.items():
-        converted = converted.replace(old, new)
-    
-    return converted
+def main():
+    parser = argparse.ArgumentParser(description="Download and convert the IT help desk dataset")
+    parser.add_argument(
+        "--local",
+        type=str,
+        help="Convert a local JSONL/JSON export instead of streaming from Hugging Face"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="data",
+        help="Output directory for the CSV export (default: data)"
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="data/tickets/helpdesk",
+        help="Parquet ticket dataset directory (default: data/tickets/helpdesk)"
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=10000,
+        help="Tickets per conversion shard (default: 10000)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for conversion (default: CPU count)"
+    )
 
+    args = parser.parse_args()
 
-def convert_description_to_hr(description: str) -> str:
-    """Convert IT ticket description to HR context."""
-    # Convert common IT issues to HR scenarios
-    conversions = {
-        "printer": "leave request",
-        "network": "employee data",
-        "email": "benefits inquiry",
-        "software": "policy question",
-        "access": "information request"
-    }
-    
-    converted = description
-    for it_term, hr_term in conversions.items():
-        converted = converted.replace(it_term, hr_term)
-    
-    return converted
+    download_and_process_dataset(args.local, args.output, args.dataset, args.shard_size, args.workers)
 
 
 if __name__ == "__main__":
-    download_and_process_dataset()
-
+    main()
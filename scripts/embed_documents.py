@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Embed Documents Script
+Precomputes embeddings for the in-process knowledge index
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.embeddings import AzureOpenAIEmbedder, HashingEmbedder  # noqa: E402
+from agents.knowledge_index import document_text  # noqa: E402
+
+load_dotenv()
+
+
+async def embed_documents(input_file: str, output_file: str, embedder_name: str):
+    """
+    Embed every document and save vectors row-aligned with the input.
+
+    Args:
+        input_file: Documents as a JSON array or JSONL
+        output_file: Destination .npz (ids, vectors, embedder)
+        embedder_name: 'azure' or 'hashing'
+    """
+    path = Path(input_file)
+    with open(path) as f:
+        if path.suffix == ".jsonl":
+            documents = [json.loads(line) for line in f if line.strip()]
+        else:
+            documents = json.load(f)
+
+    embedder = AzureOpenAIEmbedder() if embedder_name == "azure" else HashingEmbedder()
+    print(f"🧮 Embedding {len(documents)} documents with {embedder.name}...")
+    vectors = await embedder.embed([document_text(d) for d in documents])
+
+    np.savez(
+        output_file,
+        ids=np.array([str(d.get("id")) for d in documents]),
+        vectors=vectors.astype(np.float32),
+        embedder=np.array(embedder.name),
+    )
+    print(f"💾 Saved {vectors.shape[0]}x{vectors.shape[1]} embeddings to: {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute document embeddings")
+    parser.add_argument(
+        "--input",
+        type=str,
+        default="knowledge_base/hr_policies.json",
+        help="Documents file (default: knowledge_base/hr_policies.json)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Output .npz (default: <input stem>.embeddings.npz next to the input)"
+    )
+    parser.add_argument(
+        "--embedder",
+        choices=["azure", "hashing"],
+        default="azure",
+        help="Embedding backend (default: azure, needs OPENAI_EMBEDDING_DEPLOYMENT)"
+    )
+
+    args = parser.parse_args()
+
+    output = args.output or str(Path(args.input).with_name(f"{Path(args.input).stem}.embeddings.npz"))
+    asyncio.run(embed_documents(args.input, output, args.embedder))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,40 +2,31 @@
 """
 Generate Synthetic HR Tickets using Azure OpenAI
 Based on Microsoft Tech Community blog methodology
+
+Batches are generated concurrently under RPM/TPM limits and appended to a
+JSONL file as soon as they validate, so an interrupted run resumes where
+it stopped. The finished corpus is compacted into a Parquet ticket dataset.
 """
 
 import os
 import sys
 import json
+import asyncio
+import hashlib
 import argparse
 from pathlib import Path
-from openai import AzureOpenAI
+from typing import Any, Dict, List, Set, Tuple
 from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from agents.prompts import PromptTemplate, TokenBudget  # noqa: E402
+from agents.rate_limit import RateLimiter  # noqa: E402
+from agents.ticket_store import load_ticket_records, read_tickets, write_tickets  # noqa: E402
 
-def generate_synthetic_tickets(count: int = 100, output_file: str = "data/synthetic_hr_tickets.json"):
-    """
-    Generate synthetic HR service desk tickets using Azure OpenAI.
-    
-    Args:
-        count: Number of tickets to generate
-        output_file: Output file path
-    """
-    
-    # Initialize Azure OpenAI client
-    client = AzureOpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        api_version=os.getenv("OPENAI_API_VERSION", "2024-02-15-preview"),
-        azure_endpoint=os.getenv("OPENAI_ENDPOINT")
-    )
-    
-    deployment_name = os.getenv("OPENAI_DEPLOYMENT_NAME", "gpt-4")
-    
-    print(f"🤖 Generating {count} synthetic HR tickets using Azure OpenAI...")
-    
-    system_prompt = """You are a synthetic data generator for HR Service Desk tickets.
+load_dotenv()
+
+SYSTEM_PROMPT = """You are a synthetic data generator for HR Service Desk tickets.
 Generate realistic HR service desk tickets with the following structure:
 - id: unique identifier
 - subject: brief ticket subject
@@ -54,75 +45,203 @@ Make the tickets diverse and realistic. Include various HR scenarios like:
 
 Return ONLY valid JSON array, no other text."""
 
-    tickets = []
-    batch_size = 10  # Generate in batches
-    
-    for i in range(0, count, batch_size):
-        current_batch = min(batch_size, count - i)
-        print(f"  Generating batch {i//batch_size + 1} ({current_batch} tickets)...")
-        
-        user_prompt = f"Generate {current_batch} HR service desk tickets. Return as JSON array."
-        
-        try:
-            response = client.chat.completions.create(
-                model=deployment_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.8,
-                response_format={"type": "json_object"}
-            )
-            
-            # Parse response
-            result = json.loads(response.choices[0].message.content)
-            
-            # Handle different response formats
-            if isinstance(result, dict):
-                if "tickets" in result:
-                    batch_tickets = result["tickets"]
-                elif "data" in result:
-                    batch_tickets = result["data"]
-                else:
-                    # Assume the dict itself contains ticket data
-                    batch_tickets = [result]
-            elif isinstance(result, list):
-                batch_tickets = result
-            else:
-                print(f"  ⚠️  Unexpected response format, skipping batch")
-                continue
-            
-            tickets.extend(batch_tickets[:current_batch])
-            print(f"  ✅ Generated {len(batch_tickets)} tickets")
-            
-        except Exception as e:
-            print(f"  ❌ Error generating batch: {str(e)}")
-            continue
-    
-    # Save tickets
+# Built once so every batch sends the same system prefix
+TICKET_PROMPT = PromptTemplate("synthetic_tickets", SYSTEM_PROMPT)
+
+BATCH_SIZE = 10
+
+
+def fingerprint(ticket: Dict[str, Any]) -> str:
+    """De-duplication key: normalized subject and description."""
+    text = " ".join(
+        " ".join(str(ticket.get(field, "")).lower().split())
+        for field in ("subject", "description")
+    )
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def extract_tickets(result: Any) -> List[Dict[str, Any]]:
+    """Pull the ticket list out of the different response shapes the model uses."""
+    if isinstance(result, dict):
+        if "tickets" in result:
+            result = result["tickets"]
+        elif "data" in result:
+            result = result["data"]
+        else:
+            # Assume the dict itself contains ticket data
+            result = [result]
+    if not isinstance(result, list):
+        return []
+    return [
+        t for t in result
+        if isinstance(t, dict) and t.get("subject") and t.get("description")
+    ]
+
+
+def load_checkpoint(output_path: Path) -> Tuple[int, Set[str], Set[str]]:
+    """
+    Read an existing JSONL output to resume from it.
+
+    A partially written last line (from a crash mid-write) is cut off.
+
+    Returns:
+        Tuple of (ticket count, fingerprints, ids)
+    """
+    count, seen, ids = 0, set(), set()
+    if not output_path.exists():
+        return count, seen, ids
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                ticket = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            valid_bytes += len(line)
+            count += 1
+            seen.add(fingerprint(ticket))
+            ids.add(str(ticket.get("id")))
+    if valid_bytes != output_path.stat().st_size:
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return count, seen, ids
+
+
+async def generate_synthetic_tickets(
+    count: int = 100,
+    output_file: str = "data/synthetic_hr_tickets.jsonl",
+    dataset_dir: str = "data/tickets/synthetic",
+    concurrency: int = 8,
+    rpm: float = 60,
+    tpm: float = 80000,
+    tokens_per_ticket: int = 250,
+    resume: bool = True
+):
+    """
+    Generate synthetic HR service desk tickets using Azure OpenAI.
+
+    Args:
+        count: Number of tickets to generate
+        output_file: Output JSONL file path (also the resume checkpoint)
+        dataset_dir: Parquet ticket dataset written from the finished file
+        concurrency: Batches generated in parallel
+        rpm: Requests-per-minute quota
+        tpm: Tokens-per-minute quota
+        tokens_per_ticket: Completion tokens reserved, and allowed, per ticket
+        resume: Continue from an existing output file
+    """
+    from openai import AsyncAzureOpenAI
+
+    # Initialize Azure OpenAI client
+    client = AsyncAzureOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        api_version=os.getenv("OPENAI_API_VERSION", "2024-02-15-preview"),
+        azure_endpoint=os.getenv("OPENAI_ENDPOINT")
+    )
+
+    deployment_name = os.getenv("OPENAI_DEPLOYMENT_NAME", "gpt-4")
+
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_path, 'w') as f:
-        json.dump(tickets, f, indent=2)
-    
-    print(f"\n✅ Generated {len(tickets)} synthetic HR tickets")
+    if not resume and output_path.exists():
+        output_path.unlink()
+    generated, seen, ids = load_checkpoint(output_path)
+    if generated:
+        print(f"↩️  Resuming: {generated} tickets already in {output_path}")
+    if generated >= count:
+        print(f"✅ Already have {generated} tickets, nothing to do")
+        return generated
+
+    print(f"🤖 Generating {count - generated} synthetic HR tickets using Azure OpenAI...")
+
+    limiter = RateLimiter(rpm=rpm, tpm=tpm)
+    state = {"generated": generated, "in_flight": 0, "batches": 0, "duplicates": 0}
+    # Give up after this many batches so a model that keeps repeating
+    # itself cannot loop forever
+    max_batches = 3 * ((count - generated) // BATCH_SIZE + 1)
+    write_lock = asyncio.Lock()
+
+    with open(output_path, "a") as out:
+
+        async def run_batch(batch_number: int, size: int) -> None:
+            prompt = TICKET_PROMPT.build(
+                f"Generate {size} HR service desk tickets. Return as JSON array.",
+                TokenBudget(prompt_tokens=TICKET_PROMPT.system_tokens + 100, max_tokens=size * tokens_per_ticket)
+            )
+            estimate = prompt.prompt_tokens + prompt.max_tokens
+            await limiter.acquire(estimate)
+            try:
+                response = await client.chat.completions.create(
+                    model=deployment_name,
+                    messages=prompt.messages,
+                    temperature=0.8,
+                    max_tokens=prompt.max_tokens,
+                    response_format={"type": "json_object"}
+                )
+                if response.usage is not None:
+                    limiter.record_usage(estimate, response.usage.total_tokens)
+                batch_tickets = extract_tickets(json.loads(response.choices[0].message.content))
+            except Exception as e:
+                print(f"  ❌ Error generating batch {batch_number}: {str(e)}")
+                return
+
+            async with write_lock:
+                accepted = 0
+                for ticket in batch_tickets:
+                    if state["generated"] >= count:
+                        break
+                    key = fingerprint(ticket)
+                    if key in seen:
+                        state["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    suffix = state["generated"] + 1
+                    while not ticket.get("id") or str(ticket["id"]) in ids:
+                        ticket["id"] = f"SYN-{suffix:06d}"
+                        suffix += 1
+                    ids.add(str(ticket["id"]))
+                    out.write(json.dumps(ticket) + "\n")
+                    state["generated"] += 1
+                    accepted += 1
+                out.flush()
+            print(f"  ✅ Batch {batch_number}: kept {accepted}/{len(batch_tickets)} "
+                  f"({state['generated']}/{count})")
+
+        async def worker() -> None:
+            while state["generated"] + state["in_flight"] < count and state["batches"] < max_batches:
+                size = min(BATCH_SIZE, count - state["generated"] - state["in_flight"])
+                state["batches"] += 1
+                state["in_flight"] += size
+                try:
+                    await run_batch(state["batches"], size)
+                finally:
+                    state["in_flight"] -= size
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    print(f"\n✅ Generated {state['generated']} synthetic HR tickets "
+          f"({state['duplicates']} duplicates dropped)")
     print(f"💾 Saved to: {output_path}")
-    
+
+    stored = write_tickets(dataset_dir, load_ticket_records([str(output_path)]))
+    print(f"💾 Wrote {stored} tickets to Parquet dataset: {dataset_dir}")
+
     # Print summary
-    categories = {}
-    priorities = {}
-    for ticket in tickets:
-        cat = ticket.get("category", "Unknown")
-        pri = ticket.get("priority", "Unknown")
-        categories[cat] = categories.get(cat, 0) + 1
-        priorities[pri] = priorities.get(pri, 0) + 1
-    
+    table = read_tickets(dataset_dir, columns=["category", "priority"])
+    categories = {
+        row["values"]: row["counts"] for row in table.column("category").value_counts().to_pylist()
+    }
+    priorities = {
+        str(row["values"]): row["counts"] for row in table.column("priority").value_counts().to_pylist()
+    }
+
     print("\n📊 Summary:")
     print(f"  Categories: {categories}")
     print(f"  Priorities: {priorities}")
-    
-    return tickets
+
+    return state["generated"]
 
 
 def main():
@@ -136,20 +255,56 @@ def main():
     parser.add_argument(
         "--output",
         type=str,
-        default="data/synthetic_hr_tickets.json",
-        help="Output file path (default: data/synthetic_hr_tickets.json)"
+        default="data/synthetic_hr_tickets.jsonl",
+        help="Output JSONL file path (default: data/synthetic_hr_tickets.jsonl)"
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="data/tickets/synthetic",
+        help="Parquet ticket dataset directory (default: data/tickets/synthetic)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Batches generated in parallel (default: 8)"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=float(os.getenv("OPENAI_RPM_LIMIT", "60")),
+        help="Requests-per-minute quota (default: OPENAI_RPM_LIMIT or 60)"
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=float(os.getenv("OPENAI_TPM_LIMIT", "80000")),
+        help="Tokens-per-minute quota (default: OPENAI_TPM_LIMIT or 80000)"
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start over instead of resuming from an existing output file"
     )
-    
+
     args = parser.parse_args()
-    
+
     # Check for required environment variables
     if not os.getenv("OPENAI_API_KEY") or not os.getenv("OPENAI_ENDPOINT"):
         print("❌ Error: OPENAI_API_KEY and OPENAI_ENDPOINT must be set in .env file")
         sys.exit(1)
-    
-    generate_synthetic_tickets(args.count, args.output)
+
+    asyncio.run(generate_synthetic_tickets(
+        args.count,
+        args.output,
+        args.dataset,
+        concurrency=args.concurrency,
+        rpm=args.rpm,
+        tpm=args.tpm,
+        resume=not args.no_resume
+    ))
 
 
 if __name__ == "__main__":
     main()
-
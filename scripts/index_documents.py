@@ -2,70 +2,384 @@
 """
 Index Documents Script
 Indexes HR documents in Azure Cognitive Search
+
+Reads documents from a directory or JSON/JSONL file, splits long ones into
+chunks, and uploads only what changed since the last run in size-bounded
+batches with bounded concurrency and retries.
 """
 
+import argparse
+import hashlib
+import json
 import os
+import random
 import sys
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.knowledge_index import load_documents  # noqa: E402
+
 load_dotenv()
 
+# Azure Cognitive Search accepts at most 1000 documents / 16 MB per batch
+MAX_BATCH_DOCS = 1000
+MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+# Per-document status codes worth retrying (conflict, throttling, unavailable)
+RETRYABLE_STATUS = {409, 422, 429, 503}
+
+INDEXED_FIELDS = ("id", "title", "content", "category")
+
+
+@dataclass
+class UploadResult:
+    """Per-document outcome, mirroring azure.search.documents.models.IndexingResult."""
+
+    key: str
+    succeeded: bool
+    status_code: int = 200
+    error_message: Optional[str] = None
+
+
+class LocalSearchClient:
+    """
+    Local stand-in for the Azure Cognitive Search document API.
+
+    Documents are kept in a JSON file keyed by id. An optional failure rate
+    makes individual documents fail with a retryable status, which exercises
+    the retry path without a live search service.
+    """
+
+    def __init__(self, path: str, failure_rate: float = 0.0):
+        self.path = Path(path)
+        self.failure_rate = failure_rate
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path) as f:
+                self.documents = json.load(f)
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.documents, f, indent=2)
+        tmp.replace(self.path)
+
+    def upload_documents(self, documents: List[Dict[str, Any]]) -> List[UploadResult]:
+        results = []
+        with self._lock:
+            for doc in documents:
+                if random.random() < self.failure_rate:
+                    results.append(UploadResult(doc["id"], False, 503, "Simulated service unavailable"))
+                    continue
+                self.documents[doc["id"]] = doc
+                results.append(UploadResult(doc["id"], True))
+            self._save()
+        return results
+
+    def delete_documents(self, documents: List[Dict[str, Any]]) -> List[UploadResult]:
+        with self._lock:
+            for doc in documents:
+                self.documents.pop(doc["id"], None)
+            self._save()
+        return [UploadResult(doc["id"], True) for doc in documents]
+
+
+def make_client(local_path: Optional[str], failure_rate: float):
+    """Create the search client: Azure Cognitive Search or the local stand-in."""
+    if local_path:
+        return LocalSearchClient(local_path, failure_rate)
 
-def index_documents():
-    """Index documents in Azure Cognitive Search."""
-    
-    # Get configuration
     search_endpoint = os.getenv("SEARCH_ENDPOINT")
     search_key = os.getenv("SEARCH_KEY")
     index_name = os.getenv("SEARCH_INDEX_POLICIES", "hr-policies-index")
-    
+
     if not search_endpoint or not search_key:
-        print("❌ Error: SEARCH_ENDPOINT and SEARCH_KEY must be set")
+        print("❌ Error: SEARCH_ENDPOINT and SEARCH_KEY must be set (or use --local)")
         sys.exit(1)
-    
-    # Initialize search client
-    credential = AzureKeyCredential(search_key)
-    client = SearchClient(
+
+    from azure.core.credentials import AzureKeyCredential
+    from azure.search.documents import SearchClient
+
+    return SearchClient(
         endpoint=search_endpoint,
         index_name=index_name,
-        credential=credential
+        credential=AzureKeyCredential(search_key)
     )
-    
-    # Sample documents to index
-    documents = [
-        {
-            "id": "1",
-            "title": "Sick Leave Policy",
-            "content": "Employees are entitled to 10 days of sick leave per year...",
-            "category": "leave"
-        },
-        {
-            "id": "2",
-            "title": "Vacation Leave Policy",
-            "content": "Full-time employees accrue 15 days of vacation leave...",
-            "category": "leave"
-        }
+
+
+def content_hash(document: Dict[str, Any]) -> str:
+    """Hash of the indexed fields of a document."""
+    payload = json.dumps({k: document.get(k) for k in INDEXED_FIELDS}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chunk_document(document: Dict[str, Any], max_chars: int, overlap: int) -> List[Dict[str, Any]]:
+    """
+    Split a document's content into chunks of at most max_chars.
+
+    Splits prefer paragraph, then sentence, then word boundaries. Short
+    documents are returned unchanged as a single chunk.
+    """
+    content = document.get("content", "") or ""
+    base = {k: document.get(k) for k in INDEXED_FIELDS}
+    if len(content) <= max_chars:
+        return [base]
+
+    chunks = []
+    start = 0
+    while start < len(content):
+        end = min(start + max_chars, len(content))
+        if end < len(content):
+            window = content[start:end]
+            for separator in ("\n\n", ". ", " "):
+                cut = window.rfind(separator)
+                if cut > max_chars // 2:
+                    end = start + cut + len(separator)
+                    break
+        chunks.append(content[start:end].strip())
+        if end >= len(content):
+            break
+        start = max(end - overlap, start + 1)
+
+    return [
+        dict(base, id=f"{document['id']}_chunk{i}", content=text)
+        for i, text in enumerate(chunks)
+        if text
     ]
-    
-    print(f"📝 Indexing documents in {index_name}...")
-    
-    try:
-        result = client.upload_documents(documents=documents)
-        print(f"  ✅ Indexed {len(documents)} documents")
-        for doc in result:
-            if doc.succeeded:
-                print(f"    ✅ {doc.key}")
+
+
+def make_batches(chunks: List[Dict[str, Any]], max_docs: int, max_bytes: int) -> List[List[Dict[str, Any]]]:
+    """Group chunks into batches bounded by document count and payload size."""
+    batches, current, size = [], [], 0
+    for chunk in chunks:
+        chunk_size = len(json.dumps(chunk).encode("utf-8"))
+        if current and (len(current) >= max_docs or size + chunk_size > max_bytes):
+            batches.append(current)
+            current, size = [], 0
+        current.append(chunk)
+        size += chunk_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def upload_batch(client, batch: List[Dict[str, Any]], max_retries: int) -> Dict[str, Optional[str]]:
+    """
+    Upload one batch, retrying failed documents with exponential backoff.
+
+    Returns:
+        Mapping of chunk id to None on success or the final error message
+    """
+    outcome: Dict[str, Optional[str]] = {}
+    pending = batch
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(min(0.5 * 2 ** attempt, 30) * (0.5 + random.random() / 2))
+        try:
+            results = client.upload_documents(documents=pending)
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            if status is not None and status not in RETRYABLE_STATUS:
+                return {**outcome, **{doc["id"]: str(e) for doc in pending}}
+            outcome.update({doc["id"]: str(e) for doc in pending})
+            continue
+
+        by_key = {doc["id"]: doc for doc in pending}
+        retry = []
+        for result in results:
+            if result.succeeded:
+                outcome[result.key] = None
             else:
-                print(f"    ❌ {doc.key}: {doc.error_message}")
-    except Exception as e:
-        print(f"❌ Error indexing documents: {str(e)}")
+                outcome[result.key] = result.error_message or f"status {result.status_code}"
+                if result.status_code in RETRYABLE_STATUS:
+                    retry.append(by_key[result.key])
+        pending = retry
+        if not pending:
+            break
+    return outcome
+
+
+def load_state(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Load the per-document hash/chunk state from the previous run."""
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(path: Path, state: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def index_documents(
+    source: str = "knowledge_base",
+    state_file: str = "data/.index_state.json",
+    local_path: Optional[str] = None,
+    failure_rate: float = 0.0,
+    max_chars: int = 2000,
+    overlap: int = 200,
+    batch_docs: int = MAX_BATCH_DOCS,
+    batch_bytes: int = MAX_BATCH_BYTES,
+    concurrency: int = 4,
+    max_retries: int = 5,
+    force: bool = False
+):
+    """Index new and changed documents in Azure Cognitive Search."""
+    client = make_client(local_path, failure_rate)
+    documents = load_documents(source)
+    state_path = Path(state_file)
+    state = {} if force else load_state(state_path)
+
+    changed = []
+    for document in documents:
+        digest = content_hash(document)
+        if state.get(document["id"], {}).get("hash") != digest:
+            changed.append((document, digest))
+    removed = set(state) - {d["id"] for d in documents}
+
+    print(f"📝 {len(documents)} documents: {len(changed)} new or changed, "
+          f"{len(documents) - len(changed)} unchanged, {len(removed)} removed")
+
+    chunks_by_doc = {
+        document["id"]: chunk_document(document, max_chars, overlap)
+        for document, _ in changed
+    }
+    all_chunks = [chunk for chunks in chunks_by_doc.values() for chunk in chunks]
+    batches = make_batches(all_chunks, batch_docs, batch_bytes)
+
+    outcome: Dict[str, Optional[str]] = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(upload_batch, client, batch, max_retries) for batch in batches]
+        for done, future in enumerate(as_completed(futures), start=1):
+            outcome.update(future.result())
+            print(f"  📦 Batch {done}/{len(batches)} done")
+
+    # Chunks that a changed or removed document no longer produces
+    stale = []
+    for doc_id in removed:
+        stale.extend(state[doc_id].get("chunks", []))
+    for document, _ in changed:
+        current = {c["id"] for c in chunks_by_doc[document["id"]]}
+        previous = state.get(document["id"], {}).get("chunks", [])
+        stale.extend(c for c in previous if c not in current)
+    if stale:
+        client.delete_documents(documents=[{"id": c} for c in stale])
+        print(f"  🗑️  Deleted {len(stale)} stale chunks")
+
+    failed = 0
+    for document, digest in changed:
+        chunk_ids = [c["id"] for c in chunks_by_doc[document["id"]]]
+        errors = [outcome.get(c) for c in chunk_ids if outcome.get(c)]
+        if errors:
+            failed += 1
+            print(f"    ❌ {document['id']}: {errors[0]}")
+            continue
+        state[document["id"]] = {"hash": digest, "chunks": chunk_ids}
+    for doc_id in removed:
+        state.pop(doc_id, None)
+    save_state(state_path, state)
+
+    elapsed = time.perf_counter() - started
+    print(f"  ✅ Indexed {len(changed) - failed} documents "
+          f"({len(all_chunks)} chunks in {len(batches)} batches, {elapsed:.1f}s)")
+    if failed:
+        print(f"\n⚠️  {failed} documents failed and will be retried on the next run")
         sys.exit(1)
-    
+
     print("\n✅ Document indexing complete!")
 
 
-if __name__ == "__main__":
-    index_documents()
+def main():
+    parser = argparse.ArgumentParser(description="Index HR documents in Azure Cognitive Search")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="knowledge_base",
+        help="Directory or JSON/JSONL file of documents (default: knowledge_base)"
+    )
+    parser.add_argument(
+        "--state",
+        type=str,
+        default="data/.index_state.json",
+        help="Content-hash state file (default: data/.index_state.json)"
+    )
+    parser.add_argument(
+        "--local",
+        type=str,
+        help="Index into a local JSON stand-in at this path instead of Azure"
+    )
+    parser.add_argument(
+        "--local-failure-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of uploads the local stand-in fails, to test retries"
+    )
+    parser.add_argument(
+        "--chunk-chars",
+        type=int,
+        default=2000,
+        help="Maximum characters per chunk (default: 2000)"
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=200,
+        help="Characters shared between consecutive chunks (default: 200)"
+    )
+    parser.add_argument(
+        "--batch-docs",
+        type=int,
+        default=MAX_BATCH_DOCS,
+        help=f"Maximum documents per batch (default: {MAX_BATCH_DOCS})"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Batches uploaded in parallel (default: 4)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=5,
+        help="Retries for failed documents (default: 5)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore saved hashes and re-index everything"
+    )
+
+    args = parser.parse_args()
 
+    index_documents(
+        source=args.source,
+        state_file=args.state,
+        local_path=args.local,
+        failure_rate=args.local_failure_rate,
+        max_chars=args.chunk_chars,
+        overlap=args.chunk_overlap,
+        batch_docs=args.batch_docs,
+        concurrency=args.concurrency,
+        max_retries=args.retries,
+        force=args.force
+    )
+
+
+if __name__ == "__main__":
+    main()
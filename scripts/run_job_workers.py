@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Job Workers
+Consumes queued tickets outside the API process. Run one or more of these
+against a shared SQLite queue and start the API with JOB_WORKERS=0
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from agents.conversation import close_conversation_store  # noqa: E402
+from agents.job_queue import JobWorkerPool, open_queue  # noqa: E402
+from agents.orchestrator import run_ticket_job  # noqa: E402
+
+
+async def run(args: argparse.Namespace) -> None:
+    queue = open_queue(args.queue)
+    pool = JobWorkerPool(
+        queue,
+        run_ticket_job,
+        concurrency=args.concurrency,
+        visibility_timeout=args.visibility_timeout
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    pool.start()
+    print(f"Consuming {args.queue} with {args.concurrency} workers")
+    await stop.wait()
+    await pool.stop()
+    await queue.close()
+    await close_conversation_store()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ticket job workers")
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=os.getenv("JOB_QUEUE_URL", "sqlite:///data/jobs.db"),
+        help="Queue URL (default: JOB_QUEUE_URL or sqlite:///data/jobs.db)"
+    )
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKERS", "4")) or 4)
+    parser.add_argument(
+        "--visibility-timeout",
+        type=float,
+        default=float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "120")),
+        help="Seconds a claimed job stays hidden from other workers"
+    )
+
+    args = parser.parse_args()
+    if args.queue == "memory":
+        parser.error("An in-memory queue cannot be shared with the API; use a sqlite:/// URL")
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
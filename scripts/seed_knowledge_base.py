@@ -1,92 +1,239 @@
 #!/usr/bin/env python3
 """
 Seed Knowledge Base Script
-Populates Azure Cosmos DB with sample HR policies and FAQs
+Populates Azure Cosmos DB with HR policies and FAQs
+
+Loads records from files and upserts them with a bounded pool of async
+workers, skipping records whose content hash is already stored.
 """
 
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
 import os
+import random
+import statistics
 import sys
-import json
-from azure.cosmos import CosmosClient, PartitionKey
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from azure.cosmos import PartitionKey
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos.exceptions import CosmosHttpResponseError
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.knowledge_index import load_documents  # noqa: E402
+
 load_dotenv()
 
+PARTITION_KEY = "category"
+
+# Throttled, timed out or temporarily unavailable
+RETRYABLE_STATUS = {408, 429, 449, 503}
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash of a record's own fields, ignoring Cosmos system properties."""
+    payload = {
+        k: v for k, v in record.items()
+        if not k.startswith("_") and k != "content_hash"
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SeedStats:
+    """Running totals for the seeding report."""
+
+    def __init__(self):
+        self.upserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.retries = 0
+        self.request_charge = 0.0
+        self.latencies_ms: List[float] = []
+
+    def record_charge(self, headers: Dict[str, str]) -> None:
+        self.request_charge += float(headers.get("x-ms-request-charge", 0) or 0)
+
+
+async def existing_hashes(container, category: str, stats: SeedStats) -> Dict[str, str]:
+    """Content hashes already stored in one partition, keyed by id."""
+    hashes = {}
+    items = container.query_items(
+        "SELECT c.id, c.content_hash FROM c",
+        partition_key=category,
+        response_hook=lambda headers, _: stats.record_charge(headers)
+    )
+    async for item in items:
+        hashes[item["id"]] = item.get("content_hash")
+    return hashes
+
+
+async def upsert_with_retry(container, record: Dict[str, Any], stats: SeedStats, max_retries: int) -> None:
+    """Upsert one record, backing off on throttling and transient errors."""
+    for attempt in range(max_retries + 1):
+        started = time.perf_counter()
+        try:
+            await container.upsert_item(
+                record,
+                response_hook=lambda headers, _: stats.record_charge(headers)
+            )
+            stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            stats.upserted += 1
+            return
+        except CosmosHttpResponseError as e:
+            if e.status_code not in RETRYABLE_STATUS or attempt == max_retries:
+                raise
+            stats.retries += 1
+            retry_after_ms = (e.headers or {}).get("x-ms-retry-after-ms")
+            delay = float(retry_after_ms) / 1000 if retry_after_ms else min(0.1 * 2 ** attempt, 10)
+            await asyncio.sleep(delay * (1 + random.random() / 4))
+
+
+def interleave(groups: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Round-robin records across partitions so no single partition runs hot."""
+    return [
+        record
+        for batch in itertools.zip_longest(*groups.values())
+        for record in batch
+        if record is not None
+    ]
+
+
+async def seed_knowledge_base(
+    source: str = "knowledge_base",
+    container_name: str = "hr_policies",
+    concurrency: int = 16,
+    max_retries: int = 8,
+    force: bool = False
+):
+    """Seed the knowledge base with HR data."""
 
-def seed_knowledge_base():
-    """Seed the knowledge base with sample HR data."""
-    
     # Get configuration from environment
     cosmos_endpoint = os.getenv("COSMOS_ENDPOINT")
     cosmos_key = os.getenv("COSMOS_KEY")
     database_name = os.getenv("COSMOS_DATABASE", "maestroai-db")
-    
+
     if not cosmos_endpoint or not cosmos_key:
         print("❌ Error: COSMOS_ENDPOINT and COSMOS_KEY must be set")
         sys.exit(1)
-    
-    # Initialize Cosmos DB client
-    client = CosmosClient(cosmos_endpoint, cosmos_key)
-    database = client.get_database_client(database_name)
-    
-    # Sample HR policies
-    policies = [
-        {
-            "id": "policy_leave_sick",
-            "category": "leave",
-            "title": "Sick Leave Policy",
-            "content": "Employees are entitled to 10 days of sick leave per year. Sick leave over 2 consecutive days requires manager approval and may require a doctor's note.",
-            "tags": ["leave", "sick", "approval"],
-            "last_updated": "2024-01-15"
-        },
-        {
-            "id": "policy_leave_vacation",
-            "category": "leave",
-            "title": "Vacation Leave Policy",
-            "content": "Full-time employees accrue 15 days of vacation leave per year. Vacation requests should be submitted at least 2 weeks in advance. Manager approval is required for all vacation requests.",
-            "tags": ["leave", "vacation", "approval"],
-            "last_updated": "2024-01-15"
-        },
-        {
-            "id": "policy_maternity",
-            "category": "benefits",
-            "title": "Maternity Leave Policy",
-            "content": "Eligible employees are entitled to 12 weeks of paid maternity leave. Requests must be submitted at least 30 days in advance with appropriate documentation.",
-            "tags": ["maternity", "leave", "benefits"],
-            "last_updated": "2024-01-15"
-        },
-        {
-            "id": "policy_remote_work",
-            "category": "workplace",
-            "title": "Remote Work Policy",
-            "content": "Remote work is available for eligible positions with manager approval. Employees must have a dedicated workspace and reliable internet connection.",
-            "tags": ["remote", "workplace", "approval"],
-            "last_updated": "2024-01-15"
-        }
-    ]
-    
-    # Get or create container
-    try:
-        container = database.get_container_client("hr_policies")
-    except:
-        database.create_container(
-            id="hr_policies",
-            partition_key=PartitionKey(path="/category")
+
+    records = load_documents(source)
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record in records:
+        record = dict(record)
+        # Set before hashing so the stored item and its hash agree
+        record[PARTITION_KEY] = str(record.get(PARTITION_KEY) or "general")
+        record["content_hash"] = content_hash(record)
+        groups[record[PARTITION_KEY]].append(record)
+
+    stats = SeedStats()
+    started = time.perf_counter()
+
+    async with CosmosClient(cosmos_endpoint, cosmos_key) as client:
+        database = client.get_database_client(database_name)
+        container = await database.create_container_if_not_exists(
+            id=container_name,
+            partition_key=PartitionKey(path=f"/{PARTITION_KEY}")
         )
-        container = database.get_container_client("hr_policies")
-    
-    # Insert policies
-    print("📝 Seeding HR policies...")
-    for policy in policies:
-        try:
-            container.upsert_item(policy)
-            print(f"  ✅ Inserted: {policy['title']}")
-        except Exception as e:
-            print(f"  ❌ Error inserting {policy['title']}: {str(e)}")
-    
+
+        # One hash query per partition, then keep only new or changed records
+        if not force:
+            stored = await asyncio.gather(
+                *(existing_hashes(container, category, stats) for category in groups)
+            )
+            for (category, group), hashes in zip(list(groups.items()), stored):
+                changed = [r for r in group if hashes.get(r["id"]) != r["content_hash"]]
+                stats.skipped += len(group) - len(changed)
+                groups[category] = changed
+
+        pending = interleave(groups)
+        print(f"📝 Seeding {len(pending)} of {len(records)} records "
+              f"across {len(groups)} partitions ({stats.skipped} unchanged)...")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for record in pending:
+            queue.put_nowait(record)
+
+        async def worker():
+            while True:
+                try:
+                    record = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await upsert_with_retry(container, record, stats, max_retries)
+                except Exception as e:
+                    stats.failed += 1
+                    print(f"  ❌ Error inserting {record.get('title', record['id'])}: {str(e)}")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(stats.latencies_ms)
+    print("\n📊 Summary:")
+    print(f"  Upserted: {stats.upserted}  Skipped: {stats.skipped}  "
+          f"Failed: {stats.failed}  Retries: {stats.retries}")
+    print(f"  Request charge: {stats.request_charge:.1f} RU")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"  Upsert latency: p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms")
+    print(f"  Wall time: {elapsed:.1f}s")
+
+    if stats.failed:
+        sys.exit(1)
     print("\n✅ Knowledge base seeding complete!")
 
 
-if __name__ == "__main__":
-    seed_knowledge_base()
+def main():
+    parser = argparse.ArgumentParser(description="Seed the Cosmos DB knowledge base")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="knowledge_base",
+        help="Directory or JSON/JSONL file of records (default: knowledge_base)"
+    )
+    parser.add_argument(
+        "--container",
+        type=str,
+        default="hr_policies",
+        help="Target container (default: hr_policies)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Concurrent upserts (default: 16)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=8,
+        help="Retries per record on throttling (default: 8)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Upsert every record even if its content hash is unchanged"
+    )
+
+    args = parser.parse_args()
+
+    asyncio.run(seed_knowledge_base(
+        source=args.source,
+        container_name=args.container,
+        concurrency=args.concurrency,
+        max_retries=args.retries,
+        force=args.force
+    ))
 
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Train Local Intent Model
+Trains the in-process intent classifier on the generated ticket corpora
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.intent_classifier import IntentClassifierAgent  # noqa: E402
+from agents.local_intent_model import LocalIntentModel, iter_labelled  # noqa: E402
+from agents.ticket_store import load_ticket_records  # noqa: E402
+
+INTENT_CATEGORIES = IntentClassifierAgent.INTENT_CATEGORIES
+
+# Ticket categories produced by generate_synthetic_tickets.py and
+# download_hf_dataset.py, mapped onto the classifier's intents.
+CATEGORY_TO_INTENT = {
+    **{intent: intent for intent in INTENT_CATEGORIES},
+    "ACCOUNT_MANAGEMENT": "EMPLOYEE_DATA",
+    "Account_Management": "EMPLOYEE_DATA",
+    "Remote_Work": "POLICY_QUESTION",
+    "GENERAL": "UNKNOWN",
+    "General": "UNKNOWN",
+}
+
+DEFAULT_INPUTS = [
+    "data/tickets/synthetic",
+    "data/tickets/helpdesk",
+]
+
+
+def load_tickets(paths):
+    """Load the needed ticket columns from Parquet datasets or JSON/JSONL files."""
+    tickets = list(load_ticket_records(paths, columns=["subject", "description", "category"]))
+    print(f"📂 Loaded {len(tickets)} tickets from {len(paths)} source(s)")
+    return tickets
+
+
+def train(inputs, output, n_features, epochs, holdout):
+    """Train, evaluate and persist the local intent model."""
+    examples = list(iter_labelled(load_tickets(inputs), CATEGORY_TO_INTENT))
+    if not examples:
+        print("❌ Error: no labelled tickets found")
+        sys.exit(1)
+
+    random.Random(13).shuffle(examples)
+    split = int(len(examples) * (1 - holdout))
+    train_set, test_set = examples[:split], examples[split:]
+    print(f"🧠 Training on {len(train_set)} tickets, evaluating on {len(test_set)}...")
+
+    model = LocalIntentModel(INTENT_CATEGORIES, n_features=n_features)
+    model.fit([t for t, _ in train_set], [i for _, i in train_set], epochs=epochs)
+
+    if test_set:
+        accuracy = model.evaluate([t for t, _ in test_set], [i for _, i in test_set])
+        print(f"📊 Holdout accuracy: {accuracy:.3f}")
+
+    model.save(output)
+    print(f"💾 Saved model to: {output} ({Path(output).stat().st_size / 1024:.0f} KiB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent model")
+    parser.add_argument(
+        "--input",
+        action="append",
+        help="Parquet ticket dataset or JSON/JSONL file (repeatable, default: both generated corpora)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="models/intent_model.npz",
+        help="Model artifact path (default: models/intent_model.npz)"
+    )
+    parser.add_argument(
+        "--features",
+        type=int,
+        default=2 ** 16,
+        help="Number of hashed feature buckets (default: 65536)"
+    )
+    parser.add_argument(
+        "--epochs",
+        type=int,
+        default=8,
+        help="Training epochs (default: 8)"
+    )
+    parser.add_argument(
+        "--holdout",
+        type=float,
+        default=0.1,
+        help="Fraction of tickets held out for evaluation (default: 0.1)"
+    )
+
+    args = parser.parse_args()
+
+    train(args.input or DEFAULT_INPUTS, args.output, args.features, args.epochs, args.holdout)
+
+
+if __name__ == "__main__":
+    main()
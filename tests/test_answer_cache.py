@@ -0,0 +1,134 @@
+"""
+Tests for the answer cache keying and invalidation
+"""
+
+import asyncio
+
+import pytest
+
+from agents.answer_cache import AnswerCache, SharedAnswerTier
+
+REMOTE_WORK = {"id": "policy_remote_work", "title": "Remote Work Policy", "last_updated": "2024-01-10"}
+EQUIPMENT = {"id": "policy_equipment", "title": "Equipment Policy", "last_updated": "2024-02-01"}
+
+
+def make_results(policies=(REMOTE_WORK, EQUIPMENT), intent="POLICY_QUESTION", **overrides):
+    results = {
+        "classify": {"intent": intent, "confidence": 0.9, "entities": {}},
+        "knowledge": {"policies": [dict(p) for p in policies]},
+        "runbook": None,
+        "escalate": {"escalate": False, "reason": None}
+    }
+    results.update(overrides)
+    return results
+
+
+def test_different_questions_with_same_policies_get_different_keys():
+    results = make_results()
+    first = AnswerCache.key("Can I work remotely from home?", results)
+    second = AnswerCache.key("Which equipment do I get for remote work?", results)
+    assert first is not None and second is not None
+    assert first != second
+
+
+def test_trivially_different_phrasings_share_a_key():
+    results = make_results()
+    assert AnswerCache.key("Can I work remotely from home?", results) == \
+        AnswerCache.key("  can I work remotely   from home ", results)
+
+
+def test_policy_version_is_part_of_the_key():
+    updated = dict(REMOTE_WORK, last_updated="2025-06-01")
+    question = "Can I work remotely from home?"
+    assert AnswerCache.key(question, make_results()) != \
+        AnswerCache.key(question, make_results(policies=(updated, EQUIPMENT)))
+
+
+def test_uncacheable_results_have_no_key():
+    question = "How many sick days do I have?"
+    assert AnswerCache.key(question, make_results(intent="LEAVE_REQUEST")) is None
+    assert AnswerCache.key(question, make_results(escalate={"escalate": True})) is None
+    assert AnswerCache.key(question, make_results(runbook={"status": "completed"})) is None
+    assert AnswerCache.key(question, make_results(policies=())) is None
+    degraded = make_results(knowledge={"policies": [REMOTE_WORK], "degraded": True})
+    assert AnswerCache.key(question, degraded) is None
+
+
+def test_invalidate_policy_drops_only_dependent_answers():
+    async def run():
+        cache = AnswerCache()
+        remote = make_results(policies=(REMOTE_WORK,))
+        equipment = make_results(policies=(EQUIPMENT,))
+        remote_key = AnswerCache.key("Can I work remotely?", remote)
+        equipment_key = AnswerCache.key("Which laptop do I get?", equipment)
+        await cache.set(remote_key, remote, "remote answer")
+        await cache.set(equipment_key, equipment, "equipment answer")
+
+        assert await cache.invalidate_policy(REMOTE_WORK["id"]) == 1
+        assert await cache.get(remote_key, remote) is None
+        assert await cache.get(equipment_key, equipment) == "equipment answer"
+
+    asyncio.run(run())
+
+
+def test_newer_policy_version_evicts_old_answers():
+    async def run():
+        cache = AnswerCache()
+        results = make_results(policies=(REMOTE_WORK,))
+        key = AnswerCache.key("Can I work remotely?", results)
+        await cache.set(key, results, "old answer")
+
+        updated = make_results(policies=(dict(REMOTE_WORK, last_updated="2025-06-01"),))
+        new_key = AnswerCache.key("Can I work remotely?", updated)
+        assert await cache.get(new_key, updated) is None
+        assert len(cache) == 0
+
+    asyncio.run(run())
+
+
+def test_lru_is_bounded():
+    async def run():
+        cache = AnswerCache(maxsize=2)
+        results = make_results()
+        for question in ("a?", "b?", "c?"):
+            await cache.set(AnswerCache.key(question, results), results, question)
+        assert len(cache) == 2
+        assert await cache.get(AnswerCache.key("a?", results), results) is None
+
+    asyncio.run(run())
+
+
+class DictTier(SharedAnswerTier):
+    def __init__(self):
+        self.answers = {}
+
+    async def get(self, key):
+        return self.answers.get(key)
+
+    async def set(self, key, answer, policies):
+        self.answers[key] = answer
+
+    async def invalidate(self, policy_id):
+        return 0
+
+
+def test_shared_tier_serves_answers_stored_by_another_instance():
+    async def run():
+        shared = DictTier()
+        results = make_results()
+        key = AnswerCache.key("Can I work remotely?", results)
+        await AnswerCache(shared=shared).set(key, results, "shared answer")
+        other = AnswerCache(shared=shared)
+        assert await other.get(key, results) == "shared answer"
+        assert other.stats["shared_hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_shared_tiers_must_implement_the_whole_interface():
+    class GetOnly(SharedAnswerTier):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
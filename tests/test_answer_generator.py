@@ -0,0 +1,138 @@
+"""
+Tests for answer outcomes and which generated answers get cached
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from agents.answer_generator import DEFAULT_ANSWER, AnswerGenerator, AnswerOutcome
+from agents.orchestrator import OrchestratorAgent
+
+POLICY = {"id": "policy_remote_work", "title": "Remote Work Policy", "last_updated": "2024-01-10"}
+QUESTION = "Can I work remotely from home?"
+
+
+def chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class FakeStream:
+    """Chat completion stream yielding chunks, optionally failing after them."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = list(chunks)
+        self.error = error
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self.chunks:
+            yield item
+        if self.error is not None:
+            raise self.error
+
+
+class FakeClient:
+    def __init__(self, stream):
+        self.calls = 0
+
+        async def create(**kwargs):
+            self.calls += 1
+            return stream
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def make_results():
+    return {
+        "classify": {"intent": "POLICY_QUESTION", "confidence": 0.9, "entities": {}},
+        "knowledge": {"policies": [dict(POLICY, content="Employees may work remotely.")]},
+        "runbook": None,
+        "escalate": {"escalate": False, "reason": None}
+    }
+
+
+def generate(stream):
+    generator = AnswerGenerator()
+    generator._client = FakeClient(stream)
+    results = make_results()
+    outcome = AnswerOutcome()
+    answer = asyncio.run(generator.generate(
+        QUESTION, results["classify"], results["knowledge"], None, results["escalate"], outcome=outcome
+    ))
+    return answer, outcome
+
+
+def test_finished_answer_is_complete():
+    answer, outcome = generate(FakeStream([chunk("Yes, "), chunk("you can."), chunk(finish_reason="stop")]))
+    assert answer == "Yes, you can."
+    assert outcome.finish_reason == "stop"
+    assert outcome.complete
+
+
+def test_answer_cut_off_by_max_tokens_is_not_complete():
+    answer, outcome = generate(FakeStream([chunk("Yes, "), chunk(finish_reason="length")]))
+    assert answer == "Yes, "
+    assert not outcome.complete
+
+
+def test_stream_failing_midway_is_not_complete():
+    answer, outcome = generate(FakeStream([chunk("Yes, ")], error=RuntimeError("connection reset")))
+    assert answer == "Yes, "
+    assert outcome.error == "RuntimeError"
+    assert not outcome.complete
+
+
+def test_failure_before_any_text_falls_back_to_the_default():
+    answer, outcome = generate(FakeStream([], error=RuntimeError("connection refused")))
+    assert answer == DEFAULT_ANSWER
+    assert not outcome.complete
+
+
+def make_orchestrator(stream):
+    orchestrator = OrchestratorAgent({"answer_generation": True, "answer_cache": True})
+    orchestrator.answer_generator._client = client = FakeClient(stream)
+
+    async def run_pipeline(pipeline, on_stage=None):
+        return make_results()
+
+    orchestrator._run_pipeline = run_pipeline
+    return orchestrator, client
+
+
+def test_partial_answer_is_not_cached():
+    orchestrator, client = make_orchestrator(FakeStream([chunk("Yes, "), chunk(finish_reason="length")]))
+
+    async def scenario():
+        await orchestrator.process_request(QUESTION, "user-1")
+        await orchestrator.process_request(QUESTION, "user-2")
+
+    asyncio.run(scenario())
+    assert len(orchestrator.answer_cache) == 0
+    assert client.calls == 2
+
+
+def test_partial_streamed_answer_is_not_cached():
+    orchestrator, client = make_orchestrator(FakeStream([chunk("Yes, ")], error=RuntimeError("reset")))
+
+    async def scenario():
+        return [event async for event in orchestrator.stream_request(QUESTION, "user-1")]
+
+    events = asyncio.run(scenario())
+    assert ("answer", {"delta": "Yes, "}) in events
+    assert len(orchestrator.answer_cache) == 0
+
+
+def test_complete_answer_is_cached_and_reused():
+    orchestrator, client = make_orchestrator(FakeStream([chunk("Yes, you can."), chunk(finish_reason="stop")]))
+
+    async def scenario():
+        first = await orchestrator.process_request(QUESTION, "user-1")
+        second = await orchestrator.process_request(QUESTION, "user-2")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["answer"] == second["answer"] == "Yes, you can."
+    assert client.calls == 1
@@ -0,0 +1,92 @@
+"""
+Tests for the conversation store's write-behind flushing
+"""
+
+import asyncio
+
+import pytest
+
+from agents.conversation import ConversationBackend, ConversationStore
+
+
+class RecordingBackend(ConversationBackend):
+    """Keeps saved states in memory; can fail saves or hold them open."""
+
+    def __init__(self, failures=0):
+        self.saved = {}
+        self.saves = 0
+        self.failures = failures
+        self.hold = None
+
+    async def load(self, user_id):
+        return self.saved.get(user_id)
+
+    async def save(self, states):
+        self.saves += 1
+        if self.hold is not None:
+            await self.hold.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("storage unavailable")
+        for state in states:
+            self.saved[state["user_id"]] = state
+
+
+async def settle(store, timeout=1.0):
+    for _ in range(int(timeout / 0.01)):
+        if not store._dirty and (store._flusher is None or store._flusher.done()):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("flusher did not settle")
+
+
+def test_failed_save_is_retried_by_the_flusher():
+    backend = RecordingBackend(failures=2)
+    store = ConversationStore(backend, flush_interval=0.01)
+
+    async def scenario():
+        await store.append("alice", "user", "How many vacation days do I have?")
+        await settle(store)
+
+    asyncio.run(scenario())
+    assert backend.saves == 3
+    assert backend.saved["alice"]["turns"][0]["content"] == "How many vacation days do I have?"
+
+
+def test_writes_made_during_a_save_are_flushed():
+    backend = RecordingBackend()
+    store = ConversationStore(backend, flush_interval=0.01)
+
+    async def scenario():
+        backend.hold = asyncio.Event()
+        await store.append("alice", "user", "first")
+        while backend.saves == 0:
+            await asyncio.sleep(0.01)
+        # The first save is in progress; this write must not wait for a new one
+        await store.append("bob", "user", "second")
+        backend.hold.set()
+        await settle(store)
+
+    asyncio.run(scenario())
+    assert set(backend.saved) == {"alice", "bob"}
+
+
+def test_close_saves_pending_writes():
+    backend = RecordingBackend()
+    store = ConversationStore(backend, flush_interval=60)
+
+    async def scenario():
+        await store.append("alice", "user", "first")
+        await store.close()
+
+    asyncio.run(scenario())
+    assert "alice" in backend.saved
+
+
+def test_backends_must_implement_load_and_save():
+    class LoadOnly(ConversationBackend):
+        async def load(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        LoadOnly()
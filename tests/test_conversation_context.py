@@ -0,0 +1,65 @@
+"""
+Tests for when a user's conversation history is sent to the intent classifier
+"""
+
+import asyncio
+
+from agents.conversation import ConversationStore
+from agents.orchestrator import OrchestratorAgent
+
+
+def make_orchestrator(ambiguous=()):
+    orchestrator = OrchestratorAgent({"conversation_context_threshold": 0.7})
+    orchestrator.conversations = ConversationStore()
+    calls = []
+
+    async def classify_intent(message, context):
+        calls.append((message, context))
+        await asyncio.sleep(0.01)
+        if message in ambiguous and not (context and context.get("recent_turns")):
+            return {"intent": "UNKNOWN", "confidence": 0.3, "entities": {}, "requires_clarification": True}
+        return {"intent": "LEAVE_REQUEST", "confidence": 0.95, "entities": {}}
+
+    orchestrator._classify_intent = classify_intent
+    return orchestrator, calls
+
+
+async def with_history(orchestrator, *user_ids):
+    for user_id in user_ids:
+        await orchestrator.conversations.append(user_id, "user", "I want to take leave next month")
+
+
+def test_clear_messages_are_shared_between_users_with_history():
+    orchestrator, calls = make_orchestrator()
+
+    async def scenario():
+        await with_history(orchestrator, "alice", "bob")
+        return await asyncio.gather(
+            orchestrator.process_request("Request two days off", "alice"),
+            orchestrator.process_request("Request two days off", "bob")
+        )
+
+    responses = asyncio.run(scenario())
+    assert [r["intent"] for r in responses] == ["LEAVE_REQUEST", "LEAVE_REQUEST"]
+    assert calls == [("Request two days off", None)]
+
+
+def test_unclear_follow_up_is_classified_again_with_the_history():
+    orchestrator, calls = make_orchestrator(ambiguous=("and the week after?",))
+
+    async def scenario():
+        await with_history(orchestrator, "alice")
+        return await orchestrator.process_request("and the week after?", "alice")
+
+    response = asyncio.run(scenario())
+    assert response["intent"] == "LEAVE_REQUEST"
+    assert len(calls) == 2
+    assert calls[0][1] is None
+    assert calls[1][1]["recent_turns"][0]["content"] == "I want to take leave next month"
+
+
+def test_new_users_are_not_classified_twice():
+    orchestrator, calls = make_orchestrator(ambiguous=("and the week after?",))
+    response = asyncio.run(orchestrator.process_request("and the week after?", "carol"))
+    assert response["intent"] == "UNKNOWN"
+    assert len(calls) == 1
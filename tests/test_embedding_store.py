@@ -0,0 +1,48 @@
+"""
+Tests for building, rebuilding and searching memory-mapped embedding stores
+"""
+
+import numpy as np
+
+from agents.embedding_store import CENTROIDS_FILE, EmbeddingStore
+
+
+def make_vectors(count=200, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return [f"ticket-{i}" for i in range(count)], vectors
+
+
+def build(path, ids, vectors, nlist=0):
+    batches = (vectors[s:s + 64] for s in range(0, len(vectors), 64))
+    EmbeddingStore.build(str(path), ids, batches, "test", dtype="float32", nlist=nlist, sample_size=200)
+
+
+def test_flat_and_ivf_stores_find_the_query_vector(tmp_path):
+    ids, vectors = make_vectors()
+    for nlist in (0, 4):
+        build(tmp_path / str(nlist), ids, vectors, nlist=nlist)
+        store = EmbeddingStore(str(tmp_path / str(nlist)))
+        assert len(store) == len(ids)
+        assert store.search(vectors[17], k=1, nprobe=4)[0][0] == "ticket-17"
+    assert sorted(p.name for p in (tmp_path / "4").iterdir()) == [
+        "centroids.npy", "ids.npy", "meta.json", "offsets.npy", "vectors.npy"
+    ]
+
+
+def test_rebuild_leaves_an_open_store_readable(tmp_path):
+    ids, vectors = make_vectors()
+    build(tmp_path, ids, vectors, nlist=4)
+    before = EmbeddingStore(str(tmp_path))
+    expected = np.array(before.vectors)
+
+    new_ids, new_vectors = make_vectors(seed=1)
+    build(tmp_path, new_ids, new_vectors, nlist=4)
+    # The open store still maps the files it was opened with
+    assert np.array_equal(np.array(before.vectors), expected)
+    assert before.search(vectors[17], k=1, nprobe=4)[0][0] == "ticket-17"
+
+    build(tmp_path, new_ids, new_vectors)
+    after = EmbeddingStore(str(tmp_path))
+    assert not (tmp_path / CENTROIDS_FILE).exists()
+    assert after.search(new_vectors[3], k=1)[0][0] == "ticket-3"
+    assert not list(tmp_path.glob("*.tmp"))
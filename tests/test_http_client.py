@@ -0,0 +1,37 @@
+"""
+Tests for reusing and replacing pooled agent HTTP clients
+"""
+
+import asyncio
+
+from agents import http_client
+
+
+async def get_client():
+    return http_client.get_client("escalation")
+
+
+def test_client_is_reused_within_a_loop():
+    async def scenario():
+        first = http_client.get_client("escalation")
+        assert http_client.get_client("escalation") is first
+        await http_client.aclose_all()
+        assert first.is_closed
+
+    asyncio.run(scenario())
+
+
+def test_client_from_another_loop_is_replaced_and_closed():
+    old = asyncio.run(get_client())
+
+    async def scenario():
+        new = http_client.get_client("escalation")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert old.is_closed
+        await http_client.aclose_all()
+        return new
+
+    new = asyncio.run(scenario())
+    assert new is not old
+    assert new.is_closed
@@ -0,0 +1,28 @@
+"""
+Tests for the semantic tier of the intent cache
+"""
+
+from agents.cache import SemanticCache
+
+
+def test_digests_are_forgotten_when_their_last_slot_is_overwritten():
+    cache = SemanticCache(threshold=0.9, maxsize=3)
+    for i in range(100):
+        cache.add([1.0, 0.0], f"context-{i}", i)
+    assert len(cache._group_ids) == len(cache._group_digests) == 3
+    assert cache.lookup([1.0, 0.0], "context-99") == 99
+    assert cache.lookup([1.0, 0.0], "context-0") is None
+
+
+def test_digest_stays_while_any_of_its_slots_is_live():
+    cache = SemanticCache(threshold=0.9, maxsize=3)
+    cache.add([1.0, 0.0], "shared", "first")
+    cache.add([0.0, 1.0], "shared", "second")
+    cache.add([1.0, 0.0], "other", "third")
+    cache.add([1.0, 1.0], "other", "fourth")
+    # The first "shared" slot is gone, the second still answers
+    assert cache.lookup([0.0, 1.0], "shared") == "second"
+    assert cache.lookup([1.0, 0.0], "shared") is None
+    cache.add([1.0, 1.0], "other", "fifth")
+    assert "shared" not in cache._group_ids
+    assert cache.lookup([1.0, 0.0], "other") == "third"
@@ -0,0 +1,198 @@
+"""
+Tests for job priorities, lease expiry and lease tokens on both queue backends
+"""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from agents.job_queue import (
+    FAILED,
+    PRIORITIES,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    InMemoryJobQueue,
+    JobQueue,
+    JobWorkerPool,
+    SQLiteJobQueue
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_queue(request, tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        if request.param == "memory":
+            queue = InMemoryJobQueue(**kwargs)
+        else:
+            queue = SQLiteJobQueue(str(tmp_path / f"jobs{len(queues)}.db"))
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        asyncio.run(queue.close())
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_most_urgent_job_is_claimed_first(make_queue):
+    queue = make_queue()
+    run(queue.enqueue({"n": "bulk"}, PRIORITIES["bulk"]))
+    run(queue.enqueue({"n": "interactive"}, PRIORITIES["interactive"]))
+    run(queue.enqueue({"n": "normal"}))
+    order = [run(queue.claim(60)).payload["n"] for _ in range(3)]
+    assert order == ["interactive", "normal", "bulk"]
+    assert run(queue.claim(60)) is None
+
+
+def test_expired_lease_is_claimed_again(make_queue):
+    queue = make_queue()
+    job = run(queue.enqueue({}))
+    first = run(queue.claim(0.01))
+    assert run(queue.claim(60)) is None
+    time.sleep(0.02)
+    second = run(queue.claim(60))
+    assert second.id == job.id
+    assert (first.attempts, second.attempts) == (1, 2)
+
+
+def test_lease_runs_out_after_the_last_attempt(make_queue):
+    queue = make_queue()
+    job = run(queue.enqueue({}, max_attempts=1))
+    run(queue.claim(0.01))
+    time.sleep(0.02)
+    assert run(queue.claim(60)) is None
+    assert run(queue.get(job.id)).status == FAILED
+
+
+def test_stale_attempt_cannot_overwrite_the_new_one(make_queue):
+    queue = make_queue()
+    job = run(queue.enqueue({}))
+    stale = run(queue.claim(0.01))
+    time.sleep(0.02)
+    current = run(queue.claim(60))
+
+    assert not run(queue.extend(job.id, stale.attempts, 60))
+    assert run(queue.fail(job.id, stale.attempts, "boom")) is None
+    assert not run(queue.complete(job.id, stale.attempts, "stale"))
+    assert run(queue.get(job.id)).status == RUNNING
+
+    assert run(queue.extend(job.id, current.attempts, 60))
+    assert run(queue.complete(job.id, current.attempts, "fresh"))
+    finished = run(queue.get(job.id))
+    assert (finished.status, finished.result) == (SUCCEEDED, "fresh")
+
+
+def test_result_is_kept_when_the_lease_expired_but_nobody_took_over(make_queue):
+    queue = make_queue()
+    job = run(queue.enqueue({}))
+    claimed = run(queue.claim(0.01))
+    time.sleep(0.02)
+    assert run(queue.complete(job.id, claimed.attempts, "late"))
+    assert run(queue.claim(60)) is None
+    assert run(queue.get(job.id)).status == SUCCEEDED
+
+
+def test_fail_requeues_until_attempts_are_used_up(make_queue):
+    queue = make_queue()
+    job = run(queue.enqueue({}, max_attempts=2))
+    claimed = run(queue.claim(60))
+    assert run(queue.fail(job.id, claimed.attempts, "boom")).status == QUEUED
+    claimed = run(queue.claim(60))
+    assert run(queue.fail(job.id, claimed.attempts, "boom")).status == FAILED
+    # Failing twice with the same attempt is a no-op
+    assert run(queue.fail(job.id, claimed.attempts, "boom")) is None
+
+
+def test_fail_and_complete_ignore_evicted_jobs():
+    queue = InMemoryJobQueue(max_finished=1)
+    first = run(queue.enqueue({}))
+    claimed = run(queue.claim(60))
+    run(queue.complete(first.id, claimed.attempts, "done"))
+    second = run(queue.enqueue({}))
+    run(queue.complete(second.id, run(queue.claim(60)).attempts, "done"))
+    assert run(queue.get(first.id)) is None
+    assert run(queue.fail(first.id, claimed.attempts, "boom")) is None
+    assert not run(queue.complete(first.id, claimed.attempts, "again"))
+
+
+def test_worker_pool_retries_and_records_results(make_queue):
+    queue = make_queue()
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload["n"])
+        if len(calls) == 1:
+            raise RuntimeError("flaky")
+        return {"echo": payload["n"]}
+
+    async def scenario():
+        job = await queue.enqueue({"n": 1})
+        pool = JobWorkerPool(queue, handler, concurrency=1, retry_delay=0, poll_interval=0.01)
+        pool.start()
+        try:
+            for _ in range(200):
+                current = await queue.get(job.id)
+                if current.status == SUCCEEDED:
+                    return current
+                await asyncio.sleep(0.01)
+        finally:
+            await pool.stop()
+
+    finished = run(scenario())
+    assert finished.result == {"echo": 1}
+    assert finished.attempts == 2
+    assert calls == [1, 1]
+
+
+def test_worker_keeps_consuming_when_recording_an_outcome_fails():
+    class LockedOnce(InMemoryJobQueue):
+        locked = True
+
+        async def complete(self, job_id, attempt, result):
+            if self.locked:
+                self.locked = False
+                raise sqlite3.OperationalError("database is locked")
+            return await super().complete(job_id, attempt, result)
+
+    queue = LockedOnce()
+    calls = []
+
+    async def handler(payload):
+        calls.append(payload["n"])
+        return {"echo": payload["n"]}
+
+    async def scenario():
+        job = await queue.enqueue({"n": 1})
+        pool = JobWorkerPool(queue, handler, concurrency=1, visibility_timeout=0.05, poll_interval=0.01)
+        pool.start()
+        try:
+            for _ in range(200):
+                current = await queue.get(job.id)
+                if current.status == SUCCEEDED:
+                    return current
+                await asyncio.sleep(0.01)
+        finally:
+            assert not any(task.done() for task in pool._tasks)
+            await pool.stop()
+
+    finished = run(scenario())
+    # The lease ran out and the same consumer ran the job again
+    assert finished.attempts == 2
+    assert calls == [1, 1]
+
+
+def test_backends_must_implement_the_whole_interface():
+    class Partial(JobQueue):
+        async def enqueue(self, payload, priority=PRIORITIES["normal"], max_attempts=3):
+            raise NotImplementedError
+
+    with pytest.raises(TypeError):
+        Partial()
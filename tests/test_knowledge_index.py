@@ -0,0 +1,52 @@
+"""
+Tests for hybrid search scores and document loading
+"""
+
+import json
+
+import numpy as np
+
+from agents.knowledge_index import HybridIndex, load_documents
+
+DOCUMENTS = [
+    {"id": "vacation", "title": "Vacation Policy", "content": "Employees get 25 vacation days per year.",
+     "category": "leave"},
+    {"id": "remote", "title": "Remote Work Policy", "content": "Employees may work remotely two days a week.",
+     "category": "remote"},
+    {"id": "expenses", "title": "Expense Policy", "content": "Submit travel expenses within 30 days.",
+     "category": "finance"},
+]
+
+
+def test_relevance_tells_good_matches_from_poor_ones():
+    index = HybridIndex(DOCUMENTS)
+    good = index.search("vacation days per year")
+    poor = index.search("kite flying mountains year")
+    # Rank fusion scores the top hit 1.0 either way
+    assert good[0]["score"] == poor[0]["score"] == 1.0
+    assert good[0]["id"] == "vacation"
+    assert 0 < poor[0]["relevance"] < good[0]["relevance"] <= 1.0
+
+
+def test_relevance_is_the_cosine_similarity_with_vectors():
+    vectors = np.eye(3, dtype=np.float32)
+    index = HybridIndex(DOCUMENTS, vectors, "test")
+    query = np.array([0.6, 0.8, 0.0], dtype=np.float32)
+    results = {r["id"]: r for r in index.search("policy", query)}
+    assert results["vacation"]["relevance"] == 0.6
+    assert results["remote"]["relevance"] == 0.8
+    assert results["expenses"]["relevance"] == 0.0
+
+
+def test_load_documents_reads_json_jsonl_and_text_files(tmp_path):
+    (tmp_path / "policies.json").write_text(json.dumps(DOCUMENTS[:2]))
+    (tmp_path / "more.jsonl").write_text(json.dumps(DOCUMENTS[2]) + "\n\n")
+    (tmp_path / "benefits").mkdir()
+    (tmp_path / "benefits" / "dental_plan.md").write_text("Dental is covered.")
+    (tmp_path / "onboarding.txt").write_text("Welcome aboard.")
+
+    documents = {d["id"]: d for d in load_documents(str(tmp_path))}
+    assert set(documents) == {"vacation", "remote", "expenses", "dental_plan", "onboarding"}
+    assert documents["dental_plan"]["title"] == "Dental Plan"
+    assert documents["dental_plan"]["category"] == "benefits"
+    assert documents["onboarding"]["category"] == "general"
@@ -0,0 +1,45 @@
+"""
+Tests for coalescing duplicate requests in a batch
+"""
+
+import asyncio
+
+from agents.orchestrator import OrchestratorAgent
+
+REQUESTS = [
+    ("How many vacation days do I have?", "alice", None),
+    ("how many vacation days do I have? ", "bob", None),
+    ("How many vacation days do I have?", "alice", None),
+]
+
+
+def run_batch(config):
+    orchestrator = OrchestratorAgent(config)
+    calls = []
+
+    async def process_request(message, user_id, context=None):
+        calls.append(user_id)
+        return {"answer": f"for {user_id}"}
+
+    orchestrator.process_request = process_request
+
+    async def scenario():
+        return [item async for item in orchestrator.process_batch(REQUESTS)]
+
+    items = sorted(asyncio.run(scenario()), key=lambda item: item["index"])
+    return items, calls
+
+
+def test_copies_are_shared_across_users_without_runbooks():
+    items, calls = run_batch({})
+    assert len(calls) == 1
+    assert all(item.get("coalesced") for item in items)
+
+
+def test_runbook_outcomes_are_not_fanned_out_to_other_users():
+    items, calls = run_batch({"runbook_executor_url": "http://runbooks.local/execute"})
+    assert sorted(calls) == ["alice", "bob"]
+    assert items[1]["result"] == {"answer": "for bob"}
+    # A user's own repeat is still processed once
+    assert items[0]["result"] == items[2]["result"] == {"answer": "for alice"}
+    assert items[0]["coalesced"] and not items[1].get("coalesced")
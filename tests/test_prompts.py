@@ -0,0 +1,45 @@
+"""
+Tests for lazy prompt token accounting and the tokenizer fallback
+"""
+
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+from agents import tokens
+from agents.prompts import PromptTemplate, TokenBudget
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_agents_does_not_load_the_tokenizer():
+    code = (
+        "import sys\n"
+        "import agents.orchestrator, agents.answer_generator, agents.intent_classifier\n"
+        "from agents.tokens import _encoding\n"
+        "assert _encoding.cache_info().currsize == 0\n"
+        "assert 'tiktoken' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+
+
+def test_unloadable_encoding_falls_back_to_the_estimate(monkeypatch):
+    def get_encoding(name):
+        raise ConnectionError("no network")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+    tokens._encoding.cache_clear()
+    try:
+        assert tokens.count_tokens("twelve chars") == 3
+        assert tokens.truncate_tokens("abcdefghij", 2) == "abcdefgh"
+    finally:
+        tokens._encoding.cache_clear()
+
+
+def test_system_tokens_are_counted_on_first_use():
+    template = PromptTemplate("test", "You are a helpful assistant.")
+    assert template._system_tokens is None
+    prompt = template.build("hello", TokenBudget(1000, 100))
+    assert template._system_tokens == template.system_tokens > 0
+    assert prompt.prompt_tokens > template.system_tokens
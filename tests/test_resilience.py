@@ -0,0 +1,182 @@
+"""
+Tests for circuit breaker state changes and deadline handling in agent calls
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from agents import resilience
+from agents.orchestrator import OrchestratorAgent
+from agents.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    AgentGuard,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded
+)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("agent", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.failures == 0
+    open_breaker(breaker)
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_half_open_admits_one_trial_and_closes_on_success():
+    breaker = CircuitBreaker("agent", failure_threshold=1, reset_timeout=0)
+    open_breaker(breaker)
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens_and_released_trial_is_given_back():
+    breaker = CircuitBreaker("agent", failure_threshold=1, reset_timeout=0)
+    open_breaker(breaker)
+    breaker.allow()
+    breaker.release()
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def make_guard(timeout=None, **breaker_kwargs):
+    return AgentGuard("agent", CircuitBreaker("agent", **breaker_kwargs), timeout=timeout)
+
+
+def test_guard_passes_the_agent_timeout_without_a_deadline():
+    guard = make_guard(timeout=5.0)
+    seen = []
+
+    async def func(timeout):
+        seen.append(timeout)
+        return "ok"
+
+    assert asyncio.run(guard.call(func)) == "ok"
+    assert seen == [5.0]
+
+
+def test_guard_caps_the_agent_timeout_at_the_deadline():
+    guard = make_guard(timeout=5.0)
+    seen = []
+
+    async def func(timeout):
+        seen.append(timeout)
+        return "ok"
+
+    async def scenario():
+        with resilience.deadline(1.0):
+            return await guard.call(func)
+
+    asyncio.run(scenario())
+    assert 0 < seen[0] <= 1.0
+
+
+def test_expired_deadline_does_not_touch_the_breaker():
+    guard = make_guard(timeout=5.0, failure_threshold=1, reset_timeout=0)
+    open_breaker(guard.breaker)
+    called = []
+
+    async def func(timeout):
+        called.append(timeout)
+        return "ok"
+
+    async def expired():
+        with resilience.deadline(0.001):
+            time.sleep(0.005)
+            return await guard.call(func)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(expired())
+    assert not called
+    assert guard.breaker.state == OPEN
+    # The half-open trial is still available to the next request
+    assert asyncio.run(guard.call(func)) == "ok"
+    assert guard.breaker.state == CLOSED
+
+
+def test_call_cut_short_by_the_deadline_is_not_a_failure():
+    guard = make_guard(timeout=5.0, failure_threshold=1)
+
+    async def slow(timeout):
+        await asyncio.sleep(1)
+
+    async def scenario():
+        with resilience.deadline(0.02):
+            await guard.call(slow)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scenario())
+    assert guard.breaker.state == CLOSED
+    assert guard.breaker.failures == 0
+
+
+def test_agent_timeout_counts_as_a_failure():
+    guard = make_guard(timeout=0.02, failure_threshold=1)
+
+    async def slow(timeout):
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError) as raised:
+        asyncio.run(guard.call(slow))
+    assert not isinstance(raised.value, DeadlineExceeded)
+    assert guard.breaker.state == OPEN
+
+
+def test_errors_count_as_failures():
+    guard = make_guard(failure_threshold=2)
+
+    async def broken(timeout):
+        raise ConnectionError("refused")
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(guard.call(broken))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(broken))
+
+
+def test_stage_degrades_when_its_deadline_passes_while_waiting_on_a_shared_call():
+    orchestrator = OrchestratorAgent({"request_deadline": 0.05})
+    release = asyncio.Event()
+
+    async def classify_intent(message, context):
+        await release.wait()
+        return {"intent": "POLICY_QUESTION", "confidence": 0.9, "entities": {}}
+
+    orchestrator._classify_intent = classify_intent
+
+    async def scenario():
+        leader = asyncio.ensure_future(orchestrator.process_request("Can I work remotely?", "alice"))
+        await asyncio.sleep(0.03)
+        follower = asyncio.ensure_future(orchestrator.process_request("Can I work remotely?", "bob"))
+        first = await leader
+        release.set()
+        return first, await follower
+
+    first, second = asyncio.run(scenario())
+    assert first["intent"] == "UNKNOWN" and first["degraded"] == ["classify"]
+    assert second["intent"] == "POLICY_QUESTION" and second["degraded"] == []
@@ -0,0 +1,245 @@
+"""
+Tests for sharing, copying and cancelling coalesced in-flight calls
+"""
+
+import asyncio
+
+import pytest
+
+from agents import resilience
+from agents.singleflight import SingleFlight
+
+
+class Work:
+    """A call that blocks until released and counts how often it started."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = False
+        self.release = None
+
+    async def __call__(self):
+        self.started += 1
+        if self.release is None:
+            self.release = asyncio.Event()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"intent": "LEAVE_REQUEST", "entities": {"days": [1, 2]}}
+
+
+async def until(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("condition never held")
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        callers = [asyncio.ensure_future(group.do("key", work)) for _ in range(5)]
+        await until(lambda: work.release is not None)
+        work.release.set()
+        return await asyncio.gather(*callers)
+
+    results = asyncio.run(scenario())
+    assert work.started == 1
+    assert all(r == results[0] for r in results)
+    assert len(group) == 0
+
+
+def test_followers_get_their_own_copy():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        leader = asyncio.ensure_future(group.do("key", work))
+        follower = asyncio.ensure_future(group.do("key", work))
+        await until(lambda: work.release is not None)
+        work.release.set()
+        return await leader, await follower
+
+    leader, follower = asyncio.run(scenario())
+    follower["entities"]["days"].append(3)
+    assert leader["entities"]["days"] == [1, 2]
+
+
+def test_different_keys_do_not_share():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        callers = [asyncio.ensure_future(group.do(key, work)) for key in ("a", "b")]
+        await until(lambda: work.started == 2)
+        work.release.set()
+        await asyncio.gather(*callers)
+
+    asyncio.run(scenario())
+    assert work.started == 2
+
+
+def test_cancelling_one_waiter_keeps_the_call_for_the_others():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        leaving = asyncio.ensure_future(group.do("key", work))
+        staying = asyncio.ensure_future(group.do("key", work))
+        await until(lambda: work.release is not None)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        work.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    result = asyncio.run(scenario())
+    assert result["intent"] == "LEAVE_REQUEST"
+    assert not work.cancelled
+    assert work.started == 1
+
+
+def test_cancelling_every_waiter_cancels_the_call_and_forgets_the_key():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        callers = [asyncio.ensure_future(group.do("key", work)) for _ in range(3)]
+        await until(lambda: work.release is not None)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await until(lambda: work.cancelled)
+        assert len(group) == 0
+        # The next caller starts fresh work instead of joining the cancelled call
+        work.release = None
+        fresh = asyncio.ensure_future(group.do("key", work))
+        await until(lambda: work.release is not None)
+        work.release.set()
+        return await fresh
+
+    result = asyncio.run(scenario())
+    assert result["intent"] == "LEAVE_REQUEST"
+    assert work.started == 2
+
+
+def test_errors_reach_every_waiter_and_are_not_remembered():
+    group = SingleFlight("test")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError("refused")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(group.do("key", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, ConnectionError) for r in results)
+        assert len(group) == 0
+        with pytest.raises(ConnectionError):
+            await group.do("key", failing)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 2
+
+
+def test_leader_mutating_its_result_does_not_reach_followers():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def leader():
+        result = await group.do("key", work)
+        # Re-ranking in place, as a stage might
+        result["entities"]["days"].reverse()
+        result["intent"] = "POLICY_QUESTION"
+        return result
+
+    async def scenario():
+        first = asyncio.ensure_future(leader())
+        follower = asyncio.ensure_future(group.do("key", work))
+        await until(lambda: work.release is not None)
+        work.release.set()
+        return await first, await follower
+
+    first, follower = asyncio.run(scenario())
+    assert first["intent"] == "POLICY_QUESTION"
+    assert follower == {"intent": "LEAVE_REQUEST", "entities": {"days": [1, 2]}}
+
+
+def test_unshared_result_is_not_copied():
+    group = SingleFlight("test")
+    result = {"intent": "LEAVE_REQUEST"}
+
+    async def once():
+        return result
+
+    assert asyncio.run(group.do("key", once)) is result
+
+
+def test_shared_call_outlives_the_leaders_deadline_for_a_follower_with_more_time():
+    group = SingleFlight("test")
+    work = Work()
+    seen = []
+
+    async def observed():
+        seen.append(resilience.remaining())
+        return await work()
+
+    async def with_deadline(seconds):
+        with resilience.deadline(seconds):
+            return await group.do("key", observed)
+
+    async def scenario():
+        leader = asyncio.ensure_future(with_deadline(0.02))
+        follower = asyncio.ensure_future(with_deadline(5))
+        with pytest.raises(resilience.DeadlineExceeded):
+            await leader
+        assert not work.cancelled
+        work.release.set()
+        return await follower
+
+    result = asyncio.run(scenario())
+    assert result["intent"] == "LEAVE_REQUEST"
+    # The call itself does not run under the leader's deadline
+    assert seen == [None]
+
+
+def test_call_is_cancelled_when_the_last_deadline_passes():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def with_deadline(seconds):
+        with resilience.deadline(seconds):
+            return await group.do("key", work)
+
+    async def scenario():
+        results = await asyncio.gather(
+            with_deadline(0.01), with_deadline(0.02), return_exceptions=True
+        )
+        assert all(isinstance(r, resilience.DeadlineExceeded) for r in results)
+        await until(lambda: work.cancelled)
+        assert len(group) == 0
+
+    asyncio.run(scenario())
+
+
+def test_expired_deadline_starts_no_work():
+    group = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        with resilience.deadline(0):
+            await group.do("key", work)
+
+    with pytest.raises(resilience.DeadlineExceeded):
+        asyncio.run(scenario())
+    assert work.started == 0
+    assert len(group) == 0